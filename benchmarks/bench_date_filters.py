@@ -0,0 +1,120 @@
+"""
+Date-range dashboard stats: date(sale_date) BETWEEN vs half-open ISO bounds vs
+the sales_daily rollup
+
+    python -m benchmarks.bench_date_filters [--sales 500000] [--repeat 5]
+
+Seeds a year of completed sales and checks that the half-open range query and
+get_filtered_stats (sales_daily) return the same numbers as the old four
+date(sale_date) BETWEEN queries. Also asserts the range query is answered from
+the covering idx_sales_status_date and the rollup by its primary key, then
+times all three for each dashboard period.
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from src.database.database_manager import DatabaseManager, day_bounds
+from .common import temp_appdata, timed, seed_catalog, seed_sales_history, print_table
+
+# The four queries get_filtered_stats used to run
+LEGACY_QUERIES = [
+    "SELECT COUNT(*) FROM sales WHERE status = 'completed' AND date(sale_date) BETWEEN ? AND ?",
+    "SELECT COALESCE(SUM(total_amount), 0) FROM sales WHERE status = 'completed' AND date(sale_date) BETWEEN ? AND ?",
+    "SELECT COALESCE(SUM(total_profit), 0) FROM sales WHERE status = 'completed' AND date(sale_date) BETWEEN ? AND ?",
+    "SELECT COUNT(DISTINCT customer_id) FROM sales WHERE status = 'completed' AND customer_id IS NOT NULL AND date(sale_date) BETWEEN ? AND ?",
+]
+
+
+# The same stats from raw sales rows in one pass over idx_sales_status_date
+RANGE_STATS_QUERY = """
+    SELECT COUNT(*),
+           COALESCE(SUM(total_amount), 0),
+           COALESCE(SUM(total_profit), 0),
+           COUNT(DISTINCT customer_id)
+    FROM sales
+    WHERE status = 'completed'
+    AND sale_date >= ? AND sale_date < ?
+"""
+
+ROLLUP_QUERY = "SELECT SUM(sales_count) FROM sales_daily WHERE day >= ? AND day < ?"
+
+
+def dashboard_periods(today):
+    """The ranges DashboardPage.get_date_range produces"""
+    monday = today - timedelta(days=today.weekday())
+    first_of_month = today.replace(day=1)
+    last_month_end = first_of_month - timedelta(days=1)
+    return [
+        ("Today", today, today),
+        ("This Week", monday, today),
+        ("This Month", first_of_month, today),
+        ("Previous Month", last_month_end.replace(day=1), last_month_end),
+    ]
+
+
+def legacy_filtered_stats(conn, start, end):
+    return tuple(conn.execute(sql, (start, end)).fetchone()[0] for sql in LEGACY_QUERIES)
+
+
+def query_plan(conn, sql, params):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sales", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_appdata():
+        db = DatabaseManager()
+        seed_sales_history(db, args.sales, seed_catalog(db, 200))
+        # The seed writes sales rows directly, so backfill the rollup
+        db.rebuild_sales_daily()
+        db.conn.execute("ANALYZE")
+
+        bounds = day_bounds(date.today(), date.today())
+        plan = query_plan(db.conn, RANGE_STATS_QUERY, bounds)
+        print(f"range query plan: {plan}")
+        assert "COVERING INDEX idx_sales_status_date" in plan, plan
+        assert "SCAN sales" not in plan, plan
+
+        plan = query_plan(db.conn, ROLLUP_QUERY, bounds)
+        print(f"rollup plan: {plan}")
+        assert "SEARCH sales_daily USING PRIMARY KEY" in plan, plan
+
+        rows = []
+        for label, start, end in dashboard_periods(date.today()):
+            results = {}
+            with timed(results, "legacy"):
+                for _ in range(args.repeat):
+                    legacy = legacy_filtered_stats(db.conn, start.isoformat(), end.isoformat())
+            with timed(results, "ranged"):
+                for _ in range(args.repeat):
+                    ranged = db.conn.execute(RANGE_STATS_QUERY, day_bounds(start, end)).fetchone()
+            with timed(results, "rollup"):
+                for _ in range(args.repeat):
+                    rollup = db.get_filtered_stats(start.isoformat(), end.isoformat())
+            # Summation order differs between the plans, compare to the paisa
+            for stats in (ranged, rollup):
+                assert [round(v, 2) for v in legacy] == [round(v, 2) for v in stats], (label, legacy, stats)
+
+            rows.append([
+                label,
+                rollup[0],
+                f"{results['legacy'] / args.repeat:.1f}",
+                f"{results['ranged'] / args.repeat:.2f}",
+                f"{results['rollup'] / args.repeat:.2f}",
+            ])
+        db.close()
+
+    print_table(
+        f"{args.sales} completed sales",
+        ["period", "sales", "BETWEEN ms", "half-open ms", "rollup ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
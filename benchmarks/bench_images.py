@@ -0,0 +1,92 @@
+"""
+Product images: full-size decode + SmoothTransformation vs the thumbnail cache
+
+    python -m benchmarks.bench_images [--images 40] [--megapixels 12]
+
+Writes synthetic camera-sized JPEGs, then times loading each at the product
+card size the way the widgets used to (QPixmap(path).scaled(...)), a cold
+thumbnail cache (decode at reduced size with QImageReader and store the PNG)
+and a warm one (read the stored PNG). Last, every image is asked for at the
+card, cart and detail sizes over several refreshes through the shared
+in-memory pixmap_cache, which should only miss on the first pass.
+"""
+
+import argparse
+import os
+import random
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QGuiApplication, QImage, QPainter, QPixmap
+
+from src.ui.components.thumbnails import load_thumbnail, CARD_THUMBNAIL, STANDARD_SIZES
+from src.ui.components.pixmap_cache import pixmap_cache
+from .common import temp_appdata, timed, print_table
+
+
+def write_photos(folder, count, megapixels, seed=5):
+    """count JPEGs of roughly megapixels each (4:3), return their paths"""
+    rng = random.Random(seed)
+    height = int((megapixels * 1e6 * 3 / 4) ** 0.5)
+    width = height * 4 // 3
+    paths = []
+    for i in range(count):
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(QColor(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+        painter = QPainter(image)
+        for _ in range(20):
+            painter.fillRect(rng.randint(0, width), rng.randint(0, height), width // 4, height // 4,
+                             QColor(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+        painter.end()
+        path = os.path.join(folder, f"photo-{i}.jpg")
+        image.save(path, "JPEG", 90)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--refreshes", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    width, height = CARD_THUMBNAIL
+    results = {}
+    with temp_appdata() as root:
+        paths = write_photos(root, args.images, args.megapixels)
+
+        with timed(results, "full decode + scale"):
+            for path in paths:
+                QPixmap(path).scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        with timed(results, "thumbnail cache, cold"):
+            for path in paths:
+                assert load_thumbnail(path, width, height) is not None
+        with timed(results, "thumbnail cache, warm"):
+            for path in paths:
+                assert load_thumbnail(path, width, height) is not None
+
+        pixmap_cache.clear()
+        pixmap_cache.reset_counters()
+        lookups = args.images * len(STANDARD_SIZES) * args.refreshes
+        for refresh in range(args.refreshes):
+            # The first pass fills the cache, the later ones should only hit
+            label = "pixmap_cache, first pass x 3 sizes" if refresh == 0 else "pixmap_cache, a later pass x 3 sizes"
+            with timed(results, label):
+                for path in paths:
+                    for size in STANDARD_SIZES:
+                        assert pixmap_cache.pixmap(path, *size) is not None
+        cache_summary = pixmap_cache.summary()
+
+    print_table(
+        f"{args.images} images of {args.megapixels:g} MP at {width}x{height}",
+        ["path", "ms", "ms per image"],
+        [[label, f"{ms:.0f}", f"{ms / args.images:.2f}"] for label, ms in results.items()],
+    )
+    print(f"\npixmap_cache over {lookups} lookups: {cache_summary}")
+
+
+if __name__ == "__main__":
+    main()
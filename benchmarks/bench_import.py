@@ -0,0 +1,187 @@
+"""
+Catalog import: per-row save_* calls vs the bulk import engine
+
+    python -m benchmarks.bench_import [--products 10000]
+
+Writes a synthetic supplier JSON file (8 categories per product), then imports
+it with the old loop (save_base_product + save_product_variant per row, each
+product in its own savepoint, durable_pos) and with ProductImporter (one
+transaction on a fast_bulk_import session, cached category ids, executemany
+chunks). Both databases must end up with the same catalog. The file is then
+imported again in merge mode, which must not add any product or variant.
+
+Then imports NDJSON files of 1x and 4x that size and reports the traced peak
+memory of each: the streaming import should stay flat as the file grows.
+Last, the same variants as a CSV file (one row each, shuffled) are imported
+with 1 parser process and with a pool of one per spare core (at least 2);
+both must rebuild the same products.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tracemalloc
+
+from src.database.database_manager import DatabaseManager
+from src.ui.pages.AddProductsPage.productsimport import ProductImporter
+from .common import temp_appdata, timed, synthetic_catalog, CATEGORIES, print_table
+
+
+def write_supplier_file(path, products):
+    """Supplier JSON in the legacy "3x1500(4500)" string format"""
+    data = []
+    rows = synthetic_catalog(products * len(CATEGORIES))
+    for i in range(products):
+        categories = {}
+        for _ in CATEGORIES:
+            name, brand, category, purchase, selling, stock = next(rows)
+            categories[category] = f"{stock}x{purchase}({selling})"
+        data.append({"Name": name, "Brand": brand, "Description": f"{brand} {name}", "Categories": categories})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def write_ndjson_file(path, products):
+    """The same supplier data, one product per line"""
+    write_supplier_file(path, products)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        for product in data:
+            f.write(json.dumps(product) + "\n")
+
+
+def write_csv_file(path, products, seed=3):
+    """The same supplier data as a spreadsheet, one variant per row, rows shuffled"""
+    write_supplier_file(path, products)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rows = []
+    for product in data:
+        for category, value in product["Categories"].items():
+            stock, rest = value.split("x")
+            purchase, selling = rest.rstrip(")").split("(")
+            rows.append([product["Name"], product["Brand"], category, purchase, selling, stock])
+    # Supplier sheets are often sorted by category or price, not by product
+    random.Random(seed).shuffle(rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Name", "Brand", "Category", "Purchase Price", "Selling Price", "Stock"])
+        writer.writerows(rows)
+
+
+def streaming_peak(path):
+    """Peak traced memory (MB) of importing path into a fresh database"""
+    db = DatabaseManager(f"stream-{os.path.basename(path)}.db")
+    tracemalloc.start()
+    try:
+        success, imported, failed, errors = ProductImporter(db).import_from_json(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        db.close()
+    assert success and failed == 0, errors
+    return imported, os.path.getsize(path), peak / 1e6
+
+
+def legacy_import(db, importer, file_path):
+    """The import loop ProductImporter used to run"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with db.transaction():
+        for product in data:
+            with db.transaction():
+                product_id = db.save_base_product(product["Name"], product.get("Description", ""),
+                                                  product.get("Brand", "Local"))
+                for cat_name, cat_value in product["Categories"].items():
+                    stock, purchase, selling = importer.parse_category_string(cat_value)
+                    db.save_product_variant(product_id, cat_name, purchase, selling, stock)
+
+
+def catalog_checksum(db):
+    return db.conn.execute("""
+        SELECT COUNT(*), SUM(pv.stock_quantity), SUM(pv.selling_price), COUNT(DISTINCT c.name)
+        FROM product_variants pv JOIN categories c ON c.id = pv.category_id
+    """).fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10000)
+    args = parser.parse_args()
+
+    results = {}
+    with temp_appdata() as root:
+        path = os.path.join(root, "supplier.json")
+        write_supplier_file(path, args.products)
+
+        legacy_db = DatabaseManager("legacy.db")
+        with timed(results, "legacy"):
+            legacy_import(legacy_db, ProductImporter(legacy_db), path)
+
+        bulk_db = DatabaseManager("bulk.db")
+        importer = ProductImporter(bulk_db)
+        with timed(results, "bulk"):
+            success, imported, failed, errors = importer.import_from_json(path)
+        assert success and failed == 0, errors
+        assert catalog_checksum(legacy_db) == catalog_checksum(bulk_db)
+
+        rows = catalog_checksum(bulk_db)[0]
+        products = bulk_db.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        with timed(results, "merge re-sync"):
+            success, imported, failed, errors = importer.import_from_json(path, merge=True)
+        assert success and failed == 0, errors
+        assert catalog_checksum(bulk_db)[0] == rows
+        assert bulk_db.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == products
+        bulk_db.close()
+
+        memory = []
+        for scale in (1, 4):
+            ndjson = os.path.join(root, f"supplier-{scale}x.ndjson")
+            write_ndjson_file(ndjson, args.products * scale)
+            memory.append(streaming_peak(ndjson))
+
+        spreadsheet = os.path.join(root, "supplier.csv")
+        write_csv_file(spreadsheet, args.products)
+        table = {}
+        default_pool = os.path.getsize(spreadsheet) >= ProductImporter.PARALLEL_MIN_BYTES and (os.cpu_count() or 1) > 2
+        legacy_products = legacy_db.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        # Always time the process pool too, even where the import would not use
+        # it (files under PARALLEL_MIN_BYTES, or no spare core)
+        for workers in sorted({1, max(2, (os.cpu_count() or 1) - 1)}):
+            db = DatabaseManager(f"csv-{workers}.db")
+            importer = ProductImporter(db)
+            # Enough chunks for every worker, whatever --products is
+            importer.PARALLEL_MIN_BYTES = 0
+            importer.PARSE_CHUNK_ROWS = max(100, min(importer.PARSE_CHUNK_ROWS, rows // (workers * 4)))
+            with timed(table, workers):
+                success, imported, failed, errors = importer.import_from_table(spreadsheet, workers=workers)
+            assert success and failed == 0, errors
+            assert catalog_checksum(db) == catalog_checksum(legacy_db)
+            # Shuffled rows still make one product each
+            assert db.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == legacy_products
+            db.close()
+        legacy_db.close()
+
+    print_table(
+        f"{args.products} products, {rows} variants",
+        ["path", "ms", "rows/sec"],
+        [[label, f"{ms:.0f}", f"{rows / ms * 1000:,.0f}"] for label, ms in results.items()],
+    )
+    print_table(
+        "Streaming NDJSON import, traced peak memory",
+        ["products", "file MB", "peak MB"],
+        [[f"{imported:,}", f"{size / 1e6:.1f}", f"{peak:.1f}"] for imported, size, peak in memory],
+    )
+    print_table(
+        f"CSV import, {rows} rows ({os.cpu_count()} CPUs, "
+        f"{'pool' if default_pool else 'single process'} by default)",
+        ["parser processes", "ms", "rows/sec"],
+        [[workers, f"{ms:.0f}", f"{rows / ms * 1000:,.0f}"] for workers, ms in table.items()],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare the SQLite performance profiles
+
+    python -m benchmarks.bench_profiles [--variants 8000] [--sales 200] [--history 0]
+
+Times complete_sale_enhanced (add to cart + checkout, one sale at a time) and
+get_all_products_for_display under each profile. The read-only profile cannot
+write, so its checkout column is skipped. --history seeds that many past sales
+first; checkout time should not grow with it.
+"""
+
+import argparse
+
+from src.database.database_manager import DatabaseManager
+from src.database.profiles import PROFILES, describe_connection
+from .common import temp_appdata, timed, seed_catalog, seed_sales_history, sale_data, print_table
+
+
+def run_profile(profile, variants, sales, history=0):
+    results = {}
+    with temp_appdata():
+        seeder = DatabaseManager()
+        seeder.insert_company_name("Bench Store")
+        variant_ids = seed_catalog(seeder, variants)
+        if history:
+            seed_sales_history(seeder, history, variant_ids)
+        seeder.close()
+
+        db = DatabaseManager(profile=profile)
+        settings = describe_connection(db.conn)
+
+        if settings.get("query_only"):
+            results["checkout"] = None
+        else:
+            with timed(results, "checkout"):
+                for i in range(sales):
+                    db.add_to_cart(variant_ids[i % len(variant_ids)], 1)
+                    db.complete_sale_enhanced(sale_data(amount_paid=0))
+
+        with timed(results, "catalog"):
+            for _ in range(5):
+                db.get_all_products_for_display()
+        db.close()
+    return settings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, default=8000)
+    parser.add_argument("--sales", type=int, default=200)
+    parser.add_argument("--history", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    for profile in PROFILES:
+        settings, results = run_profile(profile, args.variants, args.sales, args.history)
+        checkout = results["checkout"]
+        rows.append([
+            profile,
+            settings["journal_mode"],
+            settings["synchronous"],
+            f"{checkout / args.sales:.2f}" if checkout is not None else "n/a",
+            f"{results['catalog'] / 5:.1f}",
+        ])
+
+    print_table(
+        f"{args.variants} variants, {args.sales} checkouts, {args.history} past sales",
+        ["profile", "journal", "sync", "checkout ms/sale", "catalog load ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
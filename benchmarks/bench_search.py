@@ -0,0 +1,125 @@
+"""
+Home page search: Python substring filter vs the products_fts index, and
+fuzzy search: linear trigram scan vs the products_trigram index
+
+    python -m benchmarks.bench_search [--variants 100000] [--repeat 20]
+
+Seeds a synthetic catalog, then times the old HomePage.filter_products loop
+(lowercase + concatenate every product per keystroke) against
+DatabaseManager.search_products for a few typical queries (including the
+id -> product lookup the page does with the results). The target is under
+20 ms per search at 100k variants.
+
+For misspelled queries it compares fuzzy_search_products with scoring every
+product with trigram.similarity, and checks both find an equally good best
+match.
+"""
+
+import argparse
+
+from src.database.database_manager import DatabaseManager
+from src.database import trigram
+from .common import temp_appdata, timed, seed_catalog, print_table
+
+QUERIES = ["reno", "ga", "samsung 6/128", "redmi 12 display", "iphone pro max", "housing"]
+
+# What cashiers actually type
+FUZZY_QUERIES = ["reno12f", "samsng", "galaxi 12 pro", "8/256", "redmii 40", "hosing ful", "iphon 7 max"]
+
+
+def legacy_filter(products, search_text):
+    """The loop HomePage.filter_products used to run on every keystroke"""
+    keywords = search_text.lower().split()
+    filtered = []
+    for product in products:
+        blob = f"{product['name'].lower()} {product['category'].lower()} {product['brand'].lower()}"
+        if all(kw in blob for kw in keywords):
+            filtered.append(product)
+    return filtered
+
+
+def linear_fuzzy(products, search_text, min_score=0.5):
+    """Score every product: what the trigram index saves us from doing"""
+    words = trigram.search_words(search_text)
+    scored = []
+    for product in products:
+        score = trigram.similarity(words, trigram.product_terms(
+            product["name"], product["brand"], product["category"]))
+        if score >= min_score:
+            scored.append((product["variant_id"], score))
+    scored.sort(key=lambda hit: (-hit[1], hit[0]))
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_appdata():
+        db = DatabaseManager()
+        seed_catalog(db, args.variants)
+        products = [
+            {"name": row[1], "brand": row[3], "category": row[4], "variant_id": row[9]}
+            for row in db.get_all_products_for_display()
+        ]
+        by_variant = {product["variant_id"]: product for product in products}
+
+        rows = []
+        for query in QUERIES:
+            results = {}
+            with timed(results, "legacy"):
+                for _ in range(args.repeat):
+                    legacy = legacy_filter(products, query)
+            with timed(results, "fts"):
+                for _ in range(args.repeat):
+                    found = [by_variant[variant_id] for variant_id in db.search_products(query)]
+            fts_ms = results["fts"] / args.repeat
+            rows.append([
+                query,
+                len(legacy),
+                len(found),
+                f"{results['legacy'] / args.repeat:.1f}",
+                f"{fts_ms:.1f}",
+                "ok" if fts_ms < 20 else "SLOW",
+            ])
+
+        fuzzy_rows = []
+        for query in FUZZY_QUERIES:
+            results = {}
+            with timed(results, "substring"):
+                substring = legacy_filter(products, query)
+            with timed(results, "linear"):
+                linear = linear_fuzzy(products, query)
+            with timed(results, "indexed"):
+                for _ in range(args.repeat):
+                    indexed = db.fuzzy_search_products(query)
+            best_linear = linear[0][1] if linear else 0
+            best_indexed = indexed[0][1] if indexed else 0
+            assert best_indexed == best_linear, (query, best_linear, best_indexed)
+            best = by_variant[indexed[0][0]] if indexed else None
+            fuzzy_rows.append([
+                query,
+                len(substring),
+                f"{best['name']} / {best['brand']} / {best['category']}" if best else "-",
+                f"{best_indexed:.2f}",
+                f"{results['linear']:.0f}",
+                f"{results['indexed'] / args.repeat:.1f}",
+            ])
+        db.close()
+
+    print_table(
+        f"{args.variants} variants",
+        ["query", "legacy hits", "fts hits", "legacy ms", "fts ms", "< 20 ms"],
+        rows,
+    )
+    print_table(
+        "fuzzy",
+        ["query", "substring hits", "best match", "score", "linear ms", "indexed ms"],
+        fuzzy_rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
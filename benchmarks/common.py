@@ -0,0 +1,131 @@
+"""
+Shared helpers for the benchmark scripts
+
+Every benchmark runs against a throwaway database in a temporary APPDATA
+folder, so the real store database is never touched.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+BRANDS = ["Oppo", "Samsung", "Vivo", "Infinix", "Tecno", "Xiaomi", "Apple", "Realme"]
+MODELS = ["Reno", "A", "Y", "Hot", "Spark", "Redmi", "iPhone", "Narzo", "Galaxy", "Note"]
+CATEGORIES = ["4/64GB", "6/128GB", "8/256GB", "12/512GB", "M+B", "B", "Housing Full", "Display"]
+
+
+@contextmanager
+def temp_appdata():
+    """Point DatabaseManager at an empty temporary data folder"""
+    root = tempfile.mkdtemp(prefix="stockpy-bench-")
+    previous = os.environ.get("APPDATA")
+    os.environ["APPDATA"] = root
+    try:
+        yield root
+    finally:
+        if previous is None:
+            os.environ.pop("APPDATA", None)
+        else:
+            os.environ["APPDATA"] = previous
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@contextmanager
+def timed(results, label):
+    """Record the wall time of a with-block in results[label] (ms)"""
+    started = time.perf_counter()
+    yield
+    results[label] = (time.perf_counter() - started) * 1000
+
+
+def synthetic_catalog(variants, seed=7):
+    """Yield (name, brand, category, purchase, selling, stock) rows"""
+    rng = random.Random(seed)
+    for i in range(variants):
+        brand = rng.choice(BRANDS)
+        name = f"{rng.choice(MODELS)} {i // len(CATEGORIES) + 1}{rng.choice(['', 'F', ' Pro', ' Max'])}"
+        purchase = rng.randint(500, 150000)
+        yield (name, brand, CATEGORIES[i % len(CATEGORIES)], purchase,
+               purchase + rng.randint(50, 20000), rng.randint(0, 40))
+
+
+def seed_catalog(db, variants):
+    """Insert a synthetic catalog directly with SQL, return the variant ids"""
+    conn = db.conn
+    with db.transaction():
+        category_ids = {}
+        for name in CATEGORIES:
+            conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (name,))
+            category_ids[name] = conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0]
+
+        variant_ids = []
+        product_id = None
+        for i, (name, brand, category, purchase, selling, stock) in enumerate(synthetic_catalog(variants)):
+            if i % len(CATEGORIES) == 0:
+                product_id = conn.execute(
+                    "INSERT INTO products (name, description, brand) VALUES (?, ?, ?)",
+                    (name, f"{brand} {name} spare part", brand)).lastrowid
+            variant_ids.append(conn.execute("""
+                INSERT INTO product_variants
+                (product_id, category_id, purchase_price, selling_price, stock_quantity)
+                VALUES (?, ?, ?, ?, ?)
+            """, (product_id, category_ids[category], purchase, selling, stock + 1000)).lastrowid)
+    return variant_ids
+
+
+def seed_sales_history(db, sales, variant_ids, days=365, seed=11):
+    """Insert completed sales spread over the last `days` days"""
+    rng = random.Random(seed)
+    conn = db.conn
+    with db.transaction():
+        customer_ids = [
+            conn.execute("INSERT INTO customers (name, phone) VALUES (?, ?)",
+                         (f"Customer {i}", f"0300{i:07d}")).lastrowid
+            for i in range(max(1, sales // 20))
+        ]
+        now = datetime.now()
+        for _ in range(sales):
+            sale_date = now - timedelta(days=rng.randint(0, days - 1), seconds=rng.randint(0, 86399))
+            total = rng.randint(500, 50000)
+            paid = total if rng.random() < 0.8 else rng.randint(0, total)
+            sale_id = conn.execute("""
+                INSERT INTO sales (customer_id, status, sale_date, total_amount, amount_paid,
+                                   balance_due, payment_status, total_profit)
+                VALUES (?, 'completed', ?, ?, ?, ?, ?, ?)
+            """, (rng.choice(customer_ids), sale_date.isoformat(), total, paid, total - paid,
+                  'paid_full' if paid >= total else ('partial' if paid else 'pending'),
+                  total * 0.2)).lastrowid
+            conn.execute("""
+                INSERT INTO sale_items (sale_id, product_variant_id, quantity, unit_price,
+                                        unit_cost, line_total, line_profit)
+                VALUES (?, ?, 1, ?, ?, ?, ?)
+            """, (sale_id, rng.choice(variant_ids), total, total * 0.8, total, total * 0.2))
+
+
+def sale_data(amount_paid=0):
+    """A checkout payload like the one CheckoutDialog emits"""
+    return {
+        "customer_name": "Bench Customer",
+        "customer_phone": "03001234567",
+        "customer_type": "Walk-in Customer",
+        "payment_method": "Cash",
+        "amount_paid": amount_paid,
+        "discount_amount": 0,
+        "due_date": None,
+        "notes": "",
+        "sale_date": datetime.now(),
+    }
+
+
+def print_table(title, header, rows):
+    """Print a small aligned results table"""
+    widths = [max(len(str(r[i])) for r in [header] + rows) for i in range(len(header))]
+    print(f"\n{title}")
+    print("  ".join(str(h).ljust(w) for h, w in zip(header, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QStackedWidget, QMainWindow, QApplication
 from PySide6.QtGui import QIcon
 from src.ui.pages.welcomepage.widget import WelcomePage
@@ -8,7 +9,12 @@ from src.ui.components.menubar import Navbar
 from src.ui.pages.ProfilePage.widget import DashboardPage
 from src.ui.pages.CustomersPage.widget import CustomersPage
 from src.ui.pages.AddProductsPage.widget import AddProductsPage
-from src.database.database_manager import DatabaseManager
+from src.database.session import sessions
+from src.database.query_executor import query_executor
+from src.database.change_watcher import ChangeWatcher
+from src.database import maintenance
+from src.ui.components.pixmap_cache import pixmap_cache
+from src.ui.components.image_loader import image_loader
 from src.ui.pages.SalesPage.widget import SalesPage
 
 # Import authentication screens
@@ -17,6 +23,10 @@ from src.ui.auth.password_setup_screen import PasswordSetupScreen
 from src.ui.auth.password_settings_page import PasswordSettingsPage
 
 
+# Memory budget for decoded product images shared by all pages
+PIXMAP_CACHE_MB = 64
+
+
 class Main_Window(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -27,10 +37,7 @@ class Main_Window(QMainWindow):
         
         self.stacked_widget = QStackedWidget(self)
         self.setCentralWidget(self.stacked_widget)
-        self.db = DatabaseManager()
-        
-        # IMPORTANT: Create password table (safe to run on existing database)
-        self.db.create_password_table()
+        self.db = sessions.acquire(self)
         
         self.nav_bar = Navbar(self)
         self.addToolBar(self.nav_bar)
@@ -102,6 +109,18 @@ class Main_Window(QMainWindow):
         # Connect to page changes for auto-refresh
         self.stacked_widget.currentChanged.connect(self.on_page_changed)
         
+        # Pick up sales/stock changes made by other running instances
+        self.change_watcher = ChangeWatcher(self)
+        self.change_watcher.start()
+        
+        # Verify the incrementally maintained company totals off the GUI thread
+        query_executor().submit(
+            "maintenance.company_totals",
+            lambda reader: maintenance.run("reconcile-company-totals"),
+            on_result=self.on_company_totals_checked,
+            on_error=lambda error: print(f"Error reconciling company totals: {error}")
+        )
+        
         # Check if company exists and navigate accordingly
         self.check_company_exists()
         
@@ -113,6 +132,11 @@ class Main_Window(QMainWindow):
         self.nav_bar.customerspage.triggered.connect(lambda: self.switch_to_page(5))
         self.nav_bar.settings.triggered.connect(lambda: self.switch_to_page(6))
     
+    def on_company_totals_checked(self, message):
+        """Tell the user only when the background check had to repair the totals"""
+        if message.startswith("company totals repaired"):
+            self.statusBar().showMessage(message, 10000)
+
     def switch_to_page(self, index):
         """Switch to a page by index"""
         self.stacked_widget.setCurrentIndex(index)
@@ -144,10 +168,24 @@ class Main_Window(QMainWindow):
         self.stacked_widget.setCurrentIndex(1)
         self.nav_bar.show()
 
+    def closeEvent(self, event):
+        """Stop background queries and close the shared database connection when the app exits"""
+        # Pages in the stack get no closeEvent; the importer writes on a session connection
+        # (None while still on the login / password setup screen)
+        if self.add_products_page is not None:
+            self.add_products_page.stop_import()
+        query_executor().shutdown()
+        image_loader().shutdown()
+        sessions.close_all()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
+    # Spreadsheet imports parse in worker processes; needed for the frozen Windows build
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    pixmap_cache.set_budget(PIXMAP_CACHE_MB)
     window = Main_Window()
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Bulk catalog import engine
+
+Supplier catalogs are written in one transaction: category ids are cached in
+memory instead of an INSERT OR IGNORE + SELECT per variant, and variants are
+buffered and written with executemany in chunks. A chunk that fails is
+retried row by row (each in its own savepoint) so one bad row is reported
+instead of sinking the whole import. The search index triggers are paused
+for the import's own transaction and the new variants indexed in one pass
+before it commits (per-row trigger calls were most of the import time).
+
+With merge=True products are matched against the catalog on normalized
+(name, brand) (idx_products_name_brand): existing variants get the new
+prices and the imported stock added, only new products and variants are
+inserted, so re-syncing the same price list does not grow the database.
+
+    with sessions.session(profile="fast_bulk_import") as db:
+        with bulk_import(db) as writer:
+            writer.add_product("Reno 12F", "", "OPPO", [("8/256GB", 141250, 150000, 5)])
+    print(writer.stats.summary())
+"""
+
+import time
+from contextlib import contextmanager
+from .changes import PRODUCTS, VARIANTS
+from .migrations import index_new_variants, PRODUCT_NAME_KEY, PRODUCT_BRAND_KEY
+
+
+class ImportStats:
+    """Counts, failures and timing of one import"""
+
+    # Only the first errors are kept (with the total in failed), so a bad 2 GB file cannot fill memory
+    MAX_ERRORS = 100
+
+    def __init__(self):
+        self.products = 0
+        self.variants = 0
+        # Existing variants a merge import changed / found identical
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def fail(self, message):
+        self.failed += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(message)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def imported(self):
+        """Products added plus existing variants a merge updated: what the import changed"""
+        return self.products + self.updated
+
+    @property
+    def rows(self):
+        """Variants written or checked"""
+        return self.variants + self.updated + self.unchanged
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        merged = f", {self.updated} updated, {self.unchanged} unchanged" if self.updated or self.unchanged else ""
+        return (f"{self.products} products, {self.variants} variants{merged} in {self.seconds:.1f} s "
+                f"({self.rows_per_second:,.0f} rows/s), {self.failed} failed")
+
+
+def product_key(name, brand):
+    """
+    Python twin of PRODUCT_NAME_KEY / PRODUCT_BRAND_KEY, for grouping rows of
+    one product before they reach the database (str.lower also folds
+    non-ASCII letters, which SQLite's lower() leaves alone).
+    """
+    return name.strip().lower(), ((brand or "").strip() or "Local").lower()
+
+
+class BulkWriter:
+    """Buffered product/variant writer; use through bulk_import()"""
+
+    _VARIANT_INSERT = """
+        INSERT INTO product_variants
+        (product_id, category_id, purchase_price, selling_price, stock_quantity)
+        VALUES (?, ?, ?, ?, ?)
+    """
+
+    _VARIANT_MERGE = """
+        UPDATE product_variants
+        SET purchase_price = ?, selling_price = ?, stock_quantity = stock_quantity + ?
+        WHERE id = ?
+    """
+
+    _FIND_PRODUCT = f"""
+        SELECT id FROM products
+        WHERE {PRODUCT_NAME_KEY.format("name")} = {PRODUCT_NAME_KEY.format("?")}
+          AND {PRODUCT_BRAND_KEY.format("brand")} = {PRODUCT_BRAND_KEY.format("?")}
+        ORDER BY id LIMIT 1
+    """
+
+    def __init__(self, db, chunk_size=1000, stats=None, merge=False):
+        self.db = db
+        self.conn = db.conn
+        self.chunk_size = chunk_size
+        self.stats = stats if stats is not None else ImportStats()
+        self.merge = merge
+        # (purchase, selling, stock to add, variant id) for _VARIANT_MERGE
+        self.pending_updates = []
+        # Products with variants in pending
+        self.pending_products = set()
+        # Products this writer inserted (removed again if none of their variants can be)
+        self.added_products = set()
+        self.category_ids = {name: category_id
+                             for category_id, name in self.conn.execute("SELECT id, name FROM categories")}
+        # (product_id, category_id, purchase, selling, stock, label for errors)
+        self.pending = []
+        # Variants after this id are indexed for search by finish()
+        self.last_variant_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM product_variants").fetchone()[0]
+        self.conn.execute("UPDATE search_index_state SET deferred = 1 WHERE id = 1")
+
+    def category_id(self, name):
+        """Id of the category called name, created on first use"""
+        category_id = self.category_ids.get(name)
+        if category_id is None:
+            category_id = self.conn.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
+            self.category_ids[name] = category_id
+        return category_id
+
+    def add_product(self, name, description, brand, variants):
+        """
+        Queue a product and its variants, return the product id.
+
+        variants is a list of (category_name, purchase_price, selling_price,
+        stock_quantity) tuples; they are written on the next chunk flush.
+        """
+        existing = self.find_product(name, brand) if self.merge else None
+        if existing is not None:
+            return self.merge_product(existing, name, variants)
+
+        product_id = self.conn.execute(
+            "INSERT INTO products (name, description, brand) VALUES (?, ?, ?)",
+            (name, description, brand or "Local")).lastrowid
+        self.stats.products += 1
+        self.added_products.add(product_id)
+        self.add_variants(product_id, name, variants)
+        return product_id
+
+    def add_variants(self, product_id, name, variants):
+        """Queue new variants of an existing product (as in add_product)"""
+        for category_name, purchase, selling, stock in variants:
+            self.pending.append((product_id, self.category_id(category_name), purchase, selling, stock,
+                                 f"{name} / {category_name}"))
+        self.pending_products.add(product_id)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def find_product(self, name, brand):
+        """Id of the catalog product with this normalized name and brand, or None"""
+        row = self.conn.execute(self._FIND_PRODUCT, (name, brand)).fetchone()
+        return row[0] if row else None
+
+    def merge_product(self, product_id, name, variants):
+        """Update the variants product_id already has, queue the new ones"""
+        if product_id in self.pending_products:
+            # Listed earlier in this import; its variants must be in the table to match
+            self.flush()
+        current = {category_id: (variant_id, purchase, selling)
+                   for variant_id, category_id, purchase, selling in self.conn.execute(
+                       "SELECT id, category_id, purchase_price, selling_price FROM product_variants "
+                       "WHERE product_id = ?", (product_id,))}
+
+        for category_name, purchase, selling, stock in variants:
+            category_id = self.category_id(category_name)
+            if category_id not in current:
+                self.pending.append((product_id, category_id, purchase, selling, stock,
+                                     f"{name} / {category_name}"))
+                self.pending_products.add(product_id)
+                current[category_id] = (None, purchase, selling)
+                continue
+            variant_id, old_purchase, old_selling = current[category_id]
+            if variant_id is None:
+                # Category listed twice in one product; the first one wins
+                self.stats.unchanged += 1
+                continue
+            if stock == 0 and old_purchase == purchase and old_selling == selling:
+                self.stats.unchanged += 1
+            else:
+                self.pending_updates.append((purchase, selling, stock, variant_id))
+                current[category_id] = (variant_id, purchase, selling)
+        if len(self.pending) + len(self.pending_updates) >= self.chunk_size:
+            self.flush()
+        return product_id
+
+    def finish(self):
+        """Write what is left and index the new variants for search"""
+        self.flush()
+        index_new_variants(self.conn, self.last_variant_id)
+        self.conn.execute("UPDATE search_index_state SET deferred = 0 WHERE id = 1")
+
+    def flush(self):
+        """Write the buffered variants"""
+        if self.pending_updates:
+            updates, self.pending_updates = self.pending_updates, []
+            # Only prices and stock change; the search index is not touched
+            self.conn.executemany(self._VARIANT_MERGE, updates)
+            self.stats.updated += len(updates)
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        self.pending_products.clear()
+        try:
+            with self.db.transaction():
+                self.conn.executemany(self._VARIANT_INSERT, [row[:5] for row in rows])
+            self.stats.variants += len(rows)
+        except Exception:
+            # Find the offending rows, keep the rest
+            failed_products = set()
+            for row in rows:
+                try:
+                    with self.db.transaction():
+                        self.conn.execute(self._VARIANT_INSERT, row[:5])
+                    self.stats.variants += 1
+                except Exception as e:
+                    self.stats.fail(f"{row[5]}: {e}")
+                    failed_products.add(row[0])
+            self.drop_empty_products(failed_products & self.added_products)
+
+    def drop_empty_products(self, product_ids):
+        """Delete products added here that ended up without any variant"""
+        for product_id in product_ids:
+            # No listing shows them, and their name and brand would block a re-import
+            if self.conn.execute("SELECT 1 FROM product_variants WHERE product_id = ? LIMIT 1",
+                                 (product_id,)).fetchone() is None:
+                self.conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+                self.added_products.discard(product_id)
+                self.stats.products -= 1
+
+
+@contextmanager
+def bulk_import(db, chunk_size=1000, stats=None, merge=False):
+    """
+    Run a bulk import in one transaction on db, yield the BulkWriter.
+
+    Pass the same ImportStats to consecutive calls to import a large file as
+    several transactions with one running total. merge=True updates matching
+    catalog products instead of adding duplicates.
+    """
+    with db.transaction():
+        # Inside the write lock, so the category cache cannot go stale
+        writer = BulkWriter(db, chunk_size, stats, merge)
+        written = writer.stats.products + writer.stats.variants + writer.stats.updated
+        try:
+            yield writer
+            writer.finish()
+            if writer.stats.products + writer.stats.variants + writer.stats.updated > written:
+                db.mark_changed(PRODUCTS, VARIANTS)
+        finally:
+            writer.stats.finish()
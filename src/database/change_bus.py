@@ -0,0 +1,79 @@
+"""
+Qt change bus
+
+Re-emits committed table changes (see changes.py) as Qt signals on the GUI
+thread, so pages refresh when data they depend on changes instead of polling.
+"""
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from . import changes
+
+
+class ChangeBus(QObject):
+    """Qt signals for committed table changes"""
+
+    tables_changed = Signal(object)   # frozenset of table names, one per commit
+    table_changed = Signal(str)       # each changed table name
+
+    # Internal: publisher thread -> GUI thread hand-off
+    _published = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._published.connect(self._relay)
+        changes.add_listener(self._published.emit)
+
+    @Slot(object)
+    def _relay(self, tables):
+        self.tables_changed.emit(tables)
+        for table in sorted(tables):
+            self.table_changed.emit(table)
+
+    def subscribe(self, tables, callback, owner=None, delay_ms=0):
+        """
+        Call callback(changed_tables) when any of tables changes.
+
+        Changes arriving within delay_ms are coalesced into one call. If owner
+        is a QObject the subscription ends when the owner is destroyed.
+        """
+        wanted = frozenset(tables)
+        pending = set()
+
+        timer = QTimer(owner)
+        timer.setSingleShot(True)
+        timer.setInterval(delay_ms)
+
+        def flush():
+            changed = frozenset(pending)
+            pending.clear()
+            callback(changed)
+
+        def on_changed(changed):
+            hit = wanted & changed
+            if hit:
+                pending.update(hit)
+                timer.start()
+
+        timer.timeout.connect(flush)
+        self.tables_changed.connect(on_changed)
+        if owner is not None:
+            owner.destroyed.connect(lambda *args: self.unsubscribe(on_changed))
+        return on_changed
+
+    def unsubscribe(self, handler):
+        """Stop a subscription returned by subscribe()"""
+        try:
+            self.tables_changed.disconnect(handler)
+        except (RuntimeError, TypeError):
+            pass
+
+
+_bus = None
+
+
+def change_bus():
+    """Process-wide ChangeBus (created on first use, needs a QApplication)"""
+    global _bus
+    if _bus is None:
+        _bus = ChangeBus()
+    return _bus
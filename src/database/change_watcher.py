@@ -0,0 +1,74 @@
+"""
+Cross-process change watcher
+
+Another StockPy instance writing to the same database file does not go through
+our DatabaseManager, so the change bus never hears about it. The watcher polls
+PRAGMA data_version, which only moves when a different connection commits,
+and on a move reads the table_changes counters. Counters that advanced further
+than this process's own bumps were changed elsewhere; only those tables are
+published, so pages refresh exactly what another instance touched.
+"""
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from . import changes
+from .session import sessions
+
+
+class ChangeWatcher(QObject):
+    """Publish table changes committed by other processes"""
+
+    external_change = Signal(object)   # frozenset of table names
+
+    def __init__(self, parent=None, interval_ms=1000):
+        super().__init__(parent)
+        # Borrow the GUI thread's shared session: data_version ignores its own commits
+        self.db = sessions.acquire(self)
+        self._data_version = self._read_data_version()
+        self._counters, self._local = changes.read_counters(self._read_counters)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.check)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def _read_data_version(self):
+        return self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _read_counters(self):
+        return dict(self.db.conn.execute("SELECT table_name, counter FROM table_changes"))
+
+    def check(self):
+        """One poll; returns the tables another process changed (possibly empty)"""
+        if self.db.conn is None:
+            return frozenset()
+        try:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return frozenset()
+            self._data_version = data_version
+
+            # Together with our own count, so a commit of ours in between is never taken for another process's
+            counters, local = changes.read_counters(self._read_counters)
+        except Exception as e:
+            print(f"Error checking for external changes: {e}")
+            return frozenset()
+
+        changed = set()
+        for table, counter in counters.items():
+            advanced = counter - self._counters.get(table, 0)
+            ours = local.get(table, 0) - self._local.get(table, 0)
+            if advanced > ours:
+                changed.add(table)
+        self._counters = counters
+        self._local = local
+
+        changed = frozenset(changed)
+        if changed:
+            changes.publish(changed)
+            self.external_change.emit(changed)
+        return changed
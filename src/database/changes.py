@@ -0,0 +1,95 @@
+"""
+Table change notifications
+
+DatabaseManager write methods mark which logical tables they touched. Once the
+outermost transaction commits, the set of changed tables is published to every
+registered listener (the Qt ChangeBus is one of them). Nothing is published for
+rolled-back work.
+
+Every commit also bumps a per-table counter in the table_changes table, and
+this process remembers how many of those bumps were its own, so a watcher can
+tell commits made by another process (see change_watcher.py).
+"""
+
+import threading
+import traceback
+from contextlib import contextmanager
+
+# Logical tables pages can depend on
+PRODUCTS = "products"
+VARIANTS = "variants"
+CART = "cart"
+SALES = "sales"
+PAYMENTS = "payments"
+CUSTOMERS = "customers"
+COMPANY = "company"
+
+TABLES = (PRODUCTS, VARIANTS, CART, SALES, PAYMENTS, CUSTOMERS, COMPANY)
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+# table -> number of table_changes bumps committed by this process
+_local_counters = {}
+# Reentrant: held around COMMIT, which then counts the commit under it
+_local_counters_lock = threading.RLock()
+
+
+def add_listener(listener):
+    """Call listener(frozenset_of_tables) after every committed change"""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_listener(listener):
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def publish(tables):
+    """Notify listeners that tables changed (called by DatabaseManager after COMMIT)"""
+    tables = frozenset(tables)
+    if not tables:
+        return
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(tables)
+        except Exception:
+            # A broken subscriber must never undo or block a committed write
+            traceback.print_exc()
+
+
+def count_local_commit(tables):
+    """Remember that this process bumped table_changes for tables"""
+    with _local_counters_lock:
+        for table in tables:
+            _local_counters[table] = _local_counters.get(table, 0) + 1
+
+
+def local_counters():
+    """Snapshot of this process's own table_changes bumps"""
+    with _local_counters_lock:
+        return dict(_local_counters)
+
+
+@contextmanager
+def local_commit(tables):
+    """
+    Wrap the COMMIT of a write that bumped table_changes for tables.
+
+    The commit and the local count happen under the lock read_counters()
+    takes, so a watcher never sees one without the other.
+    """
+    with _local_counters_lock:
+        yield
+        count_local_commit(tables)
+
+
+def read_counters(read):
+    """(read(), local_counters()) as one consistent snapshot (see local_commit)"""
+    with _local_counters_lock:
+        return read(), dict(_local_counters)
@@ -1,9 +1,57 @@
 import sqlite3
-from datetime import datetime
+import re
+from datetime import datetime, date, timedelta
 import os
 import hashlib
+import threading
+from contextlib import contextmanager
+from .migrations import migrate, backfill_sales_daily, rebuild_products_fts, rebuild_products_trigram
+from .profiles import apply_profile
+from .image_store import collect_garbage, GC_MIN_AGE_SECONDS
+from . import changes, trigram
+from .changes import PRODUCTS, VARIANTS, CART, SALES, PAYMENTS, CUSTOMERS, COMPANY
+
+
+def day_bounds(start_date, end_date):
+    """
+    Turn an inclusive day range into half-open ISO bounds.
+
+    sale_date is stored as an ISO timestamp, so "sale_date >= start AND
+    sale_date < day after end" selects the same rows as
+    "date(sale_date) BETWEEN start AND end" but can use an index on sale_date.
+    """
+    start = start_date if isinstance(start_date, date) else date.fromisoformat(str(start_date)[:10])
+    end = end_date if isinstance(end_date, date) else date.fromisoformat(str(end_date)[:10])
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+
+def fts_query(text):
+    """
+    Turn search box text into an FTS5 MATCH expression.
+
+    Every word must match, each as a prefix ("ren 4/6" -> "ren"* AND "4"* AND "6"*).
+    Words are quoted so FTS5 syntax typed by the user is searched for literally.
+    Returns None when the text has nothing searchable.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def normalize_barcode(barcode):
+    """Barcode as stored: surrounding whitespace stripped, empty -> None"""
+    barcode = str(barcode).strip() if barcode is not None else ""
+    return barcode or None
+
+
 class DatabaseManager:
-    def __init__(self, db_name="stock_management.db"):
+    # Number of sqlite3 connections currently open in this process
+    _open_connections = 0
+    _open_connections_lock = threading.Lock()
+
+    def __init__(self, db_name="stock_management.db", profile=None):
         # Get AppData folder (Windows) or ~/.local/share (Linux/macOS)
         appdata_dir = os.getenv("APPDATA") or os.path.expanduser("~/.local/share")
 
@@ -15,187 +63,148 @@ class DatabaseManager:
         db_path = os.path.join(db_dir, db_name)
 
         # Connect to SQLite
-        self.conn = sqlite3.connect(db_path)
+        self.db_name = db_name
+        self.db_path = db_path
+        # Autocommit mode: write paths group their statements with transaction()
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
         self.conn.execute("PRAGMA foreign_keys = ON;")
+        self._transaction_depth = 0
+        # Tables written by the open transaction, published after COMMIT
+        self._changed_tables = set()
+        with DatabaseManager._open_connections_lock:
+            DatabaseManager._open_connections += 1
+
+        # Bring the schema up to date (a single version check once migrated);
+        # the versions applied by this connection, if any, for callers to report
+        self.applied_migrations = migrate(self.conn)
+
+        # journal_mode, synchronous, cache and busy timeout for this workload
+        self.profile = apply_profile(self.conn, profile)
+
+    @classmethod
+    def open_connection_count(cls):
+        """Number of sqlite3 connections currently open in this process"""
+        with cls._open_connections_lock:
+            return cls._open_connections
+
+    def close(self):
+        """Close the underlying connection (safe to call more than once)"""
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+        with DatabaseManager._open_connections_lock:
+            DatabaseManager._open_connections -= 1
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block as one unit of work.
 
-        # Create tables only if they don't exist
-        self.create_tables()
-        
-    def create_tables(self):
-        cursor = self.conn.cursor()
-
-        # Company Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS company (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL,
-        total_sales REAL DEFAULT 0,
-        total_profit REAL DEFAULT 0
-        )
-        """)
-
-        # Enhanced Customers Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL DEFAULT 'guest',
-        phone TEXT,
-        address TEXT,
-        customer_type TEXT DEFAULT 'walk_in',
-        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-        notes TEXT
-        )
-        """)
-
-        # Products Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        description TEXT,
-        brand TEXT,
-        status TEXT DEFAULT 'active',
-        deactivated_at TEXT,
-        deactivated_reason TEXT
-        );
-        """)
-
-        # Categories Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-        )
-        """)
-
-        # Product Variants Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS product_variants (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        product_id INTEGER NOT NULL,
-        category_id INTEGER NOT NULL,
-        purchase_price REAL NOT NULL,
-        selling_price REAL NOT NULL,
-        image_path TEXT,
-        status TEXT DEFAULT 'active',
-        deactivated_at TEXT,
-        deactivated_reason TEXT,
-        stock_quantity INTEGER NOT NULL DEFAULT 0,
-        FOREIGN KEY (product_id) REFERENCES products(id),
-        FOREIGN KEY (category_id) REFERENCES categories(id),
-        UNIQUE(product_id, category_id)
-        );
-        """)
-
-        # Enhanced Sales Table with Payment Tracking
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            status TEXT NOT NULL DEFAULT 'draft',
-            sale_date TEXT,
-            
-            total_amount REAL NOT NULL DEFAULT 0,
-            amount_paid REAL NOT NULL DEFAULT 0,
-            balance_due REAL NOT NULL DEFAULT 0,
-            payment_method TEXT DEFAULT 'cash',
-            payment_status TEXT NOT NULL DEFAULT 'pending',
-            due_date TEXT,
-            
-            total_profit REAL NOT NULL DEFAULT 0,
-            discount_amount REAL DEFAULT 0,
-            notes TEXT,
-            
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers(id)
-        )
-        """)
+        The outermost block opens a write transaction and commits once at the
+        end; nested blocks become savepoints so a failing step only rolls back
+        its own statements. Any exception rolls back and is re-raised.
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        # Changes marked before this block survive a rollback of the block
+        changed_before = set(self._changed_tables)
 
-        # Payment History Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS payment_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sale_id INTEGER NOT NULL,
-            payment_amount REAL NOT NULL,
-            payment_method TEXT NOT NULL DEFAULT 'cash',
-            payment_date TEXT DEFAULT CURRENT_TIMESTAMP,
-            received_by TEXT,
-            notes TEXT,
-            FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE
-        )
-        """)
+        if depth == 0:
+            self.conn.execute("BEGIN IMMEDIATE")
+        else:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
 
-        # Sale Items Table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sale_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sale_id INTEGER NOT NULL,
-        product_variant_id INTEGER NOT NULL,
-        quantity INTEGER NOT NULL,
-        unit_price REAL NOT NULL,
-        unit_cost REAL NOT NULL,
-        line_total REAL NOT NULL,
-        line_profit REAL NOT NULL,
-        discount_per_item REAL DEFAULT 0,
-        FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE,
-        FOREIGN KEY (product_variant_id) REFERENCES product_variants(id)
-        )
-        """)
+        self._transaction_depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._transaction_depth -= 1
+            self._changed_tables = changed_before
+            if depth == 0:
+                self.conn.execute("ROLLBACK")
+            else:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                changed, self._changed_tables = self._changed_tables, set()
+                try:
+                    self._bump_change_counters(changed)
+                    with changes.local_commit(changed):
+                        self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                changes.publish(changed)
+            else:
+                self.conn.execute(f"RELEASE {savepoint}")
 
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_payment_status ON sales(payment_status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_payment_history_sale ON payment_history(sale_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_customers_type ON customers(customer_type)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_status ON products(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_variants_status ON product_variants(status)")
+    def in_transaction(self):
+        """True while a transaction() block is open on this connection"""
+        return self._transaction_depth > 0
 
-        self.conn.commit()
+    def mark_changed(self, *tables):
+        """Record that tables were written; listeners hear about it after COMMIT"""
+        if self.in_transaction():
+            self._changed_tables.update(tables)
+        else:
+            # Autocommit: the UPDATE is its own commit
+            with changes.local_commit(tables):
+                self._bump_change_counters(tables)
+            changes.publish(tables)
+
+    def _bump_change_counters(self, tables):
+        """Advance table_changes so other processes notice this commit"""
+        self.conn.executemany("""
+            INSERT INTO table_changes (table_name, counter) VALUES (?, 1)
+            ON CONFLICT(table_name) DO UPDATE SET counter = counter + 1
+        """, [(table,) for table in sorted(tables)])
 
     # ============== PRODUCT METHODS ==============
     
     def save_base_product(self, name, description=None, brand="Local"):
         """Save just the base product info, return product_id"""
         cursor = self.conn.cursor()
-        if not brand:
-            brand = "Local"
+        with self.transaction():
+            if not brand:
+                brand = "Local"
 
-        cursor.execute("""
-            INSERT INTO products (name, description, brand) 
-            VALUES (?, ?, ?)
-        """, (name, description, brand))
-        product_id = cursor.lastrowid
-        self.conn.commit()
-        return product_id
+            cursor.execute("""
+                INSERT INTO products (name, description, brand) 
+                VALUES (?, ?, ?)
+            """, (name, description, brand))
+            product_id = cursor.lastrowid
+            self.mark_changed(PRODUCTS)
+            return product_id
 
     def save_product_variant(self, product_id, category_name, purchase_price, 
                             selling_price, stock_quantity, image_path=None):
         """Save a variant for an existing product"""
         cursor = self.conn.cursor()
-        
-        # Insert/get category
-        cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category_name,))
-        cursor.execute("SELECT id FROM categories WHERE name=?", (category_name,))
-        category_id = cursor.fetchone()[0]
+        with self.transaction():
+            # Insert/get category
+            cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category_name,))
+            cursor.execute("SELECT id FROM categories WHERE name=?", (category_name,))
+            category_id = cursor.fetchone()[0]
 
-        # Insert product variant
-        cursor.execute("""
-            INSERT INTO product_variants 
-            (product_id, category_id, purchase_price, selling_price, image_path, stock_quantity)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (product_id, category_id, purchase_price, selling_price, image_path, stock_quantity))
+            # Insert product variant
+            cursor.execute("""
+                INSERT INTO product_variants 
+                (product_id, category_id, purchase_price, selling_price, image_path, stock_quantity)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (product_id, category_id, purchase_price, selling_price, image_path, stock_quantity))
+            self.mark_changed(VARIANTS)
         
-        self.conn.commit()
-        return cursor.lastrowid
+            return cursor.lastrowid
 
     def insert_company_name(self, name):
         cursor = self.conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO company (name) VALUES (?)", (name,))
-        self.conn.commit()
+        with self.transaction():
+            cursor.execute("INSERT OR IGNORE INTO company (name) VALUES (?)", (name,))
+            self.mark_changed(COMPANY)
 
     def get_company_name(self):
         """Get company name from database"""
@@ -208,67 +217,42 @@ class DatabaseManager:
         """Get overall business statistics (all time)"""
         cursor = self.conn.cursor()
 
-        # Total sales count (completed only)
-        cursor.execute("SELECT COUNT(*) FROM sales WHERE status = 'completed'")
-        total_sales = cursor.fetchone()[0]
-
-        # Total profit (completed only)
-        cursor.execute("SELECT COALESCE(SUM(total_profit), 0) FROM sales WHERE status = 'completed'")
-        total_profit = cursor.fetchone()[0]
-
-        # Total UNIQUE customers who actually made completed purchases
+        # Sales count, profit and pending payments (unpaid + partial) from the daily rollup
         cursor.execute("""
-            SELECT COUNT(DISTINCT customer_id) 
-            FROM sales 
-            WHERE status = 'completed' AND customer_id IS NOT NULL
+            SELECT COALESCE(SUM(sales_count), 0),
+                   COALESCE(SUM(profit), 0),
+                   COALESCE(SUM(outstanding), 0)
+            FROM sales_daily
         """)
-        total_customers = cursor.fetchone()[0]
+        total_sales, total_profit, pending_payments = cursor.fetchone()
 
-        # Total pending payments (unpaid + partial)
-        cursor.execute("""
-            SELECT COALESCE(SUM(balance_due), 0) 
-            FROM sales 
-            WHERE status = 'completed' AND payment_status != 'paid_full'
-        """)
-        pending_payments = cursor.fetchone()[0]
+        # Total UNIQUE customers who actually made completed purchases
+        cursor.execute("SELECT COUNT(DISTINCT customer_id) FROM sales_daily_customers")
+        total_customers = cursor.fetchone()[0]
     
         return total_sales, total_profit, total_customers, pending_payments
 
     def get_filtered_stats(self, start_date, end_date):
-        """Get statistics for a specific date range"""
+        """Get statistics for a specific date range (inclusive ISO dates)"""
         cursor = self.conn.cursor()
         
-        # Sales count in period
-        cursor.execute("""
-            SELECT COUNT(*) FROM sales 
-            WHERE status = 'completed' 
-            AND date(sale_date) BETWEEN ? AND ?
-        """, (start_date, end_date))
-        sales_count = cursor.fetchone()[0]
-        
-        # Revenue in period
-        cursor.execute("""
-            SELECT COALESCE(SUM(total_amount), 0) FROM sales 
-            WHERE status = 'completed' 
-            AND date(sale_date) BETWEEN ? AND ?
-        """, (start_date, end_date))
-        revenue = cursor.fetchone()[0]
+        start_day, end_day = day_bounds(start_date, end_date)
         
-        # Profit in period
+        # Sales count, revenue and profit in period: one rollup row per day
         cursor.execute("""
-            SELECT COALESCE(SUM(total_profit), 0) FROM sales 
-            WHERE status = 'completed' 
-            AND date(sale_date) BETWEEN ? AND ?
-        """, (start_date, end_date))
-        profit = cursor.fetchone()[0]
-        
-        # New customers in period
+            SELECT COALESCE(SUM(sales_count), 0),
+                   COALESCE(SUM(revenue), 0),
+                   COALESCE(SUM(profit), 0)
+            FROM sales_daily
+            WHERE day >= ? AND day < ?
+        """, (start_day, end_day))
+        sales_count, revenue, profit = cursor.fetchone()
+        
+        # Customers in period
         cursor.execute("""
-            SELECT COUNT(DISTINCT customer_id) FROM sales 
-            WHERE status = 'completed' 
-            AND customer_id IS NOT NULL
-            AND date(sale_date) BETWEEN ? AND ?
-        """, (start_date, end_date))
+            SELECT COUNT(DISTINCT customer_id) FROM sales_daily_customers
+            WHERE day >= ? AND day < ?
+        """, (start_day, end_day))
         customers = cursor.fetchone()[0]
         
         return sales_count, revenue, profit, customers
@@ -289,7 +273,8 @@ class DatabaseManager:
                 pv.image_path,
                 pv.id as variant_id,
                 COALESCE(pv.status, 'active') as variant_status,
-                pv.deactivated_reason
+                pv.deactivated_reason,
+                pv.barcode
             FROM product_variants pv
             JOIN products p ON pv.product_id = p.id
             JOIN categories c ON pv.category_id = c.id
@@ -313,8 +298,43 @@ class DatabaseManager:
             "variant_id": row[9],
             "status": row[10],
             "deactivated_reason": row[11],
+            "barcode": row[12],
         }
 
+    def get_variant_id_by_barcode(self, barcode):
+        """Variant id for a scanned barcode/SKU, or None (one lookup in idx_variants_barcode)"""
+        barcode = normalize_barcode(barcode)
+        if barcode is None:
+            return None
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id FROM product_variants WHERE barcode = ?", (barcode,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def set_variant_barcode(self, variant_id, barcode):
+        """Assign (or clear, with an empty value) a variant's barcode; barcodes are unique"""
+        barcode = normalize_barcode(barcode)
+        cursor = self.conn.cursor()
+        with self.transaction():
+            if barcode is not None:
+                cursor.execute("SELECT id FROM product_variants WHERE barcode = ? AND id != ?",
+                               (barcode, variant_id))
+                if cursor.fetchone():
+                    return False, f"Barcode {barcode} is already assigned to another product"
+
+            cursor.execute("UPDATE product_variants SET barcode = ? WHERE id = ?", (barcode, variant_id))
+            if cursor.rowcount == 0:
+                return False, "Variant not found"
+            self.mark_changed(VARIANTS)
+            return True, "Barcode saved" if barcode else "Barcode removed"
+
+    def add_to_cart_by_barcode(self, barcode, quantity=1):
+        """Scan-to-cart: resolve the barcode and add that variant, returns (success, message)"""
+        variant_id = self.get_variant_id_by_barcode(barcode)
+        if variant_id is None:
+            return False, f"No product with barcode {normalize_barcode(barcode) or ''}"
+        return self.add_to_cart(variant_id, quantity)
+
     def get_all_products_for_display(self):
         """Get all products with their variants including status info"""
         cursor = self.conn.cursor()
@@ -336,206 +356,322 @@ class DatabaseManager:
             FROM products p
             JOIN product_variants pv ON p.id = pv.product_id
             JOIN categories c ON pv.category_id = c.id
-            ORDER BY p.name, c.name
+            ORDER BY p.name, c.name, pv.id
         """)
     
         return cursor.fetchall()
 
+    # Above this many hits bm25 costs more than the search itself; see search_products
+    RANKED_SEARCH_HITS = 2000
+
+    def search_products(self, text, limit=None):
+        """
+        Full-text search over product name, brand, description and category.
+
+        Returns matching variant ids, best match first. Up to RANKED_SEARCH_HITS
+        hits are ordered by bm25 (name hits rank above brand, category and
+        description hits); broader queries are ordered name matches first,
+        then the rest by id, which keeps them fast at 100k variants.
+        """
+        match = fts_query(text)
+        if match is None:
+            return []
+
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH ?", (match,))
+        hits = [row[0] for row in cursor.fetchall()]
+
+        if len(hits) <= self.RANKED_SEARCH_HITS:
+            cursor.execute("""
+                SELECT rowid FROM products_fts
+                WHERE products_fts MATCH ?
+                ORDER BY rank, rowid
+            """, (match,))
+            ranked = [row[0] for row in cursor.fetchall()]
+        else:
+            cursor.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH ?",
+                           (f"{{name}} : ({match})",))
+            ranked = [row[0] for row in cursor.fetchall()]
+            in_name = set(ranked)
+            ranked.extend(variant_id for variant_id in hits if variant_id not in in_name)
+
+        return ranked if limit is None else ranked[:limit]
+
+    # Variants re-scored in Python per fuzzy search, picked by shared trigrams
+    FUZZY_CANDIDATES = 200
+    # Index entries read per fuzzy search; common trigrams beyond it are skipped
+    FUZZY_POSTINGS_BUDGET = 20000
+
+    def fuzzy_search_products(self, text, limit=100, min_score=0.5):
+        """
+        Typo-tolerant search over product name, brand and category.
+
+        "reno12f", "samsng a18" or "8/256" find "Reno 12F", "Samsung Galaxy
+        A18" and "8/256GB". The products_trigram index picks the variants
+        sharing the most trigrams with the search words, rarest trigrams
+        first; those are ranked by trigram.similarity and the ones scoring at
+        least min_score returned as (variant_id, score) pairs, best first.
+        """
+        words = trigram.search_words(text)
+        grams = trigram.index_grams(words)
+        if not grams:
+            return []
+
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT term, doc FROM products_trigram_vocab
+            WHERE term IN ({",".join("?" * len(grams))})
+            ORDER BY doc
+        """, list(grams))
+
+        lookups = []
+        read = 0
+        for gram, documents in cursor.fetchall():
+            if read and read + documents > self.FUZZY_POSTINGS_BUDGET:
+                break
+            read += documents
+            lookups.append(f'"{gram}"')
+        if not lookups:
+            return []
+
+        # Variants sharing the most of those trigrams
+        postings = " UNION ALL ".join(
+            ["SELECT rowid FROM products_trigram WHERE products_trigram MATCH ?"] * len(lookups))
+        cursor.execute(f"""
+            SELECT rowid, COUNT(*) AS shared
+            FROM ({postings})
+            GROUP BY rowid
+            ORDER BY shared DESC, rowid
+            LIMIT ?
+        """, lookups + [self.FUZZY_CANDIDATES])
+        candidates = [row[0] for row in cursor.fetchall()]
+        if not candidates:
+            return []
+
+        cursor.execute(f"""
+            SELECT pv.id, p.name, p.brand, c.name
+            FROM product_variants pv
+            JOIN products p ON p.id = pv.product_id
+            JOIN categories c ON c.id = pv.category_id
+            WHERE pv.id IN ({",".join("?" * len(candidates))})
+        """, candidates)
+
+        scored = []
+        for variant_id, name, brand, category in cursor.fetchall():
+            score = trigram.similarity(words, trigram.product_terms(name, brand, category))
+            if score >= min_score:
+                scored.append((variant_id, score))
+        scored.sort(key=lambda hit: (-hit[1], hit[0]))
+        return scored[:limit]
+
+    def rebuild_search_index(self):
+        """Refill the search indexes from the catalog (repair after raw edits with triggers off)"""
+        with self.transaction():
+            rebuild_products_fts(self.conn)
+            rebuild_products_trigram(self.conn)
+
+    def collect_image_garbage(self, min_age_seconds=GC_MIN_AGE_SECONDS):
+        """Delete stored product images no variant uses, return (files, bytes) removed"""
+        with self.transaction():
+            return collect_garbage(self.conn, min_age_seconds)
+
     def save_edited_products(self,name, brand,category, description, purchase_price, selling_price, stock_quantity, image_path=None, variant_id=None):
         cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE products
-            SET name = ?,
-                brand = ?,
-                description = ?
-            WHERE id = (SELECT product_id FROM product_variants WHERE id = ?)
-        """, (name, brand, description, variant_id))
-
-        cursor.execute("""UPDATE categories
-            SET name = ?
-            WHERE id = (SELECT category_id FROM product_variants WHERE id = ?)
-        """, (category, variant_id))
-        print("Updated category to =", category)
+        with self.transaction():
+            cursor.execute("""
+                UPDATE products
+                SET name = ?,
+                    brand = ?,
+                    description = ?
+                WHERE id = (SELECT product_id FROM product_variants WHERE id = ?)
+            """, (name, brand, description, variant_id))
+
+            cursor.execute("""UPDATE categories
+                SET name = ?
+                WHERE id = (SELECT category_id FROM product_variants WHERE id = ?)
+            """, (category, variant_id))
+            print("Updated category to =", category)
         
-        cursor.execute("""
-            UPDATE product_variants
-            SET purchase_price = ?, selling_price = ?, stock_quantity = ?, image_path = ?
-            WHERE id = ?
-        """, (purchase_price, selling_price, stock_quantity, image_path, variant_id))
-        self.conn.commit()
+            cursor.execute("""
+                UPDATE product_variants
+                SET purchase_price = ?, selling_price = ?, stock_quantity = ?, image_path = ?
+                WHERE id = ?
+            """, (purchase_price, selling_price, stock_quantity, image_path, variant_id))
+            self.mark_changed(PRODUCTS, VARIANTS)
 
     def delete_variant(self, variant_id: int):
         cursor = self.conn.cursor()
+        with self.transaction():
+            # Check if this variant is in any sale_items
+            cursor.execute("""
+                SELECT COUNT(*) as total_count,
+                       SUM(CASE WHEN s.status = 'draft' THEN 1 ELSE 0 END) as cart_count,
+                       SUM(CASE WHEN s.status = 'completed' THEN 1 ELSE 0 END) as sale_count
+                FROM sale_items si
+                JOIN sales s ON si.sale_id = s.id
+                WHERE si.product_variant_id = ?
+            """, (variant_id,))
 
-        # Check if this variant is in any sale_items
-        cursor.execute("""
-            SELECT COUNT(*) as total_count,
-                   SUM(CASE WHEN s.status = 'draft' THEN 1 ELSE 0 END) as cart_count,
-                   SUM(CASE WHEN s.status = 'completed' THEN 1 ELSE 0 END) as sale_count
-            FROM sale_items si
-            JOIN sales s ON si.sale_id = s.id
-            WHERE si.product_variant_id = ?
-        """, (variant_id,))
+            result = cursor.fetchone()
+            total_count, cart_count, sale_count = result[0], result[1] or 0, result[2] or 0
 
-        result = cursor.fetchone()
-        total_count, cart_count, sale_count = result[0], result[1] or 0, result[2] or 0
+            # Case 1: Product is in completed sales - can only be deactivated
+            if sale_count > 0:
+                cursor.execute("""
+                    UPDATE product_variants 
+                    SET status = 'inactive', 
+                        deactivated_at = ?, 
+                        deactivated_reason = ?
+                    WHERE id = ?
+                """, (datetime.now().isoformat(), 
+                      "Product was part of sales history - cannot be deleted", 
+                      variant_id))
+                self.mark_changed(VARIANTS)
 
-        # Case 1: Product is in completed sales - can only be deactivated
-        if sale_count > 0:
-            cursor.execute("""
-                UPDATE product_variants 
-                SET status = 'inactive', 
-                    deactivated_at = ?, 
-                    deactivated_reason = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), 
-                  "Product was part of sales history - cannot be deleted", 
-                  variant_id))
+                return False, "This product is linked to completed sales and can only be deactivated. It has been marked as inactive."
 
-            self.conn.commit()
-            return False, "This product is linked to completed sales and can only be deactivated. It has been marked as inactive."
+            # Case 2: Product is in cart (draft sales) - must be removed from cart first
+            if cart_count > 0:
+                return False, "This product is currently in the cart. Remove it from cart first before deleting."
 
-        # Case 2: Product is in cart (draft sales) - must be removed from cart first
-        if cart_count > 0:
-            return False, "This product is currently in the cart. Remove it from cart first before deleting."
+            # Case 3: Product is safe to delete (not in any sales or cart)
+            if total_count == 0:
+                # Find product_id and category_id of this variant
+                cursor.execute("SELECT product_id, category_id FROM product_variants WHERE id = ?", (variant_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return False, "Variant not found"
+                product_id, category_id = row
 
-        # Case 3: Product is safe to delete (not in any sales or cart)
-        if total_count == 0:
-            # Find product_id and category_id of this variant
-            cursor.execute("SELECT product_id, category_id FROM product_variants WHERE id = ?", (variant_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False, "Variant not found"
-            product_id, category_id = row
+                # Delete the variant
+                cursor.execute("DELETE FROM product_variants WHERE id = ?", (variant_id,))
 
-            # Delete the variant
-            cursor.execute("DELETE FROM product_variants WHERE id = ?", (variant_id,))
+                # Check if product has variants left
+                cursor.execute("SELECT COUNT(*) FROM product_variants WHERE product_id = ?", (product_id,))
+                remaining_variants = cursor.fetchone()[0]
 
-            # Check if product has variants left
-            cursor.execute("SELECT COUNT(*) FROM product_variants WHERE product_id = ?", (product_id,))
-            remaining_variants = cursor.fetchone()[0]
+                if remaining_variants < 1:
+                    cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
 
-            if remaining_variants < 1:
-                cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
+                # Check if category has variants left
+                cursor.execute("SELECT COUNT(*) FROM product_variants WHERE category_id = ?", (category_id,))
+                remaining_in_category = cursor.fetchone()[0]
 
-            # Check if category has variants left
-            cursor.execute("SELECT COUNT(*) FROM product_variants WHERE category_id = ?", (category_id,))
-            remaining_in_category = cursor.fetchone()[0]
+                if remaining_in_category < 1:
+                    cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
 
-            if remaining_in_category < 1:
-                cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+                self.mark_changed(PRODUCTS, VARIANTS)
 
-            self.conn.commit()
-            return True, "Product deleted successfully"
+                return True, "Product deleted successfully"
 
-        return False, "Unable to process delete request"
+            return False, "Unable to process delete request"
 
     def reactivate_variant(self, variant_id: int):
         """Reactivate a deactivated product variant"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            cursor.execute("""
+                UPDATE product_variants 
+                SET status = 'active', 
+                    deactivated_at = NULL, 
+                    deactivated_reason = NULL
+                WHERE id = ?
+            """, (variant_id,))
         
-        cursor.execute("""
-            UPDATE product_variants 
-            SET status = 'active', 
-                deactivated_at = NULL, 
-                deactivated_reason = NULL
-            WHERE id = ?
-        """, (variant_id,))
-        
-        if cursor.rowcount > 0:
-            self.conn.commit()
-            return True, "Product reactivated successfully"
-        else:
-            return False, "Variant not found"
+            if cursor.rowcount > 0:
+                self.mark_changed(VARIANTS)
+                return True, "Product reactivated successfully"
+            else:
+                return False, "Variant not found"
 
     # ============== CART METHODS ==============
     
     def get_or_create_draft_sale(self):
         """Get existing draft sale or create a new one for cart"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            cursor.execute("SELECT id FROM sales WHERE status = 'draft' LIMIT 1")
+            result = cursor.fetchone()
         
-        cursor.execute("SELECT id FROM sales WHERE status = 'draft' LIMIT 1")
-        result = cursor.fetchone()
-        
-        if result:
-            return result[0]
-        else:
-            cursor.execute("""
-                INSERT INTO sales (status, created_at, updated_at) 
-                VALUES ('draft', ?, ?)
-            """, (datetime.now().isoformat(), datetime.now().isoformat()))
-            self.conn.commit()
-            return cursor.lastrowid
+            if result:
+                return result[0]
+            else:
+                cursor.execute("""
+                    INSERT INTO sales (status, created_at, updated_at) 
+                    VALUES ('draft', ?, ?)
+                """, (datetime.now().isoformat(), datetime.now().isoformat()))
+                self.mark_changed(CART)
+                return cursor.lastrowid
 
     def add_to_cart(self, product_variant_id, quantity=1):
         """Add product to persistent cart"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            # Get product variant details including status
+            cursor.execute("""
+                SELECT pv.selling_price, pv.purchase_price, pv.stock_quantity,
+                       COALESCE(pv.status, 'active') as status,
+                       p.name, c.name as category_name
+                FROM product_variants pv
+                JOIN products p ON pv.product_id = p.id
+                JOIN categories c ON pv.category_id = c.id
+                WHERE pv.id = ?
+            """, (product_variant_id,))
 
-        # Get product variant details including status
-        cursor.execute("""
-            SELECT pv.selling_price, pv.purchase_price, pv.stock_quantity,
-                   COALESCE(pv.status, 'active') as status,
-                   p.name, c.name as category_name
-            FROM product_variants pv
-            JOIN products p ON pv.product_id = p.id
-            JOIN categories c ON pv.category_id = c.id
-            WHERE pv.id = ?
-        """, (product_variant_id,))
-
-        variant_data = cursor.fetchone()
-        if not variant_data:
-            return False, "Product not found"
+            variant_data = cursor.fetchone()
+            if not variant_data:
+                return False, "Product not found"
 
-        selling_price, purchase_price, stock_quantity, status, product_name, category_name = variant_data
+            selling_price, purchase_price, stock_quantity, status, product_name, category_name = variant_data
 
-        # Check if product is active
-        if status != 'active':
-            return False, f"Product '{product_name} - {category_name}' is no longer available"
+            # Check if product is active
+            if status != 'active':
+                return False, f"Product '{product_name} - {category_name}' is no longer available"
 
-        # Check stock
-        if quantity > stock_quantity:
-            return False, f"Insufficient stock. Available: {stock_quantity}"
+            # Check stock
+            if quantity > stock_quantity:
+                return False, f"Insufficient stock. Available: {stock_quantity}"
 
-        # Get or create draft sale
-        sale_id = self.get_or_create_draft_sale()
+            # Get or create draft sale
+            sale_id = self.get_or_create_draft_sale()
 
-        # Check if item already exists in cart
-        cursor.execute("""
-            SELECT id, quantity FROM sale_items 
-            WHERE sale_id = ? AND product_variant_id = ?
-        """, (sale_id, product_variant_id))
+            # Check if item already exists in cart
+            cursor.execute("""
+                SELECT id, quantity FROM sale_items 
+                WHERE sale_id = ? AND product_variant_id = ?
+            """, (sale_id, product_variant_id))
 
-        existing_item = cursor.fetchone()
+            existing_item = cursor.fetchone()
 
-        if existing_item:
-            # Update existing item
-            new_quantity = existing_item[1] + quantity
-            if new_quantity > stock_quantity:
-                return False, f"Total quantity would exceed stock. Available: {stock_quantity}"
+            if existing_item:
+                # Update existing item
+                new_quantity = existing_item[1] + quantity
+                if new_quantity > stock_quantity:
+                    return False, f"Total quantity would exceed stock. Available: {stock_quantity}"
 
-            line_total = new_quantity * selling_price
-            line_profit = (selling_price - purchase_price) * new_quantity
+                line_total = new_quantity * selling_price
+                line_profit = (selling_price - purchase_price) * new_quantity
 
-            cursor.execute("""
-                UPDATE sale_items 
-                SET quantity = ?, line_total = ?, line_profit = ?
-                WHERE id = ?
-            """, (new_quantity, line_total, line_profit, existing_item[0]))
-        else:
-            # Add new item
-            line_total = quantity * selling_price
-            line_profit = (selling_price - purchase_price) * quantity
+                cursor.execute("""
+                    UPDATE sale_items 
+                    SET quantity = ?, line_total = ?, line_profit = ?
+                    WHERE id = ?
+                """, (new_quantity, line_total, line_profit, existing_item[0]))
+            else:
+                # Add new item
+                line_total = quantity * selling_price
+                line_profit = (selling_price - purchase_price) * quantity
 
-            cursor.execute("""
-                INSERT INTO sale_items 
-                (sale_id, product_variant_id, quantity, unit_price, unit_cost, line_total, line_profit)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (sale_id, product_variant_id, quantity, selling_price, purchase_price, line_total, line_profit))
+                cursor.execute("""
+                    INSERT INTO sale_items 
+                    (sale_id, product_variant_id, quantity, unit_price, unit_cost, line_total, line_profit)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (sale_id, product_variant_id, quantity, selling_price, purchase_price, line_total, line_profit))
 
-        # Update sale totals
-        self.update_sale_totals(sale_id)
-        self.conn.commit()
-        return True, "Item added to cart successfully"
+            # Update sale totals
+            self.update_sale_totals(sale_id)
+            self.mark_changed(CART)
+            return True, "Item added to cart successfully"
 
     def get_cart_items(self):
         """Get all items in the persistent cart"""
@@ -574,74 +710,74 @@ class DatabaseManager:
     def update_cart_item_quantity(self, item_id, new_quantity):
         """Update quantity of item in cart"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            if new_quantity <= 0:
+                return self.remove_from_cart(item_id)
         
-        if new_quantity <= 0:
-            return self.remove_from_cart(item_id)
-        
-        # Get item details
-        cursor.execute("""
-            SELECT si.sale_id, si.product_variant_id, si.unit_price, si.unit_cost,
-                   pv.stock_quantity
-            FROM sale_items si
-            JOIN product_variants pv ON si.product_variant_id = pv.id
-            WHERE si.id = ?
-        """, (item_id,))
+            # Get item details
+            cursor.execute("""
+                SELECT si.sale_id, si.product_variant_id, si.unit_price, si.unit_cost,
+                       pv.stock_quantity
+                FROM sale_items si
+                JOIN product_variants pv ON si.product_variant_id = pv.id
+                WHERE si.id = ?
+            """, (item_id,))
         
-        result = cursor.fetchone()
-        if not result:
-            return False, "Item not found"
+            result = cursor.fetchone()
+            if not result:
+                return False, "Item not found"
         
-        sale_id, variant_id, unit_price, unit_cost, stock_quantity = result
+            sale_id, variant_id, unit_price, unit_cost, stock_quantity = result
         
-        # Check stock
-        if new_quantity > stock_quantity:
-            return False, f"Insufficient stock. Available: {stock_quantity}"
+            # Check stock
+            if new_quantity > stock_quantity:
+                return False, f"Insufficient stock. Available: {stock_quantity}"
         
-        # Update item
-        line_total = new_quantity * unit_price
-        line_profit = (unit_price - unit_cost) * new_quantity
+            # Update item
+            line_total = new_quantity * unit_price
+            line_profit = (unit_price - unit_cost) * new_quantity
         
-        cursor.execute("""
-            UPDATE sale_items 
-            SET quantity = ?, line_total = ?, line_profit = ?
-            WHERE id = ?
-        """, (new_quantity, line_total, line_profit, item_id))
+            cursor.execute("""
+                UPDATE sale_items 
+                SET quantity = ?, line_total = ?, line_profit = ?
+                WHERE id = ?
+            """, (new_quantity, line_total, line_profit, item_id))
         
-        self.update_sale_totals(sale_id)
-        self.conn.commit()
-        return True, "Cart updated successfully"
+            self.update_sale_totals(sale_id)
+            self.mark_changed(CART)
+            return True, "Cart updated successfully"
 
     def remove_from_cart(self, item_id):
         """Remove item from cart"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            cursor.execute("SELECT sale_id FROM sale_items WHERE id = ?", (item_id,))
+            result = cursor.fetchone()
         
-        cursor.execute("SELECT sale_id FROM sale_items WHERE id = ?", (item_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            return False, "Item not found"
+            if not result:
+                return False, "Item not found"
         
-        sale_id = result[0]
+            sale_id = result[0]
         
-        cursor.execute("DELETE FROM sale_items WHERE id = ?", (item_id,))
-        self.update_sale_totals(sale_id)
-        self.conn.commit()
-        return True, "Item removed from cart"
+            cursor.execute("DELETE FROM sale_items WHERE id = ?", (item_id,))
+            self.update_sale_totals(sale_id)
+            self.mark_changed(CART)
+            return True, "Item removed from cart"
 
     def clear_cart(self):
         """Clear all items from cart"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            cursor.execute("SELECT id FROM sales WHERE status = 'draft' LIMIT 1")
+            result = cursor.fetchone()
         
-        cursor.execute("SELECT id FROM sales WHERE status = 'draft' LIMIT 1")
-        result = cursor.fetchone()
+            if result:
+                sale_id = result[0]
+                cursor.execute("DELETE FROM sale_items WHERE sale_id = ?", (sale_id,))
+                cursor.execute("DELETE FROM sales WHERE id = ?", (sale_id,))
+                self.mark_changed(CART)
         
-        if result:
-            sale_id = result[0]
-            cursor.execute("DELETE FROM sale_items WHERE sale_id = ?", (sale_id,))
-            cursor.execute("DELETE FROM sales WHERE id = ?", (sale_id,))
-            self.conn.commit()
-        
-        return True, "Cart cleared"
+            return True, "Cart cleared"
 
     def update_sale_totals(self, sale_id):
         """Update total amount and profit for a sale"""
@@ -665,149 +801,232 @@ class DatabaseManager:
     def save_customer_enhanced(self, name="guest", phone=None, address=None, customer_type='walk_in', notes=None):
         """Enhanced customer saving"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            # Check if customer already exists by phone
+            if phone:
+                cursor.execute("SELECT id FROM customers WHERE phone = ?", (phone,))
+                existing = cursor.fetchone()
+                if existing:
+                    return existing[0]
         
-        # Check if customer already exists by phone
-        if phone:
-            cursor.execute("SELECT id FROM customers WHERE phone = ?", (phone,))
-            existing = cursor.fetchone()
-            if existing:
-                return existing[0]
-        
-        cursor.execute("""
-            INSERT INTO customers (name, phone, address, customer_type, notes, updated_at) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, phone, address, customer_type, notes, datetime.now().isoformat()))
+            cursor.execute("""
+                INSERT INTO customers (name, phone, address, customer_type, notes, updated_at) 
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (name, phone, address, customer_type, notes, datetime.now().isoformat()))
+            self.mark_changed(CUSTOMERS)
         
-        self.conn.commit()
-        return cursor.lastrowid
+            return cursor.lastrowid
 
     # ============== SALES COMPLETION METHODS ==============
     
     def complete_sale_enhanced(self, sale_data):
         """Complete sale with full payment tracking"""
         cursor = self.conn.cursor()
+        with self.transaction():
+            # Get draft sale
+            cursor.execute("SELECT id, total_amount FROM sales WHERE status = 'draft' LIMIT 1")
+            result = cursor.fetchone()
+        
+            if not result:
+                return False, "No items in cart"
+        
+            sale_id, original_total = result
+        
+            # Check if cart has items
+            cursor.execute("SELECT COUNT(*) FROM sale_items WHERE sale_id = ?", (sale_id,))
+            if cursor.fetchone()[0] == 0:
+                return False, "No items in cart"
+        
+            # Save/get customer
+            customer_id = None
+            if sale_data.get('customer_name', 'guest').strip() or 'guest':
+                customer_id = self.save_customer_enhanced(
+                    name=sale_data.get('customer_name', 'guest').strip() or 'guest',
+                    phone=sale_data.get('customer_phone'),
+                    customer_type=sale_data.get('customer_type', 'walk_in').lower().replace(' ', '_').replace('/', '_'),
+                    notes=f"Added during sale #{sale_id}"
+                )
+        
+            # Get discount amount (default to 0 if not provided)
+            discount_amount = sale_data.get('discount_amount', 0)
+        
+            # Calculate final total after discount
+            final_total = original_total - discount_amount
+        
+            # ✅ CORRECTED PROFIT CALCULATION
+            # Get total cost of all items (purchase_price × quantity)
+            cursor.execute("""
+                SELECT COALESCE(SUM(unit_cost * quantity), 0) 
+                FROM sale_items 
+                WHERE sale_id = ?
+            """, (sale_id,))
+            total_cost = cursor.fetchone()[0]
         
-        # Get draft sale
-        cursor.execute("SELECT id, total_amount FROM sales WHERE status = 'draft' LIMIT 1")
-        result = cursor.fetchone()
-        
-        if not result:
-            return False, "No items in cart"
-        
-        sale_id, original_total = result
-        
-        # Check if cart has items
-        cursor.execute("SELECT COUNT(*) FROM sale_items WHERE sale_id = ?", (sale_id,))
-        if cursor.fetchone()[0] == 0:
-            return False, "No items in cart"
-        
-        # Save/get customer
-        customer_id = None
-        if sale_data.get('customer_name', 'guest').strip() or 'guest':
-            customer_id = self.save_customer_enhanced(
-                name=sale_data.get('customer_name', 'guest').strip() or 'guest',
-                phone=sale_data.get('customer_phone'),
-                customer_type=sale_data.get('customer_type', 'walk_in').lower().replace(' ', '_').replace('/', '_'),
-                notes=f"Added during sale #{sale_id}"
-            )
-        
-        # Get discount amount (default to 0 if not provided)
-        discount_amount = sale_data.get('discount_amount', 0)
-        
-        # Calculate final total after discount
-        final_total = original_total - discount_amount
+            # Actual profit = Revenue after discount - Total cost
+            actual_profit = final_total - total_cost
         
-        # ✅ CORRECTED PROFIT CALCULATION
-        # Get total cost of all items (purchase_price × quantity)
-        cursor.execute("""
-            SELECT COALESCE(SUM(unit_cost * quantity), 0) 
-            FROM sale_items 
-            WHERE sale_id = ?
-        """, (sale_id,))
-        total_cost = cursor.fetchone()[0]
+            # Calculate payment details
+            amount_paid = sale_data.get('amount_paid', 0)
+            balance_due = final_total - amount_paid
         
-        # Actual profit = Revenue after discount - Total cost
-        actual_profit = final_total - total_cost
+            # Determine payment status
+            if balance_due <= 0:
+                payment_status = 'paid_full'
+            elif amount_paid == 0:
+                payment_status = 'pending'
+            else:
+                payment_status = 'partial'
         
-        # Calculate payment details
-        amount_paid = sale_data.get('amount_paid', 0)
-        balance_due = final_total - amount_paid
+            # Update sale with enhanced payment info
+            cursor.execute("""
+                UPDATE sales 
+                SET status = 'completed',
+                    customer_id = ?,
+                    sale_date = ?,
+                    total_amount = ?,
+                    amount_paid = ?,
+                    balance_due = ?,
+                    payment_method = ?,
+                    payment_status = ?,
+                    due_date = ?,
+                    notes = ?,
+                    discount_amount = ?,
+                    total_profit = ?,
+                    updated_at = ?
+                WHERE id = ?
+            """, (
+                customer_id,
+                sale_data['sale_date'].isoformat(),
+                final_total,  # Store final total after discount
+                amount_paid,
+                balance_due,
+                sale_data['payment_method'].lower().replace(' ', '_'),
+                payment_status,
+                sale_data['due_date'].isoformat() if sale_data['due_date'] else None,
+                sale_data['notes'],
+                discount_amount,
+                actual_profit,  # ✅ CORRECTED PROFIT
+                datetime.now().isoformat(),
+                sale_id
+            ))
+        
+            # Record initial payment if any
+            if amount_paid > 0:
+                payment_notes = "Initial payment during sale"
+                if discount_amount > 0:
+                    payment_notes = f"Full payment after PKR {discount_amount:,.2f} discount"
+            
+                cursor.execute("""
+                    INSERT INTO payment_history (sale_id, payment_amount, payment_method, payment_date, notes)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (sale_id, amount_paid, sale_data.get('payment_method', 'cash'),
+                      sale_data['sale_date'].isoformat(), payment_notes))
+                self.mark_changed(PAYMENTS)
+        
+            # Add the sale to its day's rollup
+            self._record_daily_sale(
+                sale_data['sale_date'].isoformat()[:10], customer_id, final_total, actual_profit,
+                discount_amount, amount_paid, balance_due if payment_status != 'paid_full' else 0
+            )
         
-        # Determine payment status
-        if balance_due <= 0:
-            payment_status = 'paid_full'
-        elif amount_paid == 0:
-            payment_status = 'pending'
-        else:
-            payment_status = 'partial'
+            # Update stock quantities
+            cursor.execute("SELECT product_variant_id, quantity FROM sale_items WHERE sale_id = ?", (sale_id,))
+            for variant_id, quantity in cursor.fetchall():
+                cursor.execute("""
+                    UPDATE product_variants 
+                    SET stock_quantity = stock_quantity - ?
+                    WHERE id = ?
+                """, (quantity, variant_id))
         
-        # Update sale with enhanced payment info
-        cursor.execute("""
-            UPDATE sales 
-            SET status = 'completed',
-                customer_id = ?,
-                sale_date = ?,
-                total_amount = ?,
-                amount_paid = ?,
-                balance_due = ?,
-                payment_method = ?,
-                payment_status = ?,
-                due_date = ?,
-                notes = ?,
-                discount_amount = ?,
-                total_profit = ?,
-                updated_at = ?
-            WHERE id = ?
-        """, (
-            customer_id,
-            sale_data['sale_date'].isoformat(),
-            final_total,  # Store final total after discount
-            amount_paid,
-            balance_due,
-            sale_data['payment_method'].lower().replace(' ', '_'),
-            payment_status,
-            sale_data['due_date'].isoformat() if sale_data['due_date'] else None,
-            sale_data['notes'],
-            discount_amount,
-            actual_profit,  # ✅ CORRECTED PROFIT
-            datetime.now().isoformat(),
-            sale_id
-        ))
-        
-        # Record initial payment if any
-        if amount_paid > 0:
-            payment_notes = "Initial payment during sale"
-            if discount_amount > 0:
-                payment_notes = f"Full payment after PKR {discount_amount:,.2f} discount"
-            
+            # Update company totals (reconcile_company_totals repairs any drift)
             cursor.execute("""
-                INSERT INTO payment_history (sale_id, payment_amount, payment_method, notes)
-                VALUES (?, ?, ?, ?)
-            """, (sale_id, amount_paid, sale_data.get('payment_method', 'cash'), payment_notes))
+                UPDATE company 
+                SET total_sales = total_sales + 1, total_profit = total_profit + ?
+            """, (actual_profit,))
+    
+            # The draft sale left the cart and became a completed sale
+            self.mark_changed(CART, SALES, VARIANTS, COMPANY)
+            return True, f"Sale completed successfully. Sale ID: {sale_id}"
+
+    # ============== DAILY ROLLUP METHODS ==============
+    
+    def _record_daily_sale(self, day, customer_id, revenue, profit, discount, paid, outstanding):
+        """Add one completed sale to sales_daily (call inside the sale's transaction)"""
+        cursor = self.conn.cursor()
         
-        # Update stock quantities
-        cursor.execute("SELECT product_variant_id, quantity FROM sale_items WHERE sale_id = ?", (sale_id,))
-        for variant_id, quantity in cursor.fetchall():
+        new_customer = 0
+        if customer_id is not None:
             cursor.execute("""
-                UPDATE product_variants 
-                SET stock_quantity = stock_quantity - ?
-                WHERE id = ?
-            """, (quantity, variant_id))
+                INSERT OR IGNORE INTO sales_daily_customers (day, customer_id) VALUES (?, ?)
+            """, (day, customer_id))
+            new_customer = cursor.rowcount
         
-        # Update company totals
-        cursor.execute("SELECT COUNT(*) FROM sales WHERE status = 'completed'")
-        sales_count = cursor.fetchone()[0]
-    
-        cursor.execute("SELECT COALESCE(SUM(total_profit), 0) FROM sales WHERE status = 'completed'")
-        total_profit = cursor.fetchone()[0]
-    
         cursor.execute("""
-            UPDATE company 
-            SET total_sales = ?, total_profit = ?
-        """, (sales_count, total_profit))
-    
-        self.conn.commit()
-        return True, f"Sale completed successfully. Sale ID: {sale_id}"
+            INSERT INTO sales_daily
+            (day, sales_count, revenue, profit, discount, customers, payments_received, outstanding)
+            VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                sales_count = sales_count + 1,
+                revenue = revenue + excluded.revenue,
+                profit = profit + excluded.profit,
+                discount = discount + excluded.discount,
+                customers = customers + excluded.customers,
+                payments_received = payments_received + excluded.payments_received,
+                outstanding = outstanding + excluded.outstanding
+        """, (day, revenue, profit, discount or 0, new_customer, paid, outstanding))
+
+    def _record_daily_payment(self, day, amount):
+        """Add a received payment to the day it was received"""
+        self.conn.execute("""
+            INSERT INTO sales_daily (day, payments_received) VALUES (?, ?)
+            ON CONFLICT(day) DO UPDATE SET payments_received = payments_received + excluded.payments_received
+        """, (day, amount))
+
+    def _record_daily_outstanding(self, day, delta):
+        """Adjust the outstanding balance of the day a sale was made"""
+        self.conn.execute("""
+            INSERT INTO sales_daily (day, outstanding) VALUES (?, ?)
+            ON CONFLICT(day) DO UPDATE SET outstanding = outstanding + excluded.outstanding
+        """, (day, delta))
+
+    def rebuild_sales_daily(self):
+        """Recompute sales_daily from the sales history (backfill or repair)"""
+        with self.transaction():
+            backfill_sales_daily(self.conn)
+            self.mark_changed(SALES, PAYMENTS)
+
+    def reconcile_company_totals(self, repair=True):
+        """
+        Check company.total_sales/total_profit against the completed sales.
+
+        Returns (consistent, expected, stored) where expected and stored are
+        (total_sales, total_profit) tuples. With repair=True a mismatch is
+        overwritten with the expected values.
+        """
+        cursor = self.conn.cursor()
+        # Read and repair under one write lock, so a sale committing in between
+        # cannot have its increment overwritten with stale totals
+        with self.transaction():
+            # Answered from idx_sales_status_date without touching the sales rows
+            cursor.execute("""
+                SELECT COUNT(*), COALESCE(SUM(total_profit), 0)
+                FROM sales WHERE status = 'completed'
+            """)
+            expected = tuple(cursor.fetchone())
+
+            cursor.execute("SELECT total_sales, total_profit FROM company LIMIT 1")
+            row = cursor.fetchone()
+            if row is None:
+                return True, expected, expected
+            stored = (int(row[0] or 0), row[1] or 0)
+
+            consistent = stored[0] == expected[0] and abs(stored[1] - expected[1]) < 0.005
+            if not consistent and repair:
+                cursor.execute("""
+                    UPDATE company SET total_sales = ?, total_profit = ?
+                """, expected)
+                self.mark_changed(COMPANY)
+        return consistent, expected, stored
 
     # ============== REPORTING METHODS ==============
     
@@ -820,7 +1039,7 @@ class DatabaseManager:
                 c.id, c.name, c.phone, c.customer_type, c.notes, 
                 s.id as sale_id, s.payment_status, s.total_amount, 
                 s.amount_paid, s.balance_due, s.due_date, s.sale_date,
-                s.discount_amount  -- ADD THIS LINE
+                s.discount_amount, s.total_profit
             FROM customers c 
             JOIN sales s ON c.id = s.customer_id
             WHERE s.status = 'completed'
@@ -829,22 +1048,24 @@ class DatabaseManager:
     
         result = cursor.fetchall()
         
+        # Items purchased in every completed sale, fetched in one pass and grouped by sale
+        cursor.execute("""
+            SELECT 
+                si.sale_id, p.name as product_name, c.name as category_name, pv.selling_price, si.quantity
+            FROM sales s
+            JOIN sale_items si ON si.sale_id = s.id
+            JOIN product_variants pv ON si.product_variant_id = pv.id
+            JOIN products p ON pv.product_id = p.id
+            JOIN categories c ON pv.category_id = c.id
+            WHERE s.status = 'completed'
+            ORDER BY si.sale_id, si.id
+        """)
+        items_by_sale = {}
+        for sale_id, product_name, category_name, selling_price, quantity in cursor.fetchall():
+            items_by_sale.setdefault(sale_id, []).append((product_name, category_name, selling_price, quantity))
+        
         customers = []
         for row in result:
-            sale_id = row[5]
-            
-            # Get the items purchased for this specific sale
-            cursor.execute("""
-                SELECT 
-                    p.name as product_name, c.name as category_name, pv.selling_price, si.quantity
-                FROM sale_items si
-                JOIN product_variants pv ON si.product_variant_id = pv.id
-                JOIN products p ON pv.product_id = p.id
-                JOIN categories c ON pv.category_id = c.id
-                WHERE si.sale_id = ?
-            """, (sale_id,))
-            item_names = cursor.fetchall()
-            
             customer = {
                 "id": row[0],
                 "name": row[1],
@@ -858,8 +1079,9 @@ class DatabaseManager:
                 "balance_due": row[9],
                 "due_date": row[10],
                 "sale_date": row[11],
-                "discount_amount": row[12],  # ADD THIS LINE
-                "items_purchased": item_names
+                "discount_amount": row[12],
+                "total_profit": row[13],
+                "items_purchased": items_by_sale.get(row[5], [])
             }
             customers.append(customer)
         return customers
@@ -868,77 +1090,82 @@ class DatabaseManager:
         cursor = self.conn.cursor()
         
         try:
-            # Get current sale information
-            cursor.execute("""
-                SELECT total_amount, amount_paid, balance_due, payment_status
-                FROM sales 
-                WHERE id = ? AND status = 'completed'
-            """, (sale_id,))
+            with self.transaction():
+                # Get current sale information
+                cursor.execute("""
+                    SELECT total_amount, amount_paid, balance_due, payment_status, sale_date
+                    FROM sales 
+                    WHERE id = ? AND status = 'completed'
+                """, (sale_id,))
             
-            sale_info = cursor.fetchone()
-            if not sale_info:
-                return False, "Sale not found or not completed"
+                sale_info = cursor.fetchone()
+                if not sale_info:
+                    return False, "Sale not found or not completed"
             
-            total_amount, current_paid, current_balance, current_status = sale_info
+                total_amount, current_paid, current_balance, current_status, sale_date = sale_info
             
-            # Validate payment amount
-            if payment_amount <= 0:
-                return False, "Payment amount must be greater than 0"
+                # Validate payment amount
+                if payment_amount <= 0:
+                    return False, "Payment amount must be greater than 0"
             
-            if payment_amount > current_balance:
-                return False, f"Payment amount cannot exceed outstanding balance of PKR {current_balance:,.2f}"
+                if payment_amount > current_balance:
+                    return False, f"Payment amount cannot exceed outstanding balance of PKR {current_balance:,.2f}"
             
-            # Calculate new amounts
-            new_amount_paid = current_paid + payment_amount
-            new_balance_due = total_amount - new_amount_paid
+                # Calculate new amounts
+                new_amount_paid = current_paid + payment_amount
+                new_balance_due = total_amount - new_amount_paid
             
-            # Determine new payment status
-            if new_balance_due <= 0:
-                new_payment_status = 'paid_full'
-            elif new_amount_paid > 0 and new_balance_due > 0:
-                new_payment_status = 'partial'
-            else:
-                new_payment_status = 'pending'
+                # Determine new payment status
+                if new_balance_due <= 0:
+                    new_payment_status = 'paid_full'
+                elif new_amount_paid > 0 and new_balance_due > 0:
+                    new_payment_status = 'partial'
+                else:
+                    new_payment_status = 'pending'
             
-            # Update sales table
-            if new_payment_status == 'paid_full':
-                # Clear due date when fully paid
-                cursor.execute("""
-                    UPDATE sales 
-                    SET amount_paid = ?, 
-                        balance_due = ?, 
-                        payment_status = ?,
-                        due_date = NULL,
-                        updated_at = ?
-                    WHERE id = ?
-                """, (new_amount_paid, new_balance_due, new_payment_status, 
-                      datetime.now().isoformat(), sale_id))
-            else:
-                # Keep due date for partial payments
-                cursor.execute("""
-                    UPDATE sales 
-                    SET amount_paid = ?, 
-                        balance_due = ?, 
-                        payment_status = ?,
-                        updated_at = ?
-                    WHERE id = ?
-                """, (new_amount_paid, new_balance_due, new_payment_status, 
-                      datetime.now().isoformat(), sale_id))
+                # Update sales table
+                if new_payment_status == 'paid_full':
+                    # Clear due date when fully paid
+                    cursor.execute("""
+                        UPDATE sales 
+                        SET amount_paid = ?, 
+                            balance_due = ?, 
+                            payment_status = ?,
+                            due_date = NULL,
+                            updated_at = ?
+                        WHERE id = ?
+                    """, (new_amount_paid, new_balance_due, new_payment_status, 
+                          datetime.now().isoformat(), sale_id))
+                else:
+                    # Keep due date for partial payments
+                    cursor.execute("""
+                        UPDATE sales 
+                        SET amount_paid = ?, 
+                            balance_due = ?, 
+                            payment_status = ?,
+                            updated_at = ?
+                        WHERE id = ?
+                    """, (new_amount_paid, new_balance_due, new_payment_status, 
+                          datetime.now().isoformat(), sale_id))
             
-            # Record payment in payment history
-            cursor.execute("""
-                INSERT INTO payment_history 
-                (sale_id, payment_amount, payment_method, payment_date, notes)
-                VALUES (?, ?, ?, ?, ?)
-            """, (sale_id, payment_amount, payment_method, 
-                  datetime.now().isoformat(), notes or f"Partial payment of PKR {payment_amount:,.2f}"))
+                # Record payment in payment history
+                payment_date = datetime.now().isoformat()
+                cursor.execute("""
+                    INSERT INTO payment_history 
+                    (sale_id, payment_amount, payment_method, payment_date, notes)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (sale_id, payment_amount, payment_method, 
+                      payment_date, notes or f"Partial payment of PKR {payment_amount:,.2f}"))
             
-            self.conn.commit()
+                # Received today, no longer outstanding on the day of the sale
+                self._record_daily_payment(payment_date[:10], payment_amount)
+                if sale_date:
+                    self._record_daily_outstanding(sale_date[:10], -payment_amount)
+                self.mark_changed(SALES, PAYMENTS)
             
-            return True, f"Payment of PKR {payment_amount:,.2f} processed successfully. New balance: PKR {new_balance_due:,.2f}"
+                return True, f"Payment of PKR {payment_amount:,.2f} processed successfully. New balance: PKR {new_balance_due:,.2f}"
             
         except Exception as e:
-            self.conn.rollback()
             return False, f"Database error: {str(e)}"
 
     def get_sales_report(self, start_date=None, end_date=None, status=None):
@@ -955,13 +1182,14 @@ class DatabaseManager:
             WHERE s.status != 'draft'
         """
         
+        # Half-open ISO bounds so idx_sales_date can be used
         params = []
         if start_date:
-            query += " AND date(s.sale_date) >= ?"
-            params.append(start_date)
+            query += " AND s.sale_date >= ?"
+            params.append(day_bounds(start_date, start_date)[0])
         if end_date:
-            query += " AND date(s.sale_date) <= ?"
-            params.append(end_date)
+            query += " AND s.sale_date < ?"
+            params.append(day_bounds(end_date, end_date)[1])
         if status:
             query += " AND s.status = ?"
             params.append(status)
@@ -1046,19 +1274,6 @@ class DatabaseManager:
 
 # Add these methods to the DatabaseManager class:
 
-    def create_password_table(self):
-        """Create password table if it doesn't exist - safe to run on existing database"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS app_password (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                password_hash TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        self.conn.commit()
-    
     def hash_password(self, password):
         """Hash password using SHA-256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -1066,15 +1281,15 @@ class DatabaseManager:
     def set_password(self, password):
         """Set or update the app password"""
         cursor = self.conn.cursor()
-        password_hash = self.hash_password(password)
+        with self.transaction():
+            password_hash = self.hash_password(password)
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO app_password (id, password_hash, updated_at)
-            VALUES (1, ?, ?)
-        """, (password_hash, datetime.now().isoformat()))
+            cursor.execute("""
+                INSERT OR REPLACE INTO app_password (id, password_hash, updated_at)
+                VALUES (1, ?, ?)
+            """, (password_hash, datetime.now().isoformat()))
         
-        self.conn.commit()
-        return True
+            return True
     
     def verify_password(self, password):
         """Verify if the entered password is correct"""
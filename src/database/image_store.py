@@ -0,0 +1,147 @@
+"""
+Content-addressed product image store
+
+Uploaded images are stored under StockManager/images by the SHA-256 of their
+bytes, sharded two levels deep (images/3f/a2/3fa2...e1.jpg). Uploading the
+same photo again, under any name, finds the existing file and copies
+nothing; two different files called IMG_0001.jpg no longer overwrite each
+other.
+
+The image_refs table (migration 11) counts the product_variants rows whose
+image_path points at each file; triggers keep it in step with every insert,
+update and delete. collect_garbage() removes store files nothing refers to.
+
+    python -m src.database.maintenance gc-images
+"""
+
+import hashlib
+import os
+import shutil
+import time
+
+# Store files younger than this are never collected: the variant row that
+# will use a just-uploaded image may not be committed yet
+GC_MIN_AGE_SECONDS = 3600
+
+
+def images_dir():
+    """StockManager/images, the store's root folder"""
+    appdata_dir = os.getenv("APPDATA") or os.path.expanduser("~/.local/share")
+    return os.path.join(appdata_dir, "StockManager", "images")
+
+
+def thumbnail_dir():
+    """StockManager/images/.thumbs, the thumbnail cache (see ui/components/thumbnails.py)"""
+    return os.path.join(images_dir(), ".thumbs")
+
+
+def thumbnail_key(image_path):
+    """Prefix of every cached thumbnail file of image_path"""
+    return hashlib.sha1(os.path.abspath(image_path).encode("utf-8")).hexdigest()[:20]
+
+
+def remove_thumbnails(image_path):
+    """Delete the cached thumbnails of image_path, return the bytes freed"""
+    key = thumbnail_key(image_path)
+    folder = os.path.join(thumbnail_dir(), key[:2])
+    freed = 0
+    if not os.path.isdir(folder):
+        return freed
+    for entry in os.scandir(folder):
+        if entry.name.startswith(key + "_"):
+            freed += entry.stat().st_size
+            os.remove(entry.path)
+    return freed
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_path(digest, extension):
+    """Where the image with this digest lives in the store"""
+    return os.path.join(images_dir(), digest[:2], digest[2:4], digest + extension.lower())
+
+
+def is_stored(path):
+    """True if path is a file inside the content-addressed store"""
+    try:
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(images_dir()))
+    except ValueError:
+        # Another drive on Windows
+        return False
+    parts = relative.split(os.sep)
+    return (len(parts) == 3 and len(parts[0]) == 2 and len(parts[1]) == 2
+            and parts[2].startswith(parts[0] + parts[1]))
+
+
+def store_image(source_path):
+    """
+    Add an image file to the store and return its stored path.
+
+    Files already in the store (same bytes) are not copied again, only
+    touched so collect_garbage() treats them as just uploaded.
+    """
+    if is_stored(source_path) and os.path.exists(source_path):
+        return os.path.abspath(source_path)
+
+    target = store_path(file_digest(source_path), os.path.splitext(source_path)[1])
+    if os.path.exists(target):
+        # Restart the garbage collection grace period: the file may have no
+        # references yet and be about to get one
+        os.utime(target)
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Copy then rename, so the store never holds half a file under its digest
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target)
+    return target
+
+
+def collect_garbage(conn, min_age_seconds=GC_MIN_AGE_SECONDS):
+    """
+    Delete store files no product variant refers to, and their cached
+    thumbnails; return (files, bytes) removed.
+
+    Run inside a write transaction (DatabaseManager.collect_image_garbage) so
+    no variant can start using a file while it is being deleted. Only files
+    inside the sharded store are considered; images saved by older versions
+    in the flat images folder are left alone.
+    """
+    referenced = {path for (path,) in conn.execute("SELECT path FROM image_refs WHERE refs > 0")}
+    cutoff = time.time() - min_age_seconds
+    root = images_dir()
+    removed = freed = 0
+
+    for first in _shard_dirs(root):
+        for second in _shard_dirs(first):
+            for entry in os.scandir(second):
+                if not entry.is_file() or not is_stored(entry.path):
+                    continue
+                if os.path.abspath(entry.path) in referenced:
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime > cutoff:
+                    continue
+                os.remove(entry.path)
+                removed += 1
+                freed += stat.st_size + remove_thumbnails(entry.path)
+            if not os.listdir(second):
+                os.rmdir(second)
+
+    conn.execute("DELETE FROM image_refs WHERE refs <= 0")
+    return removed, freed
+
+
+def _shard_dirs(folder):
+    if not os.path.isdir(folder):
+        return []
+    return [entry.path for entry in os.scandir(folder)
+            if entry.is_dir() and len(entry.name) == 2 and not entry.name.startswith(".")]
@@ -0,0 +1,71 @@
+"""
+Database maintenance commands
+
+    python -m src.database.maintenance rebuild-sales-daily
+    python -m src.database.maintenance reconcile-company-totals
+    python -m src.database.maintenance rebuild-search-index
+    python -m src.database.maintenance gc-images
+
+Run against the same database the app uses (APPDATA/StockManager).
+"""
+
+import argparse
+import time
+from .database_manager import DatabaseManager
+
+
+def rebuild_sales_daily(db):
+    db.rebuild_sales_daily()
+    days = db.conn.execute("SELECT COUNT(*) FROM sales_daily").fetchone()[0]
+    return f"sales_daily rebuilt: {days} days"
+
+
+def reconcile_company_totals(db):
+    consistent, expected, stored = db.reconcile_company_totals()
+    if consistent:
+        return f"company totals OK: {expected[0]} sales, PKR {expected[1]:,.2f} profit"
+    return (f"company totals repaired: {stored[0]} -> {expected[0]} sales, "
+            f"PKR {stored[1]:,.2f} -> {expected[1]:,.2f} profit")
+
+
+def rebuild_search_index(db):
+    db.rebuild_search_index()
+    rows = db.conn.execute("SELECT COUNT(*) FROM products_fts").fetchone()[0]
+    return f"search indexes rebuilt: {rows} variants"
+
+
+def gc_images(db):
+    files, freed = db.collect_image_garbage()
+    return f"unused images removed: {files} files, {freed / (1 << 20):.1f} MB"
+
+
+COMMANDS = {
+    "rebuild-sales-daily": rebuild_sales_daily,
+    "reconcile-company-totals": reconcile_company_totals,
+    "rebuild-search-index": rebuild_search_index,
+    "gc-images": gc_images,
+}
+
+
+def run(command, db_name="stock_management.db"):
+    """Run one command on its own connection (safe from any thread), return its message"""
+    db = DatabaseManager(db_name)
+    try:
+        return COMMANDS[command](db)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StockPy database maintenance")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db", default="stock_management.db", help="database file name")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    message = run(args.command, args.db)
+    print(f"{message} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
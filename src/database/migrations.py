@@ -0,0 +1,581 @@
+"""
+Schema migrations
+
+The schema version lives in PRAGMA user_version. Each migration runs once, in
+order, inside its own transaction; afterwards opening a connection costs a
+single version check.
+"""
+
+
+def _initial_schema(conn):
+    """Baseline schema (tables created by the original create_tables)"""
+
+    # Company Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS company (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    total_sales REAL DEFAULT 0,
+    total_profit REAL DEFAULT 0
+    )
+    """)
+
+    # Enhanced Customers Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL DEFAULT 'guest',
+    phone TEXT,
+    address TEXT,
+    customer_type TEXT DEFAULT 'walk_in',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT
+    )
+    """)
+
+    # Products Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    brand TEXT,
+    status TEXT DEFAULT 'active',
+    deactivated_at TEXT,
+    deactivated_reason TEXT
+    );
+    """)
+
+    # Categories Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL
+    )
+    """)
+
+    # Product Variants Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS product_variants (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    purchase_price REAL NOT NULL,
+    selling_price REAL NOT NULL,
+    image_path TEXT,
+    status TEXT DEFAULT 'active',
+    deactivated_at TEXT,
+    deactivated_reason TEXT,
+    stock_quantity INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (product_id) REFERENCES products(id),
+    FOREIGN KEY (category_id) REFERENCES categories(id),
+    UNIQUE(product_id, category_id)
+    );
+    """)
+
+    # Enhanced Sales Table with Payment Tracking
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'draft',
+        sale_date TEXT,
+        
+        total_amount REAL NOT NULL DEFAULT 0,
+        amount_paid REAL NOT NULL DEFAULT 0,
+        balance_due REAL NOT NULL DEFAULT 0,
+        payment_method TEXT DEFAULT 'cash',
+        payment_status TEXT NOT NULL DEFAULT 'pending',
+        due_date TEXT,
+        
+        total_profit REAL NOT NULL DEFAULT 0,
+        discount_amount REAL DEFAULT 0,
+        notes TEXT,
+        
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (customer_id) REFERENCES customers(id)
+    )
+    """)
+
+    # Payment History Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS payment_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_id INTEGER NOT NULL,
+        payment_amount REAL NOT NULL,
+        payment_method TEXT NOT NULL DEFAULT 'cash',
+        payment_date TEXT DEFAULT CURRENT_TIMESTAMP,
+        received_by TEXT,
+        notes TEXT,
+        FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Sale Items Table
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sale_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sale_id INTEGER NOT NULL,
+    product_variant_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price REAL NOT NULL,
+    unit_cost REAL NOT NULL,
+    line_total REAL NOT NULL,
+    line_profit REAL NOT NULL,
+    discount_per_item REAL DEFAULT 0,
+    FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE,
+    FOREIGN KEY (product_variant_id) REFERENCES product_variants(id)
+    )
+    """)
+
+    # App Password Table
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS app_password (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            password_hash TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create indexes
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_payment_status ON sales(payment_status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payment_history_sale ON payment_history(sale_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_type ON customers(customer_type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_status ON products(status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_variants_status ON product_variants(status)")
+
+
+def _table_change_counters(conn):
+    """Per-table commit counters so other processes can see what we changed"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS table_changes (
+    table_name TEXT PRIMARY KEY,
+    counter INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+
+
+def _sales_status_date_index(conn):
+    """Composite index for 'completed sales in a date range' queries"""
+    # Trailing columns make it covering for the dashboard stats (no table lookups)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sales_status_date
+    ON sales(status, sale_date, customer_id, total_amount, total_profit)
+    """)
+    # Leading column of the composite index, no longer needed on its own
+    conn.execute("DROP INDEX IF EXISTS idx_sales_status")
+    conn.execute("ANALYZE sales")
+
+
+def backfill_sales_daily(conn):
+    """Recompute the daily rollups from sales and payment_history"""
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute("DELETE FROM sales_daily_customers")
+
+    conn.execute("""
+        INSERT INTO sales_daily (day, sales_count, revenue, profit, discount, customers, outstanding)
+        SELECT substr(sale_date, 1, 10),
+               COUNT(*),
+               COALESCE(SUM(total_amount), 0),
+               COALESCE(SUM(total_profit), 0),
+               COALESCE(SUM(discount_amount), 0),
+               COUNT(DISTINCT customer_id),
+               COALESCE(SUM(CASE WHEN payment_status != 'paid_full' THEN balance_due ELSE 0 END), 0)
+        FROM sales
+        WHERE status = 'completed' AND sale_date IS NOT NULL
+        GROUP BY substr(sale_date, 1, 10)
+    """)
+
+    conn.execute("""
+        INSERT INTO sales_daily_customers (day, customer_id)
+        SELECT DISTINCT substr(sale_date, 1, 10), customer_id
+        FROM sales
+        WHERE status = 'completed' AND sale_date IS NOT NULL AND customer_id IS NOT NULL
+    """)
+
+    # Payments count on the day they were received, not the day of the sale
+    conn.execute("""
+        INSERT INTO sales_daily (day, payments_received)
+        SELECT substr(ph.payment_date, 1, 10), SUM(ph.payment_amount)
+        FROM payment_history ph
+        JOIN sales s ON s.id = ph.sale_id
+        WHERE s.status = 'completed' AND ph.payment_date IS NOT NULL
+        GROUP BY substr(ph.payment_date, 1, 10)
+        ON CONFLICT(day) DO UPDATE SET payments_received = excluded.payments_received
+    """)
+
+
+def _sales_daily_rollup(conn):
+    """One row per day of completed-sale totals, kept up to date on every sale/payment"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sales_daily (
+    day TEXT PRIMARY KEY,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    profit REAL NOT NULL DEFAULT 0,
+    discount REAL NOT NULL DEFAULT 0,
+    customers INTEGER NOT NULL DEFAULT 0,
+    payments_received REAL NOT NULL DEFAULT 0,
+    outstanding REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+
+    # Which customers bought on which day, so distinct customers add up across a range
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sales_daily_customers (
+    day TEXT NOT NULL,
+    customer_id INTEGER NOT NULL,
+    PRIMARY KEY (day, customer_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_customers_customer ON sales_daily_customers(customer_id)")
+
+    backfill_sales_daily(conn)
+
+
+def _sale_items_sale_index(conn):
+    """Checkout reads a sale's items by sale_id; without this it scans every item ever sold"""
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sale_items_sale
+    ON sale_items(sale_id, product_variant_id)
+    """)
+
+
+def rebuild_products_fts(conn):
+    """Refill the product search index from products, variants and categories"""
+    conn.execute("DELETE FROM products_fts")
+    conn.execute("""
+        INSERT INTO products_fts (rowid, name, brand, description, category)
+        SELECT pv.id, p.name, p.brand, p.description, c.name
+        FROM product_variants pv
+        JOIN products p ON p.id = pv.product_id
+        JOIN categories c ON c.id = pv.category_id
+    """)
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('optimize')")
+
+
+def _products_fts(conn):
+    """Full-text index behind the home page search, one row per variant (rowid = variant id)"""
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, brand, description, category,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+    )
+    """)
+    # Default ORDER BY rank: a name hit outweighs brand, category and description hits
+    conn.execute("INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0, 3.0)')")
+
+    # Keep the index in step with every write path, including raw SQL ones
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_fts_variant_insert
+    AFTER INSERT ON product_variants BEGIN
+        INSERT INTO products_fts (rowid, name, brand, description, category)
+        SELECT NEW.id, p.name, p.brand, p.description, c.name
+        FROM products p, categories c
+        WHERE p.id = NEW.product_id AND c.id = NEW.category_id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_fts_variant_update
+    AFTER UPDATE OF product_id, category_id ON product_variants BEGIN
+        DELETE FROM products_fts WHERE rowid = OLD.id;
+        INSERT INTO products_fts (rowid, name, brand, description, category)
+        SELECT NEW.id, p.name, p.brand, p.description, c.name
+        FROM products p, categories c
+        WHERE p.id = NEW.product_id AND c.id = NEW.category_id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_fts_variant_delete
+    AFTER DELETE ON product_variants BEGIN
+        DELETE FROM products_fts WHERE rowid = OLD.id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_fts_product_update
+    AFTER UPDATE OF name, brand, description ON products BEGIN
+        UPDATE products_fts
+        SET name = NEW.name, brand = NEW.brand, description = NEW.description
+        WHERE rowid IN (SELECT id FROM product_variants WHERE product_id = NEW.id);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_fts_category_update
+    AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = NEW.name
+        WHERE rowid IN (SELECT id FROM product_variants WHERE category_id = NEW.id);
+    END
+    """)
+
+    rebuild_products_fts(conn)
+
+
+
+# SQL twins of trigram.search_words / trigram.squash for the punctuation product data uses
+_WORDS = "lower(replace(replace(replace(replace(replace({0}, '/', ''), '-', ''), '.', ''), '_', ''), '+', ''))"
+_SQUASH = "replace(" + _WORDS + ", ' ', '')"
+
+
+def _trigram_field(column):
+    # "Reno 12F" -> " reno 12f reno12f": every word and the squashed whole, space separated
+    return f"' ' || {_WORDS.format(column)} || ' ' || {_SQUASH.format(column)}"
+
+
+_TRIGRAM_TERMS = (
+    _trigram_field("p.name") + " || " +
+    _trigram_field("COALESCE(p.brand, '')") + " || " +
+    _trigram_field("c.name") + " || ' '"
+)
+
+
+def rebuild_products_trigram(conn):
+    """Refill the fuzzy search index from products, variants and categories"""
+    conn.execute("DELETE FROM products_trigram")
+    conn.execute(f"""
+        INSERT INTO products_trigram (rowid, terms)
+        SELECT pv.id, {_TRIGRAM_TERMS}
+        FROM product_variants pv
+        JOIN products p ON p.id = pv.product_id
+        JOIN categories c ON c.id = pv.category_id
+    """)
+    conn.execute("INSERT INTO products_trigram (products_trigram) VALUES ('optimize')")
+
+
+def _products_trigram(conn):
+    """Trigram index for typo-tolerant search (rowid = variant id, see trigram.py)"""
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_trigram USING fts5(
+    terms,
+    tokenize = 'trigram',
+    detail = 'none'
+    )
+    """)
+    # Per-trigram document counts, so searches can read the rarest trigrams first
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS products_trigram_vocab USING fts5vocab(products_trigram, 'row')")
+
+    insert_new = f"""
+        INSERT INTO products_trigram (rowid, terms)
+        SELECT NEW.id, {_TRIGRAM_TERMS}
+        FROM products p, categories c
+        WHERE p.id = NEW.product_id AND c.id = NEW.category_id;
+    """
+    refresh_variants = f"""
+        UPDATE products_trigram
+        SET terms = (
+            SELECT {_TRIGRAM_TERMS}
+            FROM product_variants pv
+            JOIN products p ON p.id = pv.product_id
+            JOIN categories c ON c.id = pv.category_id
+            WHERE pv.id = products_trigram.rowid
+        )
+        WHERE rowid IN (SELECT id FROM product_variants WHERE {{0}} = NEW.id);
+    """
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS products_trigram_variant_insert
+    AFTER INSERT ON product_variants BEGIN
+        {insert_new}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS products_trigram_variant_update
+    AFTER UPDATE OF product_id, category_id ON product_variants BEGIN
+        DELETE FROM products_trigram WHERE rowid = OLD.id;
+        {insert_new}
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS products_trigram_variant_delete
+    AFTER DELETE ON product_variants BEGIN
+        DELETE FROM products_trigram WHERE rowid = OLD.id;
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS products_trigram_product_update
+    AFTER UPDATE OF name, brand ON products BEGIN
+        {refresh_variants.format("product_id")}
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS products_trigram_category_update
+    AFTER UPDATE OF name ON categories BEGIN
+        {refresh_variants.format("category_id")}
+    END
+    """)
+
+    rebuild_products_trigram(conn)
+
+
+def _variant_barcodes(conn):
+    """Scanner barcode / SKU per variant, unique when set"""
+    conn.execute("ALTER TABLE product_variants ADD COLUMN barcode TEXT")
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_variants_barcode
+    ON product_variants(barcode) WHERE barcode IS NOT NULL
+    """)
+
+
+def index_new_variants(conn, after_id):
+    """Add search index rows for every variant with id > after_id (bulk imports)"""
+    conn.execute("""
+        INSERT INTO products_fts (rowid, name, brand, description, category)
+        SELECT pv.id, p.name, p.brand, p.description, c.name
+        FROM product_variants pv
+        JOIN products p ON p.id = pv.product_id
+        JOIN categories c ON c.id = pv.category_id
+        WHERE pv.id > ?
+    """, (after_id,))
+    conn.execute(f"""
+        INSERT INTO products_trigram (rowid, terms)
+        SELECT pv.id, {_TRIGRAM_TERMS}
+        FROM product_variants pv
+        JOIN products p ON p.id = pv.product_id
+        JOIN categories c ON c.id = pv.category_id
+        WHERE pv.id > ?
+    """, (after_id,))
+
+
+def _deferrable_search_index(conn):
+    """Let bulk imports index new variants in one pass instead of one trigger call per row"""
+    # Only ever set to 1 inside an import's own transaction, so nobody else sees it
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS search_index_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    deferred INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO search_index_state (id, deferred) VALUES (1, 0)")
+
+    conn.execute("DROP TRIGGER IF EXISTS products_fts_variant_insert")
+    conn.execute("""
+    CREATE TRIGGER products_fts_variant_insert
+    AFTER INSERT ON product_variants
+    WHEN (SELECT deferred FROM search_index_state WHERE id = 1) = 0 BEGIN
+        INSERT INTO products_fts (rowid, name, brand, description, category)
+        SELECT NEW.id, p.name, p.brand, p.description, c.name
+        FROM products p, categories c
+        WHERE p.id = NEW.product_id AND c.id = NEW.category_id;
+    END
+    """)
+
+    conn.execute("DROP TRIGGER IF EXISTS products_trigram_variant_insert")
+    conn.execute(f"""
+    CREATE TRIGGER products_trigram_variant_insert
+    AFTER INSERT ON product_variants
+    WHEN (SELECT deferred FROM search_index_state WHERE id = 1) = 0 BEGIN
+        INSERT INTO products_trigram (rowid, terms)
+        SELECT NEW.id, {_TRIGRAM_TERMS}
+        FROM products p, categories c
+        WHERE p.id = NEW.product_id AND c.id = NEW.category_id;
+    END
+    """)
+
+
+# Normalized (name, brand) of a product, as matched by merge imports; a query
+# must use the exact same expressions for SQLite to use idx_products_name_brand
+PRODUCT_NAME_KEY = "lower(trim({0}))"
+PRODUCT_BRAND_KEY = "lower(trim(COALESCE(NULLIF(trim({0}), ''), 'Local')))"
+
+
+def _products_name_brand_index(conn):
+    """Look products up by normalized (name, brand) for merge imports"""
+    # Not UNIQUE: existing catalogs can already hold duplicates
+    conn.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_products_name_brand
+    ON products({PRODUCT_NAME_KEY.format("name")}, {PRODUCT_BRAND_KEY.format("brand")})
+    """)
+
+
+def _image_refs(conn):
+    """Reference counts of product image files, for image_store.collect_garbage"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS image_refs (
+    path TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """)
+
+    # Counted in SQL so imports and raw UPDATEs keep it right too; NULL and '' mean no image
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS image_refs_variant_insert
+    AFTER INSERT ON product_variants WHEN NEW.image_path <> '' BEGIN
+        INSERT INTO image_refs (path, refs) VALUES (NEW.image_path, 1)
+        ON CONFLICT(path) DO UPDATE SET refs = refs + 1;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS image_refs_variant_update
+    AFTER UPDATE OF image_path ON product_variants
+    WHEN OLD.image_path IS NOT NEW.image_path BEGIN
+        UPDATE image_refs SET refs = refs - 1 WHERE path = OLD.image_path;
+        INSERT INTO image_refs (path, refs) SELECT NEW.image_path, 1 WHERE NEW.image_path <> ''
+        ON CONFLICT(path) DO UPDATE SET refs = refs + 1;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS image_refs_variant_delete
+    AFTER DELETE ON product_variants WHEN OLD.image_path <> '' BEGIN
+        UPDATE image_refs SET refs = refs - 1 WHERE path = OLD.image_path;
+    END
+    """)
+
+    conn.execute("""
+    INSERT INTO image_refs (path, refs)
+    SELECT image_path, COUNT(*) FROM product_variants
+    WHERE image_path <> '' GROUP BY image_path
+    """)
+
+
+# Ordered (version, migration) pairs - append new migrations, never reorder
+MIGRATIONS = [
+    (1, _initial_schema),
+    (2, _table_change_counters),
+    (3, _sales_status_date_index),
+    (4, _sales_daily_rollup),
+    (5, _sale_items_sale_index),
+    (6, _products_fts),
+    (7, _products_trigram),
+    (8, _variant_barcodes),
+    (9, _deferrable_search_index),
+    (10, _products_name_brand_index),
+    (11, _image_refs),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Return the schema version stored in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations, return the list of versions applied"""
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for version, migration in MIGRATIONS:
+        # Take the write lock first so two processes never apply the same step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        applied.append(version)
+
+    return applied
@@ -0,0 +1,75 @@
+"""
+SQLite performance profiles
+
+Each profile is a named set of PRAGMAs applied when a connection is opened.
+All profiles keep the database in WAL mode so readers never block the till's
+writes; they differ in how hard they fsync and how much memory they use.
+"""
+
+# Negative cache_size values are in KiB, mmap_size is in bytes
+PROFILES = {
+    # Default for the till: every committed sale survives a power cut
+    "durable_pos": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Supplier catalog imports: a crash mid-import just means re-running it
+    "fast_bulk_import": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+    # Dashboards and background readers: never write, large read cache
+    "read_only_reporting": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 2000,
+        "query_only": "ON",
+    },
+}
+
+DEFAULT_PROFILE = "durable_pos"
+
+# Applied first so the remaining PRAGMAs can wait on a busy database
+_PRAGMA_ORDER = ["busy_timeout", "journal_mode", "synchronous", "cache_size",
+                 "mmap_size", "temp_store", "query_only"]
+
+
+def normalize_profile_name(name):
+    """Accept 'durable-POS', 'Durable POS' etc. for 'durable_pos'"""
+    key = (name or DEFAULT_PROFILE).strip().lower().replace("-", "_").replace(" ", "_")
+    if key not in PROFILES:
+        raise ValueError(f"Unknown database profile '{name}'. "
+                         f"Available: {', '.join(sorted(PROFILES))}")
+    return key
+
+
+def apply_profile(conn, name=None):
+    """Apply a named profile to an open connection, return the profile name"""
+    key = normalize_profile_name(name)
+    settings = PROFILES[key]
+
+    for pragma in _PRAGMA_ORDER:
+        if pragma in settings:
+            # journal_mode returns a row that has to be consumed
+            conn.execute(f"PRAGMA {pragma} = {settings[pragma]}").fetchall()
+
+    return key
+
+
+def describe_connection(conn):
+    """Current values of the profile PRAGMAs on a connection (for diagnostics)"""
+    return {
+        pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in _PRAGMA_ORDER
+    }
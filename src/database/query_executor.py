@@ -0,0 +1,178 @@
+"""
+Background query executor
+
+Runs DatabaseManager reads on a small QThreadPool so pages never block the GUI
+thread on SQLite. Each worker thread keeps its own read-only connection
+(sqlite3 connections are bound to the thread that opened them). Results come
+back to the GUI thread through signals; submitting a new request under the
+same key supersedes the previous one, whose result is then dropped.
+"""
+
+import threading
+import traceback
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from .database_manager import DatabaseManager
+
+
+class _QueryTask(QRunnable):
+    """One queued read; runs fn(db, *args, **kwargs) on a worker thread"""
+
+    def __init__(self, executor, key, generation, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        # Superseded before it even started - skip the query entirely
+        if not self.executor.is_current(self.key, self.generation):
+            self.executor._finished.emit(self, False, None)
+            return
+        try:
+            result = self.fn(self.executor.reader(), *self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.executor._finished.emit(self, False, str(e))
+            return
+        self.executor._finished.emit(self, True, result)
+
+
+class QueryExecutor(QObject):
+    """Submit reads by key, receive the latest result for each key on the GUI thread"""
+
+    result_ready = Signal(str, object)   # key, result
+    query_failed = Signal(str, str)      # key, error message
+
+    # Internal: worker -> GUI thread hand-off (queued across threads)
+    _finished = Signal(object, bool, object)
+
+    def __init__(self, parent=None, max_threads=2, profile="read_only_reporting"):
+        super().__init__(parent)
+        self.profile = profile
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # Keep worker threads (and their connections) alive between queries
+        self.pool.setExpiryTimeout(-1)
+
+        # Keyed by thread id: Qt worker threads get a fresh Python thread state
+        # for every task, so threading.local() would not survive between queries
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+        self._generations = {}
+        self._tasks = set()    # keeps tasks alive until they report back
+        self._callbacks = {}   # (key, generation) -> (on_result, on_error)
+
+        self._finished.connect(self._deliver)
+
+    def reader(self):
+        """The calling worker thread's read-only DatabaseManager"""
+        thread_id = threading.get_ident()
+        with self._readers_lock:
+            db = self._readers.get(thread_id)
+        if db is None:
+            db = DatabaseManager(profile=self.profile)
+            with self._readers_lock:
+                self._readers[thread_id] = db
+        return db
+
+    def is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        """
+        Queue fn(db, *args, **kwargs) under key and return its generation.
+
+        Any earlier request with the same key that has not been delivered yet
+        is cancelled. on_result/on_error are called on the GUI thread.
+        """
+        self.cancel(key)
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        task = _QueryTask(self, key, generation, fn, args, kwargs)
+        self._tasks.add(task)
+        if on_result or on_error:
+            self._callbacks[(key, generation)] = (on_result, on_error)
+        self.pool.start(task)
+        return generation
+
+    def cancel(self, key):
+        """Drop the outstanding request for key (queued or running)"""
+        if key not in self._generations:
+            return
+        for task in [t for t in self._tasks if t.key == key]:
+            self._callbacks.pop((key, task.generation), None)
+            # Still queued: take it back so it never touches the database
+            if self.pool.tryTake(task):
+                self._tasks.discard(task)
+        # Bumping the generation makes a running task's result stale
+        self._generations[key] += 1
+
+    def pending_count(self):
+        """Number of submitted requests that have not reported back yet"""
+        return len(self._tasks)
+
+    @Slot(object, bool, object)
+    def _deliver(self, task, ok, payload):
+        self._tasks.discard(task)
+        key, generation = task.key, task.generation
+        callbacks = self._callbacks.pop((key, generation), (None, None))
+        if not self.is_current(key, generation):
+            return
+
+        on_result, on_error = callbacks
+        if ok:
+            if on_result:
+                on_result(payload)
+            self.result_ready.emit(key, payload)
+        else:
+            if on_error:
+                on_error(payload)
+            self.query_failed.emit(key, payload)
+
+    def shutdown(self, timeout_ms=5000):
+        """Cancel queued work, close the worker connections and wait for the pool"""
+        for key in {task.key for task in self._tasks}:
+            self.cancel(key)
+        self.pool.clear()
+        # Before waitForDone: in Qt 6 it also ends the pool's threads, and a
+        # sqlite3 connection can only be closed by the thread that opened it
+        self.close_readers(timeout_ms)
+        self.pool.waitForDone(timeout_ms)
+        with self._readers_lock:
+            if self._readers:
+                print(f"Query executor: {len(self._readers)} reader connections left open")
+
+    def close_readers(self, timeout_ms=5000):
+        """Queue a task per pool thread that closes that thread's reader"""
+        threads = self.pool.maxThreadCount()
+        # Each close task waits until all have started, so every pool thread runs one
+        barrier = threading.Barrier(threads)
+
+        def close_own_reader():
+            try:
+                barrier.wait(timeout_ms / 1000)
+            except threading.BrokenBarrierError:
+                pass
+            with self._readers_lock:
+                db = self._readers.pop(threading.get_ident(), None)
+            if db is not None:
+                db.close()
+
+        for _ in range(threads):
+            self.pool.start(close_own_reader)
+
+
+_executor = None
+
+
+def query_executor():
+    """Process-wide QueryExecutor (created on first use, needs a QApplication)"""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
@@ -0,0 +1,106 @@
+"""
+Shared DatabaseManager sessions
+
+Pages borrow a DatabaseManager from the process-wide registry instead of
+constructing their own, so the whole app shares one sqlite3 connection per
+thread (sqlite3 connections can only be used from the thread that opened them).
+"""
+
+import threading
+from contextlib import contextmanager
+from .database_manager import DatabaseManager
+from .profiles import normalize_profile_name
+
+
+class SessionRegistry:
+    """Hands out shared DatabaseManager sessions and tracks who borrowed them"""
+
+    def __init__(self, db_name="stock_management.db"):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        # (db_name, profile, thread id) -> [DatabaseManager, borrow count]
+        self._sessions = {}
+
+    def _key(self, db_name, profile):
+        return (db_name or self.db_name, normalize_profile_name(profile), threading.get_ident())
+
+    def acquire(self, owner=None, db_name=None, profile=None):
+        """
+        Borrow the shared session for the current thread.
+
+        If owner is a QObject the borrow is released automatically when the
+        owner is destroyed, otherwise call release() when done.
+        """
+        key = self._key(db_name, profile)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = [DatabaseManager(key[0], profile=key[1]), 0]
+                self._sessions[key] = entry
+            entry[1] += 1
+            db = entry[0]
+            idle = self._take_idle(key)
+        for other in idle:
+            other.close()
+
+        destroyed = getattr(owner, "destroyed", None)
+        if destroyed is not None:
+            destroyed.connect(lambda *args, db=db: self.release(db))
+        return db
+
+    def release(self, db):
+        """
+        Give back a borrowed session, closing it once nobody holds it.
+
+        Released from another thread, it cannot be closed here; its own
+        thread closes it on its next acquire() or close_all().
+        """
+        with self._lock:
+            for key, entry in list(self._sessions.items()):
+                if entry[0] is db:
+                    entry[1] -= 1
+                    if entry[1] <= 0 and key[2] == threading.get_ident():
+                        del self._sessions[key]
+                        db.close()
+                    return
+
+    def _take_idle(self, keep=None):
+        """Remove and return the calling thread's unborrowed sessions (call with the lock held)"""
+        thread_id = threading.get_ident()
+        idle = []
+        for key, entry in list(self._sessions.items()):
+            if key[2] == thread_id and entry[1] <= 0 and key != keep:
+                del self._sessions[key]
+                idle.append(entry[0])
+        return idle
+
+    @contextmanager
+    def session(self, db_name=None, profile=None):
+        """Borrow the shared session for the duration of a with-block"""
+        db = self.acquire(db_name=db_name, profile=profile)
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def borrow_count(self):
+        """Total number of outstanding borrows across all sessions"""
+        with self._lock:
+            return sum(entry[1] for entry in self._sessions.values())
+
+    def open_connection_count(self):
+        """Number of sqlite3 connections open in this process (shared or not)"""
+        return DatabaseManager.open_connection_count()
+
+    def close_all(self):
+        """Close every session owned by the calling thread (call on app exit)"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            for key, entry in list(self._sessions.items()):
+                if key[2] == thread_id:
+                    del self._sessions[key]
+                    entry[0].close()
+
+
+# Process-wide registry used by every page
+sessions = SessionRegistry()
@@ -0,0 +1,76 @@
+"""
+Trigram helpers for the fuzzy product search
+
+The products_trigram FTS5 table (trigram tokenizer) indexes each variant's
+name, brand and category as space separated lowercase terms: every word and
+every whole field squashed to letters and digits, so "Reno 12F" is stored as
+" reno 12f reno12f ". A cashier typing "reno12f", "ren12f" or "8/256" still
+shares most of its (space padded) trigrams with the right product.
+Candidates come from the index; the final ranking is computed here.
+"""
+
+import re
+from functools import lru_cache
+
+_SPLIT = re.compile(r"\s+")
+_NOT_ALNUM = re.compile(r"[\W_]+")
+
+
+def squash(text):
+    """Lowercase letters and digits only ("8/256GB" -> "8256gb")"""
+    return _NOT_ALNUM.sub("", (text or "").lower())
+
+
+def search_words(text):
+    """Squashed words of the search text, empty ones dropped"""
+    return [word for word in (squash(part) for part in _SPLIT.split(text or "")) if word]
+
+
+def trigrams(word, pad=False):
+    """Set of 3-character substrings; pad=True adds word-boundary grams"""
+    if pad:
+        word = f" {word} "
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+@lru_cache(maxsize=65536)
+def _padded_trigrams(term):
+    # Brands and categories repeat across every candidate
+    return frozenset(trigrams(term, pad=True))
+
+
+def index_grams(words):
+    """Trigrams to look up in products_trigram (padded, so short words count too)"""
+    grams = set()
+    for word in words:
+        grams |= trigrams(word, pad=True)
+    return grams
+
+
+def product_terms(*fields):
+    """Terms a product can be matched on: each word and each whole field squashed"""
+    terms = set()
+    for field in fields:
+        terms.update(search_words(field))
+        whole = squash(field)
+        if whole:
+            terms.add(whole)
+    return terms
+
+
+def similarity(words, terms):
+    """
+    How well the search words match a product's terms, 0.0 - 1.0.
+
+    Each word scores the share of its (padded) trigrams found in its best
+    matching term, so "samsng" still scores 0.67 against "samsung"; the
+    result is the average over the words.
+    """
+    if not words or not terms:
+        return 0.0
+    term_grams = [_padded_trigrams(term) for term in terms]
+    total = 0.0
+    for word in words:
+        grams = _padded_trigrams(word)
+        total += max(len(grams & other) for other in term_grams) / len(grams)
+    return total / len(words)
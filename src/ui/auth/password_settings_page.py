@@ -2,13 +2,12 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QLineEdit,
                              QPushButton, QMessageBox, QFrame, QHBoxLayout)
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
-from ...database.database_manager import DatabaseManager
 class PasswordSettingsPage(QWidget):
     password_changed = Signal()
     
     def __init__(self, db_manager):
         super().__init__()
-        self.db_manager = DatabaseManager()
+        self.db_manager = db_manager
         self.setup_ui()
         
     def setup_ui(self):
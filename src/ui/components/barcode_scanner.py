@@ -0,0 +1,66 @@
+from PySide6.QtWidgets import QApplication, QLineEdit
+from PySide6.QtCore import QObject, QEvent, QElapsedTimer, Qt, Signal
+
+
+class BarcodeScanner(QObject):
+    """
+    Keyboard-wedge barcode scanner input.
+
+    USB scanners "type" the code followed by Enter, much faster than a
+    person can. Installed as an application event filter, this watches key
+    presses while scope is visible and emits scanned(code) for a fast burst
+    of at least min_length characters ending in Enter. The Enter is consumed
+    and the code removed from the line edit it was typed into; normal typing
+    passes through untouched.
+    """
+
+    scanned = Signal(str)
+
+    def __init__(self, scope, max_interval_ms=50, min_length=4):
+        super().__init__(scope)
+        self.scope = scope
+        self.max_interval_ms = max_interval_ms
+        self.min_length = min_length
+        self.buffer = []
+        self.last_key = QElapsedTimer()
+
+    def install(self):
+        QApplication.instance().installEventFilter(self)
+
+    def uninstall(self):
+        QApplication.instance().removeEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.KeyPress or not self.scope.isVisible():
+            return False
+        # The application filter sees the event once per receiver; only count it at its target
+        if obj is not (QApplication.focusWidget() or self.scope.window()):
+            return False
+
+        fast = self.last_key.isValid() and self.last_key.elapsed() <= self.max_interval_ms
+        self.last_key.restart()
+
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            code = "".join(self.buffer)
+            self.buffer.clear()
+            if fast and len(code) >= self.min_length:
+                self.remove_echo(obj, code)
+                self.scanned.emit(code)
+                return True
+            return False
+
+        text = event.text()
+        if text and text.isprintable():
+            if not fast:
+                # A pause means a new burst (or a person typing)
+                self.buffer.clear()
+            self.buffer.append(text)
+        else:
+            self.buffer.clear()
+        return False
+
+    @staticmethod
+    def remove_echo(widget, code):
+        """Take the scanned characters back out of the line edit that received them"""
+        if isinstance(widget, QLineEdit) and not widget.isReadOnly() and widget.text().endswith(code):
+            widget.setText(widget.text()[:-len(code)])
@@ -4,6 +4,8 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtCore import Qt, Signal, QSize
 from PySide6.QtGui import QPixmap, QFont
 import os
+from .thumbnails import CART_THUMBNAIL
+from .image_loader import image_loader
 
 class CartItemWidget(QFrame):
     """Individual cart item widget that integrates with database"""
@@ -139,22 +141,25 @@ class CartItemWidget(QFrame):
         main_layout.addWidget(self.remove_btn, alignment=Qt.AlignCenter)
         
     def load_product_image(self):
-        """Load product image or show placeholder"""
-        if self.image_path and os.path.exists(self.image_path):
-            pixmap = QPixmap(self.image_path)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(78, 78, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.image_label.setPixmap(scaled_pixmap)
-                self.image_label.setAlignment(Qt.AlignCenter)
-                return
+        """Show the product image, or the placeholder until it has loaded"""
+        scaled_pixmap = image_loader().pixmap(self.image_path, *CART_THUMBNAIL, owner=self)
+        if scaled_pixmap is not None:
+            self.image_label.setPixmap(scaled_pixmap)
+            self.image_label.setAlignment(Qt.AlignCenter)
+            return
         
         # Placeholder image
         self.image_label.setText("No\nImage")
         self.image_label.setAlignment(Qt.AlignCenter)
         self.image_label.setStyleSheet(self.image_label.styleSheet() + "color: #7f8c8d;")
         
+    def on_image_ready(self, image_path, width, height):
+        if image_path == self.image_path and (width, height) == CART_THUMBNAIL:
+            self.load_product_image()
+
     def setup_connections(self):
         """Setup signal connections"""
+        image_loader().image_ready.connect(self.on_image_ready)
         self.qty_spinbox.valueChanged.connect(self.on_quantity_changed)
         self.remove_btn.clicked.connect(self.on_remove_clicked)
         
@@ -0,0 +1,125 @@
+"""
+Background product image loading
+
+Decoding a product photo (even through the thumbnail cache) must not block
+the GUI thread. Widgets ask image_loader() for a pixmap: a cached one comes
+back at once, otherwise they get None, draw their placeholder and the image
+is decoded on a worker pool (QImageReader with scaled decoding, see
+thumbnails.load_thumbnail). When it is ready it goes into pixmap_cache and
+image_ready(path, width, height) is emitted so the widget can repaint.
+
+Requests are tagged with an owner; retain(owner, keys) drops the owner's
+queued requests that are no longer wanted (cards scrolled out of view).
+"""
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal, Slot
+from PySide6.QtGui import QPixmap
+from .thumbnails import load_thumbnail
+from .pixmap_cache import pixmap_cache
+
+
+class _ImageTask(QRunnable):
+    """Decodes one image at one size on a worker thread"""
+
+    def __init__(self, loader, key, image_path, width, height):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.key = key
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.owners = set()
+
+    def run(self):
+        try:
+            image = load_thumbnail(self.image_path, self.width, self.height)
+        except Exception as e:
+            print(f"Error loading image {self.image_path}: {e}")
+            image = None
+        # QImage is safe to hand over; the QPixmap is made on the GUI thread
+        self.loader._finished.emit(self, image)
+
+
+class ImageLoader(QObject):
+    """Loads product pixmaps off the GUI thread into pixmap_cache"""
+
+    image_ready = Signal(str, int, int)   # image path, width, height
+
+    # Internal: worker -> GUI thread hand-off (queued across threads)
+    _finished = Signal(object, object)
+
+    def __init__(self, parent=None, max_threads=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or max(1, min(4, QThread.idealThreadCount() - 1)))
+        self._tasks = {}       # cache key -> queued or running _ImageTask
+        self._failed = set()   # cache keys of images that could not be decoded
+        self._finished.connect(self._deliver)
+
+    def pixmap(self, image_path, width, height, owner=None):
+        """
+        image_path at width x height if it is cached, else None.
+
+        On None the image is queued for decoding (unless it is missing or
+        unreadable) and image_ready follows; draw the placeholder meanwhile.
+        """
+        key = pixmap_cache.key(image_path, width, height)
+        if key is None or key in self._failed:
+            return None
+        pixmap = pixmap_cache.find(key)
+        if pixmap is not None:
+            return pixmap
+
+        task = self._tasks.get(key)
+        if task is None:
+            pixmap_cache.misses += 1
+            task = _ImageTask(self, key, image_path, width, height)
+            self._tasks[key] = task
+            self.pool.start(task)
+        task.owners.add(owner)
+        return None
+
+    def retain(self, owner, keys):
+        """Cancel owner's queued requests whose cache key is not in keys"""
+        for key, task in list(self._tasks.items()):
+            if owner in task.owners and key not in keys:
+                task.owners.discard(owner)
+                # Nobody else waiting and not started yet: never decode it
+                if not task.owners and self.pool.tryTake(task):
+                    del self._tasks[key]
+
+    def cancel(self, owner):
+        """Cancel all of owner's queued requests"""
+        self.retain(owner, ())
+
+    def pending_count(self):
+        """Number of images queued or being decoded"""
+        return len(self._tasks)
+
+    @Slot(object, object)
+    def _deliver(self, task, image):
+        if self._tasks.get(task.key) is task:
+            del self._tasks[task.key]
+        if image is None:
+            self._failed.add(task.key)
+            return
+        pixmap_cache.insert(task.key, QPixmap.fromImage(image))
+        self.image_ready.emit(task.image_path, task.width, task.height)
+
+    def shutdown(self, timeout_ms=5000):
+        """Drop queued decodes and wait for running ones"""
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+        self._tasks.clear()
+
+
+_loader = None
+
+
+def image_loader():
+    """Process-wide ImageLoader (created on first use, needs a QApplication)"""
+    global _loader
+    if _loader is None:
+        _loader = ImageLoader()
+    return _loader
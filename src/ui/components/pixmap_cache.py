@@ -0,0 +1,93 @@
+"""
+Shared in-memory cache of scaled product images
+
+Every widget that shows a product image (grid cards, cart items, the detail
+page) asks pixmap_cache for it, so an image decoded for one of them is reused
+by the others and across refreshes. Entries live in Qt's QPixmapCache, an
+LRU bounded by a memory budget; misses are filled from the on-disk thumbnail
+cache (thumbnails.py), by image_loader off the GUI thread. GUI thread only,
+like QPixmap itself.
+"""
+
+import os
+from PySide6.QtGui import QPixmapCache
+from .thumbnails import thumbnail_pixmap
+
+# QPixmapCache's own default is 10 MB; a 150 px card image is ~90 KB
+DEFAULT_BUDGET_MB = 64
+
+
+class PixmapCache:
+    """Process-wide LRU of product pixmaps keyed by (path, size), with hit/miss counters"""
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self.hits = 0
+        self.misses = 0
+        self.applied = False
+
+    def set_budget(self, megabytes):
+        """Memory budget of the cache (shared with Qt's own QPixmapCache users)"""
+        self.budget_mb = megabytes
+        QPixmapCache.setCacheLimit(int(megabytes * 1024))
+        self.applied = True
+
+    def key(self, image_path, width, height):
+        """Cache key for image_path at width x height, None if the file is missing"""
+        if not image_path:
+            return None
+        try:
+            # A replaced file gets a new key instead of the stale pixmap
+            mtime = os.stat(image_path).st_mtime_ns
+        except OSError:
+            return None
+        return f"product-image:{width}x{height}:{mtime:x}:{image_path}"
+
+    def find(self, key):
+        """Cached pixmap for key (see key()), None on a miss; counts hits only"""
+        if not self.applied:
+            self.set_budget(self.budget_mb)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            self.hits += 1
+            return pixmap
+        return None
+
+    def insert(self, key, pixmap):
+        QPixmapCache.insert(key, pixmap)
+
+    def pixmap(self, image_path, width, height):
+        """image_path scaled to fit width x height, None for the placeholder (loads on a miss)"""
+        key = self.key(image_path, width, height)
+        if key is None:
+            return None
+        pixmap = self.find(key)
+        if pixmap is not None:
+            return pixmap
+
+        self.misses += 1
+        pixmap = thumbnail_pixmap(image_path, width, height)
+        if pixmap is not None:
+            self.insert(key, pixmap)
+        return pixmap
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Drop every cached pixmap (counters are kept)"""
+        QPixmapCache.clear()
+
+    def summary(self):
+        return (f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate), "
+                f"budget {self.budget_mb} MB")
+
+
+# Shared by every widget
+pixmap_cache = PixmapCache()
@@ -0,0 +1,345 @@
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QToolTip, QAbstractItemView
+from PySide6.QtCore import Qt, Signal, QSize, QRect, QPoint, QEvent, QTimer, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QFont, QColor, QPen, QPainter, QCursor
+from .pixmap_cache import pixmap_cache
+from .image_loader import image_loader
+
+# Same footprint as the old ProductCard widget (310x490 including its 12px margin)
+CARD_SIZE = QSize(310, 490)
+CARD_MARGIN = 12
+IMAGE_SIZE = 150
+
+
+class ProductListModel(QAbstractListModel):
+    """Flat list of product dicts (the same dicts HomePage builds) for ProductGridView"""
+
+    ProductRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.products = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.products)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.products):
+            return None
+        product = self.products[index.row()]
+        if role == Qt.DisplayRole:
+            return product.get("name", "No Name")
+        if role == self.ProductRole:
+            return product
+        return None
+
+    def set_products(self, products):
+        """Replace the whole list"""
+        self.beginResetModel()
+        self.products = list(products)
+        self.endResetModel()
+
+    def update_products(self, products):
+        """
+        Bring the list in line with products, touching only what differs.
+
+        Rows are matched by variant_id: missing ones are removed, new ones
+        inserted and rows whose data changed (stock, price, status...) are
+        repainted. Falls back to a reset if the surviving rows were reordered.
+        Returns (added, removed, changed) counts.
+        """
+        products = list(products)
+        old_keys = [p.get("variant_id") for p in self.products]
+        new_keys = [p.get("variant_id") for p in products]
+        old_set, new_set = set(old_keys), set(new_keys)
+
+        if (len(old_set) != len(old_keys) or len(new_set) != len(new_keys)
+                or [k for k in old_keys if k in new_set] != [k for k in new_keys if k in old_set]):
+            self.set_products(products)
+            return len(products), len(old_keys), 0
+
+        # Removals, bottom-up in contiguous runs
+        removed = 0
+        row = len(self.products) - 1
+        while row >= 0:
+            if old_keys[row] in new_set:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and old_keys[row] not in new_set:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self.products[row + 1:last + 1]
+            self.endRemoveRows()
+            removed += last - row
+
+        # Insertions in contiguous runs, and changed rows in place
+        added = changed = 0
+        row = 0
+        while row < len(products):
+            if new_keys[row] in old_set:
+                if self.products[row] != products[row]:
+                    self.products[row] = products[row]
+                    index = self.index(row, 0)
+                    self.dataChanged.emit(index, index)
+                    changed += 1
+                row += 1
+                continue
+            first = row
+            while row < len(products) and new_keys[row] not in old_set:
+                row += 1
+            self.beginInsertRows(QModelIndex(), first, row - 1)
+            self.products[first:first] = products[first:row]
+            self.endInsertRows()
+            added += row - first
+
+        return added, removed, changed
+
+    def product(self, row):
+        return self.products[row]
+
+
+class ProductCardDelegate(QStyledItemDelegate):
+    """Paints a product card per row; no widgets are created per product"""
+
+    view_clicked = Signal(dict)
+    add_to_cart_clicked = Signal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = self._font(18, bold=True)
+        self.subtitle_font = self._font(16, bold=True)
+        self.text_font = self._font(16, bold=True)
+        self.brand_font = self._font(18)
+        self.button_font = self._font(16, bold=True)
+        self.badge_font = self._font(11, bold=True)
+        self.placeholder_font = self._font(12)
+
+    @staticmethod
+    def _font(pixel_size, bold=False):
+        font = QFont()
+        font.setPixelSize(pixel_size)
+        font.setBold(bold)
+        return font
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    # --- Geometry ---
+    def card_layout(self, rect):
+        """Rects of every part of the card painted into rect"""
+        card = rect.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+        inner = card.adjusted(12, 12, -12, -12)
+        x, width = inner.x(), inner.width()
+
+        image = QRect(card.center().x() - IMAGE_SIZE // 2, inner.y() + 8, IMAGE_SIZE, IMAGE_SIZE)
+        title = QRect(x, image.bottom() + 18, width, 48)
+        subtitle = QRect(x, title.bottom() + 4, width, 22)
+        price = QRect(x, subtitle.bottom() + 8, width, 22)
+        brand = QRect(x, price.bottom() + 8, width, 24)
+        stock = QRect(x, brand.bottom() + 8, width, 22)
+
+        cart = QRect(x, inner.bottom() - 36, width, 36)
+        view = QRect(x, cart.top() - 10 - 36, width, 36)
+        return {"card": card, "image": image, "title": title, "subtitle": subtitle,
+                "price": price, "brand": brand, "stock": stock, "view": view, "cart": cart}
+
+    @staticmethod
+    def can_add_to_cart(product):
+        return product.get("status") == 'active' and (product.get("stock") or 0) > 0
+
+    # --- Painting ---
+    def paint(self, painter, option, index):
+        product = index.data(ProductListModel.ProductRole)
+        if product is None:
+            return
+        parts = self.card_layout(option.rect)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        cursor = option.widget.mapFromGlobal(QCursor.pos()) if option.widget and hovered else None
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Card
+        painter.setPen(QPen(QColor("#007bff" if hovered else "#e0e0e0"), 1))
+        painter.setBrush(QColor("#110e1b"))
+        painter.drawRoundedRect(parts["card"], 12, 12)
+
+        self.paint_image(painter, parts["image"], product.get("image", ""), option.widget)
+
+        # Text
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#ffffff"))
+        painter.drawText(parts["title"], Qt.AlignCenter | Qt.TextWordWrap, product.get("name", "No Name"))
+
+        painter.setFont(self.subtitle_font)
+        painter.setPen(QColor("#4da3ff"))
+        painter.drawText(parts["subtitle"], Qt.AlignCenter,
+                         f"Category : {product.get('category', 'uncategorized')}")
+
+        painter.setFont(self.text_font)
+        painter.setPen(QColor("#28a745"))
+        painter.drawText(parts["price"], Qt.AlignCenter, f"PKR {product.get('selling_price', 0) or 0:.2f}")
+
+        painter.setFont(self.brand_font)
+        painter.setPen(QColor("#6c757d"))
+        painter.drawText(parts["brand"], Qt.AlignCenter, product.get("brand", "") or "")
+
+        stock = product.get("stock", 0) or 0
+        painter.setFont(self.text_font)
+        painter.setPen(QColor("#28a745" if stock else "#d32f2f"))  # Red for out of stock
+        painter.drawText(parts["stock"], Qt.AlignCenter, f"Stock: {stock}")
+
+        # Buttons
+        self.paint_button(painter, parts["view"], "View", True, cursor)
+        if product.get("status") == 'active':
+            if stock == 0:
+                self.paint_button(painter, parts["cart"], "Out of Stock", False, cursor, "#d32f2f")
+            else:
+                self.paint_button(painter, parts["cart"], "Add to Cart", True, cursor)
+        else:
+            # Red DEACTIVATED badge (reason shown as tooltip)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor("#d32f2f"))
+            painter.drawRoundedRect(parts["cart"], 4, 4)
+            painter.setFont(self.badge_font)
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(parts["cart"], Qt.AlignCenter, "DEACTIVATED")
+
+        painter.restore()
+
+    def paint_image(self, painter, rect, image_path, view=None):
+        pixmap = self.load_pixmap(image_path, view)
+        if pixmap is not None:
+            x = rect.x() + (rect.width() - pixmap.width()) // 2
+            y = rect.y() + (rect.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+            painter.setPen(QPen(QColor("#dee2e6"), 2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRoundedRect(rect, 8, 8)
+        else:
+            painter.setPen(QPen(QColor("#dee2e6"), 2, Qt.DashLine))
+            painter.setBrush(QColor("#f8f9fa"))
+            painter.drawRoundedRect(rect, 8, 8)
+            painter.setFont(self.placeholder_font)
+            painter.setPen(QColor("#6c757d"))
+            painter.drawText(rect, Qt.AlignCenter, "No Image")
+
+    def load_pixmap(self, image_path, view=None):
+        """
+        Scaled product image if it is in memory, else None for the placeholder;
+        the image is then decoded in the background and the view repainted.
+        """
+        return image_loader().pixmap(image_path, IMAGE_SIZE, IMAGE_SIZE, owner=view)
+
+    def paint_button(self, painter, rect, text, enabled, cursor, color=None):
+        if color is None:
+            color = "#0056b3" if enabled and cursor is not None and rect.contains(cursor) else "#007bff"
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(rect, 6, 6)
+        painter.setFont(self.button_font)
+        painter.setPen(QColor("#ffffff"))
+        painter.drawText(rect, Qt.AlignCenter, text)
+
+    # --- Interaction ---
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseMove and option.widget is not None:
+            # Repaint for button hover colours
+            option.widget.update(option.rect)
+        elif event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            product = index.data(ProductListModel.ProductRole)
+            parts = self.card_layout(option.rect)
+            pos = event.position().toPoint()
+            if parts["view"].contains(pos):
+                self.view_clicked.emit(product)
+                return True
+            if parts["cart"].contains(pos) and self.can_add_to_cart(product):
+                self.add_to_cart_clicked.emit(product)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        product = index.data(ProductListModel.ProductRole)
+        if product is not None and product.get("status") != 'active':
+            if self.card_layout(option.rect)["cart"].contains(event.pos()):
+                QToolTip.showText(event.globalPos(),
+                                  product.get("deactivated_reason") or "Product discontinued", view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
+
+class ProductGridView(QListView):
+    """Wrapping grid of painted product cards; only the visible ones are drawn"""
+
+    view_clicked = Signal(dict)
+    add_to_cart_clicked = Signal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.product_model = ProductListModel(self)
+        self.card_delegate = ProductCardDelegate(self)
+        self.setModel(self.product_model)
+        self.setItemDelegate(self.card_delegate)
+
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(500)
+        self.setSpacing(5)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(40)
+        self.setMouseTracking(True)
+        self.setStyleSheet("QListView { background: transparent; border: none; }")
+
+        self.card_delegate.view_clicked.connect(self.view_clicked)
+        self.card_delegate.add_to_cart_clicked.connect(self.add_to_cart_clicked)
+
+        # Images load in the background: repaint when one arrives, and drop
+        # queued loads for cards that were scrolled past
+        image_loader().image_ready.connect(self.on_image_ready)
+        self.cancel_timer = QTimer(self)
+        self.cancel_timer.setSingleShot(True)
+        self.cancel_timer.setInterval(50)
+        self.cancel_timer.timeout.connect(self.cancel_hidden_images)
+        self.verticalScrollBar().valueChanged.connect(self.cancel_timer.start)
+        self.product_model.modelReset.connect(self.cancel_timer.start)
+
+    def set_products(self, products):
+        self.product_model.set_products(products)
+
+    def update_products(self, products):
+        """Diff-update the shown products (see ProductListModel.update_products)"""
+        return self.product_model.update_products(products)
+
+    def visible_rows(self):
+        """Rows whose card is (at least partly) inside the viewport"""
+        rect = self.viewport().rect()
+        rows = set()
+        # Sample at half a card apart so no card in view is missed, plus the
+        # bottom and right edges for cards showing only a thin strip there
+        ys = list(range(rect.top(), rect.bottom() + 1, CARD_SIZE.height() // 2)) + [rect.bottom()]
+        xs = list(range(rect.left(), rect.right() + 1, CARD_SIZE.width() // 2)) + [rect.right()]
+        for y in ys:
+            for x in xs:
+                index = self.indexAt(QPoint(x, y))
+                if index.isValid():
+                    rows.add(index.row())
+        return rows
+
+    def cancel_hidden_images(self):
+        """Cancel queued image loads for cards no longer in view"""
+        keys = set()
+        for row in self.visible_rows():
+            key = pixmap_cache.key(self.product_model.product(row).get("image", ""), IMAGE_SIZE, IMAGE_SIZE)
+            if key is not None:
+                keys.add(key)
+        image_loader().retain(self, keys)
+
+    def on_image_ready(self, image_path, width, height):
+        if (width, height) == (IMAGE_SIZE, IMAGE_SIZE):
+            self.viewport().update()
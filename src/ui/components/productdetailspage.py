@@ -6,13 +6,17 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QPixmap, QFont
 from PySide6.QtCore import Qt
 import os
-from ...database.database_manager import DatabaseManager
+from ...database.session import sessions
+from ...database.image_store import store_image, is_stored
+from .thumbnails import DETAIL_THUMBNAIL, generate_thumbnails
+from .image_loader import image_loader
 class ProductDetailPage(QWidget):
     def __init__(self, product_data):
-        self.db = DatabaseManager()
         super().__init__()
+        self.db = sessions.acquire(self)
         self.product_data = product_data
         self.edit_mode = False  # Track edit state
+        image_loader().image_ready.connect(self.on_image_ready)
 
         # Set dark theme styling
         self.setStyleSheet("""
@@ -69,6 +73,7 @@ class ProductDetailPage(QWidget):
         self.purchase_price.setValue(float(self.product_data.get("purchase_price", 0)))
         self.selling_price.setValue(float(self.product_data.get("selling_price", 0)))
         self.stock.setValue(int(self.product_data.get("stock", 0)))
+        self.barcode.setText(self.product_data.get("barcode") or "")
         self.variant_id.setText(str(self.product_data.get("variant_id", "N/A")))
         self.status.setText(self.product_data.get("status", "N/A"))
         
@@ -104,12 +109,8 @@ class ProductDetailPage(QWidget):
             }
         """)
         
-        image_path = self.product_data.get("image", "")
-        if image_path and os.path.exists(image_path):
-            pixmap = QPixmap(image_path).scaled(
-                250, 180,
-                Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
+        pixmap = image_loader().pixmap(self.product_data.get("image", ""), *DETAIL_THUMBNAIL, owner=self)
+        if pixmap is not None:
             self.image_label.setPixmap(pixmap)
             self.image_label.setAlignment(Qt.AlignCenter)
         else:
@@ -270,6 +271,8 @@ class ProductDetailPage(QWidget):
         self.stock.setMaximum(999999)  # Set max value
         self.stock.setValue(int(self.product_data.get("stock", 0)))
 
+        self.barcode = QLineEdit(self.product_data.get("barcode") or "")
+        self.barcode.setPlaceholderText("Scan or type a barcode")
         self.variant_id = QLineEdit(str(self.product_data.get("variant_id", "N/A")))
         self.status = QLineEdit(self.product_data.get("status", "N/A"))
 
@@ -299,7 +302,7 @@ class ProductDetailPage(QWidget):
             }
         """
 
-        for field in [self.purchase_price, self.selling_price, self.stock, self.variant_id, self.status]:
+        for field in [self.purchase_price, self.selling_price, self.stock, self.barcode, self.variant_id, self.status]:
             field.setReadOnly(True)
             field.setStyleSheet(readonly_style)
 
@@ -308,6 +311,7 @@ class ProductDetailPage(QWidget):
             ("Purchase Price:", self.purchase_price),
             ("Selling Price:", self.selling_price),
             ("Stock:", self.stock),
+            ("Barcode:", self.barcode),
             ("Variant ID:", self.variant_id),
             ("Status:", self.status)
         ]
@@ -422,7 +426,7 @@ class ProductDetailPage(QWidget):
 
             self.desc.setReadOnly(False)
             self.desc.setStyleSheet(self.desc_edit_style())
-            for field in [self.purchase_price, self.selling_price, self.stock]:
+            for field in [self.purchase_price, self.selling_price, self.stock, self.barcode]:
                 field.setReadOnly(False)
                 field.setStyleSheet(self.edit_style)
 
@@ -461,7 +465,7 @@ class ProductDetailPage(QWidget):
             """)
             self.desc.setReadOnly(True)
             self.desc.setStyleSheet(self.desc_readonly_style())
-            for field in [self.purchase_price, self.selling_price, self.stock]:
+            for field in [self.purchase_price, self.selling_price, self.stock, self.barcode]:
                 field.setReadOnly(True)
                 field.setStyleSheet(readonly_style)
 
@@ -473,10 +477,25 @@ class ProductDetailPage(QWidget):
             self.product_data["purchase_price"] = self.purchase_price.value()
             self.product_data["selling_price"] = self.selling_price.value()
             self.product_data["stock"] = self.stock.value()
+            # A newly chosen image goes into the image store (deduplicated) first
+            if self.product_data.get("image") and not is_stored(self.product_data["image"]):
+                try:
+                    self.product_data["image"] = store_image(self.product_data["image"])
+                    generate_thumbnails(self.product_data["image"])
+                except OSError as e:
+                    print(f"Error copying image: {e}")
             #  save to the database
            
             self.db.save_edited_products( self.product_data["name"],self.product_data["brand"], self.product_data["category"], self.product_data["description"], self.product_data["purchase_price"], self.product_data["selling_price"], self.product_data["stock"], self.product_data["image"], self.product_data["variant_id"])
 
+            if (self.barcode.text().strip() or None) != self.product_data.get("barcode"):
+                success, message = self.db.set_variant_barcode(self.product_data["variant_id"], self.barcode.text())
+                if success:
+                    self.product_data["barcode"] = self.barcode.text().strip() or None
+                else:
+                    QMessageBox.warning(self, "Barcode Not Saved", message)
+                    self.barcode.setText(self.product_data.get("barcode") or "")
+
     def upload_image(self):
         file_path, _ = QFileDialog.getOpenFileName(
         self, "Select Product Image", "", "Images (*.png *.jpg *.jpeg *.bmp)"
@@ -491,13 +510,14 @@ class ProductDetailPage(QWidget):
         self.update_image_display()
         self.remove_button.hide()
 
+    def on_image_ready(self, image_path, width, height):
+        if image_path == self.product_data.get("image", "") and (width, height) == DETAIL_THUMBNAIL:
+            self.update_image_display()
+
     def update_image_display(self):
         """Refresh image in header"""
-        image_path = self.product_data.get("image", "")
-        if image_path and os.path.exists(image_path):
-            pixmap = QPixmap(image_path).scaled(
-                250, 180, Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
+        pixmap = image_loader().pixmap(self.product_data.get("image", ""), *DETAIL_THUMBNAIL, owner=self)
+        if pixmap is not None:
             self.image_label.setPixmap(pixmap)
             self.image_label.setText("")
 
@@ -636,12 +656,15 @@ class ProductDetailPage(QWidget):
        self.refresh_ui()
 
     def handle_add_variant(self, variant_id: int):
-        from ..pages.SalesPage.widget import CartManager
-        cart_manager = CartManager(self)
+        # The Sales page hears about the new cart line from the change bus
         try:
-            cart_manager.add_product_to_cart(variant_id)
+            success, message = self.db.add_to_cart(variant_id)
         except Exception as e:
-            print(f"Error adding to cart: {e}")   
+            success, message = False, f"Error adding to cart: {e}"
+        if success:
+            QMessageBox.information(self, "Added to Cart", message)
+        else:
+            QMessageBox.warning(self, "Add to Cart Failed", message)
 
     def autheticate_before_edits(self):
         auth_dialog = AuthenticationDialog(self.db)
@@ -0,0 +1,113 @@
+"""
+On-disk thumbnail cache for product images
+
+Product photos are often 12 MP camera shots but are shown at 78-250 px. The
+first time an image is needed at a size, it is decoded straight to that size
+with QImageReader (JPEG decodes at a fraction of full resolution) and saved as
+a small PNG under StockManager/images/.thumbs; later loads read the PNG.
+
+Thumbnails are keyed by the image path, its mtime and file size and the
+target size, so replacing a photo on disk makes a new thumbnail (and the old
+one for that path and size is deleted). Everything here works on QImage and
+is safe to call from worker threads; thumbnail_pixmap() is the GUI-thread
+shortcut.
+"""
+
+import os
+from PySide6.QtCore import Qt, QSize, QThreadPool
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from ...database.image_store import thumbnail_dir, thumbnail_key
+
+# Sizes the app shows product images at
+CARD_THUMBNAIL = (150, 150)
+CART_THUMBNAIL = (78, 78)
+DETAIL_THUMBNAIL = (250, 180)
+STANDARD_SIZES = (CARD_THUMBNAIL, CART_THUMBNAIL, DETAIL_THUMBNAIL)
+
+
+def thumbnail_path(image_path, width, height):
+    """Cache file for image_path at width x height, or None if the image is missing"""
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    # Shared with image_store, which deletes a collected image's thumbnails
+    path_key = thumbnail_key(image_path)
+    name = f"{path_key}_{stat.st_mtime_ns:x}_{stat.st_size:x}_{width}x{height}.png"
+    return os.path.join(thumbnail_dir(), path_key[:2], name)
+
+
+def decode_scaled(image_path, width, height):
+    """Decode image_path to fit width x height (never upscaled), None if unreadable"""
+    reader = QImageReader(image_path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > width or size.height() > height):
+        # Let the decoder scale; for JPEG this skips most of the full-size work
+        reader.setScaledSize(size.scaled(QSize(width, height), Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > width or image.height() > height:
+        # Formats that ignore setScaledSize (or report no size up front)
+        image = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+def load_thumbnail(image_path, width, height):
+    """
+    QImage of image_path scaled to fit width x height, from the cache when
+    possible (generated and stored otherwise). None if there is no usable image.
+    """
+    if not image_path:
+        return None
+    cache_path = thumbnail_path(image_path, width, height)
+    if cache_path is None:
+        return None
+
+    if os.path.exists(cache_path):
+        image = QImage(cache_path)
+        if not image.isNull():
+            return image
+
+    image = decode_scaled(image_path, width, height)
+    if image is not None:
+        store_thumbnail(cache_path, image)
+    return image
+
+
+def store_thumbnail(cache_path, image):
+    """Write a thumbnail and drop older ones for the same image and size"""
+    folder, name = os.path.split(cache_path)
+    path_key, size_suffix = name.split("_", 1)[0], name.rsplit("_", 1)[1]
+    try:
+        os.makedirs(folder, exist_ok=True)
+        # Write then rename, so a reader never sees half a file
+        temp_path = f"{cache_path}.{os.getpid()}.{id(image):x}.tmp"
+        if not image.save(temp_path, "PNG"):
+            return
+        os.replace(temp_path, cache_path)
+        for other in os.listdir(folder):
+            if other != name and other.startswith(path_key + "_") and other.endswith("_" + size_suffix):
+                os.remove(os.path.join(folder, other))
+    except OSError as e:
+        # The image is still shown, just not cached
+        print(f"Could not cache thumbnail {cache_path}: {e}")
+
+
+def thumbnail_pixmap(image_path, width, height):
+    """QPixmap thumbnail for widgets (GUI thread only), None for the placeholder"""
+    image = load_thumbnail(image_path, width, height)
+    return QPixmap.fromImage(image) if image is not None else None
+
+
+def generate_thumbnails(image_path, sizes=STANDARD_SIZES):
+    """Fill the cache for image_path at sizes on the global thread pool"""
+    if not image_path:
+        return
+
+    def work():
+        for width, height in sizes:
+            load_thumbnail(image_path, width, height)
+
+    QThreadPool.globalInstance().start(work)
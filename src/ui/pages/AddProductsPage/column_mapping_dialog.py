@@ -0,0 +1,56 @@
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QFormLayout, QComboBox, QLabel, QDialogButtonBox, QMessageBox
+from .tableimport import TABLE_FIELDS, check_columns
+
+FIELD_LABELS = {
+    "name": "Product Name *",
+    "brand": "Brand",
+    "description": "Description",
+    "category": "Category",
+    "purchase_price": "Purchase Price",
+    "selling_price": "Selling Price",
+    "stock": "Stock",
+    "price_string": "Price String (3x1500(4500))",
+}
+
+
+class ColumnMappingDialog(QDialog):
+    """Lets the user choose which spreadsheet column holds each product field"""
+
+    def __init__(self, header, columns, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Map Columns")
+        self.setMinimumWidth(420)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Choose the column for each field (one variant per row):"))
+
+        form = QFormLayout()
+        self.combos = {}
+        for field in TABLE_FIELDS:
+            combo = QComboBox()
+            combo.addItem("(not in file)", None)
+            for index, name in enumerate(header):
+                combo.addItem(name or f"Column {index + 1}", index)
+            if field in columns:
+                combo.setCurrentIndex(columns[field] + 1)
+            form.addRow(FIELD_LABELS[field], combo)
+            self.combos[field] = combo
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def columns(self):
+        """The chosen mapping, {field: column index}"""
+        return {field: combo.currentData() for field, combo in self.combos.items()
+                if combo.currentData() is not None}
+
+    def accept(self):
+        try:
+            check_columns(self.columns())
+        except ValueError as e:
+            QMessageBox.warning(self, "Map Columns", str(e))
+            return
+        super().accept()
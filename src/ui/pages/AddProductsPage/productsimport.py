@@ -2,16 +2,137 @@
 Simple Product Import - Add to AddProductsPage
 """
 
+import codecs
 import json
+import os
 import re
 from PySide6.QtWidgets import QFileDialog, QMessageBox
+from PySide6.QtCore import QThread, Signal
+from ....database.session import sessions
+from ....database.bulk_import import bulk_import, product_key, ImportStats
+from .tableimport import TableSource, TABLE_EXTENSIONS, detect_columns, check_columns, parse_chunks
+
+
+# Accepted keys of a structured category object -> field
+CATEGORY_FIELDS = {
+    "stock": "stock",
+    "Stock": "stock",
+    "purchase_price": "purchase_price",
+    "Purchase Price": "purchase_price",
+    "selling_price": "selling_price",
+    "Selling Price": "selling_price",
+}
+
+
+class InvalidRecord:
+    """Placeholder yielded by JsonRecordStream for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+class JsonRecordStream:
+    """
+    Iterate the records of a JSON array file or an NDJSON file without
+    loading it: the file is read in chunks and decoded one record at a time,
+    so memory depends on the largest record, not on the file size.
+
+    A syntax error inside a JSON array ends the import (raises ValueError);
+    in NDJSON only the bad line is skipped (yielded as InvalidRecord).
+    """
+
+    # A record that does not parse within this many characters is an error
+    MAX_RECORD_SIZE = 16 << 20
+
+    def __init__(self, file_path, chunk_size=1 << 20):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.total_bytes = os.path.getsize(file_path)
+        self.bytes_read = 0
+        self.records = 0
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8-sig')()
+
+        with open(self.file_path, 'rb') as f:
+            buffer = ""
+            pos = 0
+            eof = False
+            in_array = None
+
+            def read_more():
+                nonlocal buffer, pos, eof
+                raw = f.read(self.chunk_size)
+                self.bytes_read += len(raw)
+                eof = not raw
+                # Drop what was already decoded before appending
+                buffer = buffer[pos:] + text.decode(raw, final=eof)
+                pos = 0
+
+            while True:
+                # Skip whitespace (and the commas between array elements)
+                while True:
+                    while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ',')):
+                        pos += 1
+                    if pos < len(buffer) or eof:
+                        break
+                    read_more()
+
+                if pos >= len(buffer):
+                    if in_array:
+                        raise ValueError("Unexpected end of file: the JSON array is not closed")
+                    return
+
+                if in_array is None:
+                    in_array = buffer[pos] == '['
+                    if in_array:
+                        pos += 1
+                    continue
+                if in_array and buffer[pos] == ']':
+                    return
+
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    line_end = buffer.find('\n', pos)
+                    if not eof and (in_array or line_end < 0) and len(buffer) - pos < self.MAX_RECORD_SIZE:
+                        # Record continues in the next chunk
+                        read_more()
+                        continue
+                    self.records += 1
+                    if in_array:
+                        raise ValueError(f"Invalid JSON in record {self.records}: {e.msg}") from e
+                    pos = len(buffer) if line_end < 0 else line_end + 1
+                    yield InvalidRecord(f"Invalid JSON in record {self.records}: {e.msg}")
+                    continue
+
+                if end == len(buffer) and not eof:
+                    # A number or literal may continue in the next chunk; decode it again
+                    read_more()
+                    continue
+
+                pos = end
+                self.records += 1
+                yield record
 
 
 class ProductImporter:
-    """Simple product importer for JSON files"""
+    """Simple product importer for JSON, CSV and XLSX files"""
     
+    # Records written per transaction
+    BATCH_SIZE = 2000
+    # Spreadsheet rows handed to a parser process at a time
+    PARSE_CHUNK_ROWS = 5000
+    # Smaller spreadsheets are parsed in this process. Parsing is ~0.35 s per MB
+    # against ~1 s per MB of writing, and spawning the pool costs ~0.5 s, so
+    # below this the pool saves less than it costs
+    PARALLEL_MIN_BYTES = 8 << 20
+
     def __init__(self, db_manager):
         self.db = db_manager
+        # ImportStats of the last import (rows/sec, failures)
+        self.stats = None
     
     def parse_category_string(self, category_str):
         """
@@ -39,74 +160,298 @@ class ProductImporter:
         
         return None
     
-    def import_from_json(self, file_path):
-        """Import products from JSON file"""
+    def parse_category_dict(self, values, strict=True):
+        """
+        Read a structured category like {"stock": 5, "purchase_price": 141250,
+        "selling_price": 150000} (or the "Stock" / "Purchase Price" /
+        "Selling Price" spelling). Returns (stock, purchase_price, selling_price),
+        raises ValueError if a field is missing or not a number.
+
+        With strict=False unknown keys are ignored instead of rejected (used
+        for the top-level prices of an uncategorized product).
+        """
+        fields = {}
+        for key, value in values.items():
+            field = CATEGORY_FIELDS.get(key)
+            if field is None:
+                if strict:
+                    raise ValueError(f"unknown field '{key}'")
+                continue
+            fields[field] = value
+
+        parsed = []
+        for field in ("stock", "purchase_price", "selling_price"):
+            value = fields.get(field, 0 if field == "stock" else None)
+            # bool is an int subclass; true/false is never a price
+            if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} must be a number, got {value!r}")
+            if value < 0:
+                raise ValueError(f"{field} cannot be negative")
+            if field == "stock":
+                if value != int(value):
+                    raise ValueError(f"stock must be a whole number, got {value!r}")
+                value = int(value)
+            parsed.append(value)
+        return tuple(parsed)
+
+    def text_field(self, product, key, default):
+        """product[key] as a string (default if absent or null), ValueError if it is not text"""
+        value = product.get(key)
+        if value is None:
+            return default
+        if not isinstance(value, str):
+            raise ValueError(f"{key} must be text, got {repr(value)[:40]}")
+        return value
+
+    def product_variants(self, product):
+        """
+        (category, purchase, selling, stock) tuples for one JSON product.
+
+        Each category value is detected on its own: a dict goes through
+        parse_category_dict, a legacy "3x1500(4500)" string through the regex
+        parser. Raises ValueError for an invalid structured category.
+        """
+        categories = product.get('Categories', {})
+
+        # Check if categories exist
+        if not categories or len(categories) == 0:
+            # Save as uncategorized, with the top-level prices if given
+            if any(key in CATEGORY_FIELDS for key in product):
+                stock, purchase, selling = self.parse_category_dict(product, strict=False)
+                return [("Uncategorized", purchase, selling, stock)]
+            return [("Uncategorized", 0, 0, 0)]
+
+        if not isinstance(categories, dict):
+            raise ValueError("Categories must be an object")
+
+        variants = []
+        for cat_name, cat_value in categories.items():
+            if isinstance(cat_value, dict):
+                if not cat_value:
+                    continue  # Empty category, skip
+                try:
+                    stock, purchase, selling = self.parse_category_dict(cat_value)
+                except ValueError as e:
+                    raise ValueError(f"category '{cat_name}': {e}") from None
+                variants.append((cat_name, purchase, selling, stock))
+                continue
+
+            if cat_value is not None and not isinstance(cat_value, str):
+                raise ValueError(f"category '{cat_name}': expected an object or a string")
+            parsed = self.parse_category_string(cat_value)
+            if parsed:
+                stock, purchase, selling = parsed
+                variants.append((cat_name, purchase, selling, stock))
+            else:
+                # If can't parse, save with 0 values
+                variants.append((cat_name, 0, 0, 0))
+
+        if not variants:
+            return [("Uncategorized", 0, 0, 0)]
+        return variants
+
+    def import_from_json(self, file_path, progress=None, should_stop=None, merge=False):
+        """
+        Import products from a JSON array or NDJSON file.
+
+        Records are streamed and written BATCH_SIZE at a time, each batch one
+        transaction, so memory stays flat for any file size and the till can
+        still write between batches. progress(records, bytes_read, total_bytes)
+        is called after every batch; should_stop() is checked before each one.
+        With merge=True products already in the catalog (same name and brand)
+        get the new prices and added stock instead of being duplicated.
+        """
+        try:
+            stream = JsonRecordStream(file_path)
+        except Exception as e:
+            return False, 0, 0, [f"Failed to read file: {str(e)}"]
+
+        self.stats = ImportStats()
+        records = 0
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            imported = 0
-            failed = 0
-            errors = []
-            
-            for product in data:
+            # Own connection with the fast import profile
+            with sessions.session(db_name=self.db.db_name, profile="fast_bulk_import") as db:
+                batch = []
+                for record in stream:
+                    batch.append(record)
+                    if len(batch) >= self.BATCH_SIZE:
+                        if should_stop and should_stop():
+                            self.stats.fail("Import cancelled")
+                            break
+                        self.import_batch(db, batch, merge)
+                        records += len(batch)
+                        batch = []
+                        if progress:
+                            progress(records, stream.bytes_read, stream.total_bytes)
+                else:
+                    if batch:
+                        self.import_batch(db, batch, merge)
+                        records += len(batch)
+                    if progress:
+                        progress(records, stream.bytes_read, stream.total_bytes)
+
+        except Exception as e:
+            self.stats.finish()
+            if self.stats.products == 0 and self.stats.updated == 0:
+                return False, 0, 0, [f"Failed to read file: {str(e)}"]
+            # Earlier batches are committed; say where it stopped
+            self.stats.fail(f"Import stopped after {records} records: {str(e)}")
+
+        print(f"Imported {file_path}: {self.stats.summary()}")
+        return True, self.stats.imported, self.stats.failed, self.stats.errors
+
+    def import_file(self, file_path, columns=None, **options):
+        """import_from_table for .csv / .xlsx files, import_from_json otherwise"""
+        if os.path.splitext(file_path)[1].lower() in TABLE_EXTENSIONS:
+            return self.import_from_table(file_path, columns, **options)
+        return self.import_from_json(file_path, **options)
+
+    def import_from_table(self, file_path, columns=None, progress=None, should_stop=None,
+                          merge=False, workers=None):
+        """
+        Import products from a CSV or XLSX file, one variant per row.
+
+        columns maps fields (see tableimport.TABLE_FIELDS) to column indexes,
+        detected from the header row if not given. Rows are parsed in a pool
+        of worker processes (os.cpu_count() - 1 by default) and written here
+        BATCH_SIZE products per transaction; progress and should_stop work as
+        in import_from_json. Rows with the same name and brand (compared like
+        merge mode does) become one product wherever they are in the sheet.
+        Returns (success, imported, failed, errors).
+        """
+        table = None
+        try:
+            table = TableSource(file_path)
+            if columns is None:
+                columns = detect_columns(table.header)
+            check_columns(columns)
+        except Exception as e:
+            if table is not None:
+                table.close()
+            return False, 0, 0, [f"Failed to read file: {str(e)}"]
+
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 1) - 1)
+        if os.path.getsize(file_path) < self.PARALLEL_MIN_BYTES:
+            workers = 1
+
+        self.stats = ImportStats()
+        try:
+            with table, sessions.session(db_name=self.db.db_name, profile="fast_bulk_import") as db:
+                # product_key -> [name, description, brand, variants] of this batch;
+                # rows of one product need not be adjacent
+                products = {}
+                # product_key -> id of the products earlier batches added, so a
+                # product listed again further down gets its variants instead of
+                # a duplicate (merge mode finds them in the catalog anyway)
+                written = None if merge else {}
+                for records, errors in parse_chunks(table.chunks(self.PARSE_CHUNK_ROWS), columns, workers):
+                    for error in errors:
+                        self.stats.fail(error)
+                    for name, brand, description, category, purchase, selling, stock in records:
+                        key = product_key(name, brand)
+                        if key in products:
+                            products[key][3].append((category, purchase, selling, stock))
+                            continue
+                        if len(products) >= self.BATCH_SIZE:
+                            if should_stop and should_stop():
+                                self.stats.fail("Import cancelled")
+                                return True, self.stats.imported, self.stats.failed, self.stats.errors
+                            self.write_products(db, products.values(), merge, written)
+                            products = {}
+                            if progress:
+                                progress(table.rows_read, table.position, table.total)
+                        products[key] = [name, description, brand, [(category, purchase, selling, stock)]]
+
+                self.write_products(db, products.values(), merge, written)
+                if progress:
+                    progress(table.rows_read, table.total, table.total)
+
+        except Exception as e:
+            self.stats.finish()
+            if self.stats.products == 0 and self.stats.updated == 0:
+                return False, 0, 0, [f"Failed to read file: {str(e)}"]
+            self.stats.fail(f"Import stopped after row {table.rows_read + 1}: {str(e)}")
+
+        print(f"Imported {file_path}: {self.stats.summary()}")
+        return True, self.stats.imported, self.stats.failed, self.stats.errors
+
+    def write_products(self, db, products, merge=False, written=None):
+        """
+        Write parsed [name, description, brand, variants] products in one transaction.
+
+        written maps product_key to the ids of products added earlier in this
+        import: those get the new variants added, and new products are recorded.
+        """
+        with bulk_import(db, stats=self.stats, merge=merge) as writer:
+            for name, description, brand, variants in products:
                 try:
-                    name = product.get('Name', '').strip()
-                    if not name:
-                        failed += 1
-                        errors.append(f"Missing name for product")
+                    if written is None:
+                        writer.add_product(name, description, brand, variants)
                         continue
-                    
-                    brand = product.get('Brand', 'Local')
-                    description = product.get('Description', '')
-                    categories = product.get('Categories', {})
-                    
-                    # Save base product
-                    product_id = self.db.save_base_product(name, description, brand)
-                    
-                    # Check if categories exist
-                    if not categories or len(categories) == 0:
-                        # Save as uncategorized
-                        self.db.save_product_variant(
-                            product_id=product_id,
-                            category_name="Uncategorized",
-                            purchase_price=0,
-                            selling_price=0,
-                            stock_quantity=0
-                        )
+                    key = product_key(name, brand)
+                    if key in written:
+                        writer.add_variants(written[key], name, variants)
                     else:
-                        # Save each category
-                        for cat_name, cat_value in categories.items():
-                            parsed = self.parse_category_string(cat_value)
-                            if parsed:
-                                stock, purchase, selling = parsed
-                                self.db.save_product_variant(
-                                    product_id=product_id,
-                                    category_name=cat_name,
-                                    purchase_price=purchase,
-                                    selling_price=selling,
-                                    stock_quantity=stock
-                                )
-                            else:
-                                # If can't parse, save with 0 values
-                                self.db.save_product_variant(
-                                    product_id=product_id,
-                                    category_name=cat_name,
-                                    purchase_price=0,
-                                    selling_price=0,
-                                    stock_quantity=0
-                                )
-                    
-                    imported += 1
-                    
+                        written[key] = writer.add_product(name, description, brand, variants)
+                except Exception as e:
+                    writer.stats.fail(f"{name}: {str(e)}")
+
+    def import_batch(self, db, records, merge=False):
+        """Write one batch of JSON records in a single transaction"""
+        with bulk_import(db, stats=self.stats, merge=merge) as writer:
+            for product in records:
+                name = ''
+                try:
+                    if isinstance(product, InvalidRecord):
+                        writer.stats.fail(product.message)
+                        continue
+
+                    if not isinstance(product, dict):
+                        writer.stats.fail(f"Skipped {str(product)[:40]}: not a JSON object")
+                        continue
+
+                    name = self.text_field(product, 'Name', '').strip()
+                    if not name:
+                        writer.stats.fail(f"Missing name for product")
+                        continue
+
+                    writer.add_product(
+                        name,
+                        self.text_field(product, 'Description', ''),
+                        self.text_field(product, 'Brand', 'Local'),
+                        self.product_variants(product)
+                    )
                 except Exception as e:
-                    failed += 1
-                    errors.append(f"{name}: {str(e)}")
-            
-            return True, imported, failed, errors
-            
+                    writer.stats.fail(f"{name or 'Skipped product'}: {str(e)}")
+
+
+class ProductImportThread(QThread):
+    """Runs ProductImporter.import_file off the GUI thread"""
+
+    # records read, position, total (bytes, or rows for XLSX; object: files can be over 2 GB)
+    progress = Signal(int, object, object)
+    import_finished = Signal(bool, int, int, list)
+
+    def __init__(self, db_manager, file_path, merge=False, columns=None, parent=None):
+        super().__init__(parent)
+        self.importer = ProductImporter(db_manager)
+        self.file_path = file_path
+        self.merge = merge
+        self.columns = columns
+
+    def run(self):
+        try:
+            result = self.importer.import_file(
+                self.file_path,
+                self.columns,
+                progress=self.progress.emit,
+                should_stop=self.isInterruptionRequested,
+                merge=self.merge
+            )
         except Exception as e:
-            return False, 0, 0, [f"Failed to read file: {str(e)}"]
+            result = (False, 0, 0, [f"Import failed: {str(e)}"])
+        self.import_finished.emit(*result)
 
 
 
@@ -156,14 +501,26 @@ FORMAT 2: Pre-parsed format (clean, already structured)
   }
 ]
 
+The "Stock" / "Purchase Price" / "Selling Price" keys work too. Category
+objects are validated: prices are required and must be numbers, stock is an
+optional whole number, unknown keys are rejected. A product with an invalid
+category is reported and skipped.
+
 FORMAT 3: No categories (saves as "Uncategorized")
 [
   {
     "Name": "Simple Phone",
     "Brand": "Local",
     "Description": "Basic phone with no variants"
+  },
+  {
+    "Name": "Samsung A32 Battery",
+    "Brand": "Samsung",
+    "Purchase Price": 1500,
+    "Selling Price": 2300,
+    "Stock": 4
   }
 ]
 
-All three formats work! Mix and match in the same file if you want.
+All three formats work! Mix and match in the same file, even in one product.
 """
\ No newline at end of file
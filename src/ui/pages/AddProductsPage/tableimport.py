@@ -0,0 +1,206 @@
+"""
+CSV / XLSX catalog sources for ProductImporter
+
+A spreadsheet has one variant per row; rows with the same name and brand
+are one product. Which column holds what is a column mapping
+(field -> column index), detected from the header row and adjustable in the
+import dialog. Rows are read in chunks and parsed / validated by
+parse_table_rows, in a process pool for large files, while a single writer
+inserts the results in batches.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import openpyxl
+except ImportError:  # Optional: only needed for .xlsx files
+    openpyxl = None
+
+TABLE_EXTENSIONS = (".csv", ".xlsx")
+
+# Mappable fields and the header names they are detected from (lowercase)
+TABLE_FIELDS = {
+    "name": ("name", "product", "product name", "model"),
+    "brand": ("brand", "make", "manufacturer"),
+    "description": ("description", "details"),
+    "category": ("category", "variant", "categories"),
+    "purchase_price": ("purchase price", "purchase_price", "cost", "cost price"),
+    "selling_price": ("selling price", "selling_price", "price", "sale price", "retail price"),
+    "stock": ("stock", "qty", "quantity", "stock quantity"),
+    # Legacy "3x1500(4500)" cell, used when the price columns are not mapped
+    "price_string": ("price string", "stock x price", "rate"),
+}
+
+
+def detect_columns(header):
+    """Column mapping guessed from the header row: {field: column index}"""
+    names = [str(cell or "").strip().lower() for cell in header]
+    columns = {}
+    for field, aliases in TABLE_FIELDS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    return columns
+
+
+def check_columns(columns):
+    """Raise ValueError if the mapping cannot produce products"""
+    if "name" not in columns:
+        raise ValueError("No column is mapped to the product name")
+    has_prices = "purchase_price" in columns and "selling_price" in columns
+    if not has_prices and "price_string" not in columns:
+        raise ValueError("Map both price columns, or a price string column like 3x1500(4500)")
+
+
+class TableSource:
+    """Header and row chunks of a CSV or XLSX file; use as a context manager"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.extension = os.path.splitext(file_path)[1].lower()
+        self.rows_read = 0
+
+        if self.extension == ".csv":
+            self.file = open(file_path, "rb")
+            self.total = os.path.getsize(file_path)
+            text = io.TextIOWrapper(self.file, encoding="utf-8-sig", newline="")
+            sample = text.read(64 * 1024)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            self.rows = csv.reader(text, dialect)
+        elif self.extension == ".xlsx":
+            if openpyxl is None:
+                raise ValueError("Reading .xlsx files needs the openpyxl package (pip install openpyxl)")
+            self.file = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            sheet = self.file.active
+            self.total = sheet.max_row or 0
+            self.rows = sheet.iter_rows(values_only=True)
+        else:
+            raise ValueError(f"Unsupported file type: {self.extension}")
+
+        self.header = [str(cell).strip() if cell is not None else "" for cell in next(self.rows, [])]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def position(self):
+        """Progress through the file in the unit of total (bytes for CSV, rows for XLSX)"""
+        if self.extension == ".csv":
+            return self.file.tell()
+        return self.rows_read + 1
+
+    def chunks(self, size):
+        """Yield (first row number, list of rows); row numbers as the user sees them"""
+        chunk = []
+        first_row = 2  # Row 1 is the header
+        for row in self.rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                self.rows_read += len(chunk)
+                yield first_row, chunk
+                first_row += len(chunk)
+                chunk = []
+        if chunk:
+            self.rows_read += len(chunk)
+            yield first_row, chunk
+
+
+def _number(value):
+    """Spreadsheet cell as a number, None if blank"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace(",", "")
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a number") from None
+    return int(number) if number.is_integer() else number
+
+
+def parse_table_rows(first_row, rows, columns):
+    """
+    Parse and validate a chunk of spreadsheet rows (runs in a worker process).
+
+    Returns (records, errors): records are (name, brand, description,
+    category, purchase, selling, stock) tuples, errors "Row N: ..." messages.
+    """
+    # Imported here: worker processes only need it once they parse
+    from .productsimport import ProductImporter
+    importer = ProductImporter(None)
+
+    def cell(row, field):
+        index = columns.get(field)
+        if index is None or index >= len(row) or row[index] is None:
+            return ""
+        return str(row[index]).strip()
+
+    records = []
+    errors = []
+    for row_number, row in enumerate(rows, first_row):
+        if not any(value not in (None, "") for value in row):
+            continue  # Blank line
+        name = cell(row, "name")
+        try:
+            if not name:
+                raise ValueError("missing name")
+
+            values = {}
+            for field in ("purchase_price", "selling_price", "stock"):
+                if field in columns:
+                    number = _number(row[columns[field]] if columns[field] < len(row) else None)
+                    if number is not None:
+                        values[field] = number
+            if "purchase_price" not in values or "selling_price" not in values:
+                price_string = cell(row, "price_string")
+                parsed = importer.parse_category_string(price_string)
+                if parsed is None:
+                    raise ValueError("missing prices")
+                values = dict(zip(("stock", "purchase_price", "selling_price"), parsed))
+
+            stock, purchase, selling = importer.parse_category_dict(values)
+            records.append((name, cell(row, "brand") or "Local", cell(row, "description"),
+                            cell(row, "category") or "Uncategorized", purchase, selling, stock))
+        except ValueError as e:
+            errors.append(f"Row {row_number}{f' ({name})' if name else ''}: {e}")
+    return records, errors
+
+
+def parse_chunks(chunks, columns, workers):
+    """
+    parse_table_rows over (first_row, rows) chunks, results in file order.
+
+    With more than one worker the chunks are parsed in a process pool; at most
+    two chunks per worker are in flight, so memory stays bounded.
+    """
+    if workers <= 1:
+        for first_row, rows in chunks:
+            yield parse_table_rows(first_row, rows, columns)
+        return
+
+    # spawn, not Linux's default fork: forking this threaded Qt process can
+    # copy locks other threads held into the children and deadlock them
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = []
+        for first_row, rows in chunks:
+            pending.append(pool.submit(parse_table_rows, first_row, rows, columns))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
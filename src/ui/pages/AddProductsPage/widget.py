@@ -2,19 +2,23 @@ from PySide6.QtWidgets import (
     QMainWindow, QVBoxLayout, QGroupBox, QLabel,
     QLineEdit, QPushButton, QWidget, QSpinBox, QDoubleSpinBox, QFileDialog, QMessageBox,QHBoxLayout, QSpacerItem, QSizePolicy
 )
-from .productsimport import ProductImporter
+from .productsimport import ProductImportThread
+from .tableimport import TableSource, TABLE_EXTENSIONS, detect_columns
+from .column_mapping_dialog import ColumnMappingDialog
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QCursor
 from .ProductsFormPage_ui import Ui_MainWindow
-from ....database.database_manager import DatabaseManager
+from ....database.session import sessions
+from ....database.image_store import store_image
+from ...components.thumbnails import generate_thumbnails
 import os
-import shutil
 
 
 class AddProductsPage(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super().__init__()
         self.setupUi(self)
+        self.db = sessions.acquire(self)
 
         # Container layout for all categories
         self.categories_layout = self.verticalLayout_4
@@ -34,6 +38,7 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
         self.saveproductbtn.clicked.connect(self.handle_save_product)
 
         # ADD THIS LINE - Setup import button at bottom
+        self.import_thread = None
         self.setup_import_button()
     def setup_import_button(self):
         """Add import button at the bottom"""
@@ -41,7 +46,7 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
         from PySide6.QtCore import Qt
 
         # Create import button
-        self.import_json_btn = QPushButton("Import Products (JSON)")
+        self.import_json_btn = QPushButton("Import Products (JSON / CSV / XLSX)")
         self.import_json_btn.setObjectName("import_btn")
         self.import_json_btn.setCursor(QCursor(Qt.PointingHandCursor))
         self.import_json_btn.setStyleSheet("""
@@ -65,33 +70,103 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
         self.verticalLayout_2.insertWidget(index + 1, self.import_json_btn, 0, Qt.AlignHCenter)
 
     def import_products(self):
-        """Import products from JSON file"""
+        """Import products from a JSON, NDJSON, CSV or XLSX file on a worker thread"""
         file_name, _ = QFileDialog.getOpenFileName(
             self,
-            "Select JSON File",
+            "Select Product File",
             "",
-            "JSON Files (*.json)"
+            "Product Files (*.json *.ndjson *.jsonl *.csv *.xlsx);;"
+            "JSON Files (*.json *.ndjson *.jsonl);;Spreadsheets (*.csv *.xlsx)"
         )
 
         if not file_name:
             return
 
-        # Create importer
-        from .productsimport import ProductImporter
-        importer = ProductImporter(DatabaseManager())
+        columns = None
+        if os.path.splitext(file_name)[1].lower() in TABLE_EXTENSIONS:
+            columns = self.ask_column_mapping(file_name)
+            if columns is None:
+                return
 
-        # Import
-        success, imported, failed, errors = importer.import_from_json(file_name)
+        merge = self.ask_import_mode()
+        if merge is None:
+            return
+
+        # Large catalogs take minutes; keep the window responsive
+        self.import_thread = ProductImportThread(self.db, file_name, merge, columns, self)
+        self.import_thread.progress.connect(self.on_import_progress)
+        self.import_thread.import_finished.connect(self.on_import_finished)
+        self.import_json_btn.setEnabled(False)
+        self.import_json_btn.setText("Importing...")
+        self.import_thread.start()
+
+    def ask_column_mapping(self, file_name):
+        """Column mapping for a spreadsheet, confirmed by the user; None if cancelled"""
+        try:
+            with TableSource(file_name) as table:
+                header = table.header
+        except Exception as e:
+            QMessageBox.critical(self, "Import Failed", f"Failed to read file: {str(e)}")
+            return None
+
+        dialog = ColumnMappingDialog(header, detect_columns(header), self)
+        if dialog.exec() != ColumnMappingDialog.Accepted:
+            return None
+        return dialog.columns()
+
+    def ask_import_mode(self):
+        """True to merge with the catalog, False to add everything as new, None if cancelled"""
+        box = QMessageBox(self)
+        box.setWindowTitle("Import Mode")
+        box.setText("Products that are already in the catalog (same name and brand):")
+        box.setInformativeText("Merge updates their prices and adds the imported stock.\n"
+                               "Add as New creates duplicate products.")
+        merge_btn = box.addButton("Merge", QMessageBox.AcceptRole)
+        append_btn = box.addButton("Add as New", QMessageBox.DestructiveRole)
+        box.addButton(QMessageBox.Cancel)
+        box.setDefaultButton(merge_btn)
+        box.exec()
+
+        if box.clickedButton() is merge_btn:
+            return True
+        if box.clickedButton() is append_btn:
+            return False
+        return None
+
+    def on_import_progress(self, records, bytes_read, total_bytes):
+        percent = int(bytes_read * 100 / total_bytes) if total_bytes else 100
+        self.import_json_btn.setText(f"Importing... {percent}% ({records:,} records)")
+
+    def on_import_finished(self, success, imported, failed, errors):
+        importer = self.import_thread.importer
+        merge = self.import_thread.merge
+        self.import_thread.wait()
+        self.import_thread.deleteLater()
+        self.import_thread = None
+        self.import_json_btn.setEnabled(True)
+        self.import_json_btn.setText("Import Products (JSON / CSV / XLSX)")
 
         # Show results
         if success:
             msg = f"Import Complete!\n\nImported: {imported}\nFailed: {failed}"
+            if merge:
+                stats = importer.stats
+                msg += (f"\n\nVariants inserted: {stats.variants}\nVariants updated: {stats.updated}"
+                        f"\nVariants unchanged: {stats.unchanged}")
+            msg += f"\nSpeed: {importer.stats.rows_per_second:,.0f} rows/sec ({importer.stats.seconds:.1f} s)"
             if errors and len(errors) > 0:
                 msg += f"\n\nFirst few errors:\n" + "\n".join(errors[:5])
             QMessageBox.information(self, "Import Complete", msg)
             self.clear_form()  # Clear form after successful import
         else:
             QMessageBox.critical(self, "Import Failed", "\n".join(errors))
+
+    def stop_import(self):
+        """Stop a running import after its current batch and wait for the thread (committed batches stay imported)"""
+        if self.import_thread is not None:
+            self.import_thread.requestInterruption()
+            self.import_thread.wait()
+
     def add_category(self):
         """Add a new category section dynamically"""
         # Hide general fields (stock & price) only once
@@ -224,24 +299,15 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
         remove_btn.hide()
 
     def copy_image_to_database(self, source_path):
-        """Copy image to persistent images directory and return new path"""
+        """Add image to the persistent image store and return its stored path"""
         if not source_path or source_path == "No Image Uploaded":
             return None
 
         try:
-            # Use AppData (Windows) or ~/.local/share (Linux/macOS)
-            appdata_dir = os.getenv("APPDATA") or os.path.expanduser("~/.local/share")
-
-            # Make a subfolder for your app images
-            images_dir = os.path.join(appdata_dir, "StockManager", "images")
-            os.makedirs(images_dir, exist_ok=True)
-
-            # Get filename and create new path
-            image_filename = os.path.basename(source_path)
-            new_image_path = os.path.join(images_dir, image_filename)
-
-            # Copy the file
-            shutil.copy(source_path, new_image_path)
+            # Content-addressed: an image already in the store is not copied again
+            new_image_path = store_image(source_path)
+            # Thumbnails ready before the product first shows up in the grid
+            generate_thumbnails(new_image_path)
 
             return new_image_path
         except Exception as e:
@@ -307,20 +373,22 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
     
         # Save to database using split approach
         try:
-            db = DatabaseManager()
+            db = self.db
             
-            # Step 1: Save base product
-            product_id = db.save_base_product(name, description, brand)
-            
-            # Step 2: Save as "Uncategorized" variant
-            db.save_product_variant(
-                product_id=product_id,
-                category_name="Uncategorized",
-                purchase_price=purchase_price,
-                selling_price=selling_price,
-                stock_quantity=stock_quantity,
-                image_path=image_path
-            )
+            # One transaction: the product and its variant are saved together
+            with db.transaction():
+                # Step 1: Save base product
+                product_id = db.save_base_product(name, description, brand)
+                
+                # Step 2: Save as "Uncategorized" variant
+                db.save_product_variant(
+                    product_id=product_id,
+                    category_name="Uncategorized",
+                    purchase_price=purchase_price,
+                    selling_price=selling_price,
+                    stock_quantity=stock_quantity,
+                    image_path=image_path
+                )
             
             QMessageBox.information(self, "Success", f"Product '{name}' saved successfully!")
             self.clear_form()
@@ -334,41 +402,48 @@ class AddProductsPage(QMainWindow, Ui_MainWindow):
             QMessageBox.warning(self, "Error", "No categories found!")
             return
     
-        db = DatabaseManager()
+        # Validate every category before writing anything
+        categories = []
+        for group in category_groups:
+            category_data = self.extract_category_data(group)
+
+            if not category_data:
+                continue
+
+            if not self.validate_category_data(category_data):
+                return
+
+            categories.append(category_data)
+
+        # Store the images (hashing, copying, thumbnails) before taking the write lock
+        for category_data in categories:
+            category_data['image_path'] = self.copy_image_to_database(category_data['original_image_path'])
+
+        db = self.db
     
         try:
-            # STEP 1: Save the base product ONCE
-            product_id = db.save_base_product(name, description, brand)
-            
-            # STEP 2: Save each category as a variant of the same product
-            for group in category_groups:
-                category_data = self.extract_category_data(group)
-    
-                if not category_data:
-                    continue
+            # One transaction: either the product and all variants are saved or nothing is
+            with db.transaction():
+                # STEP 1: Save the base product ONCE
+                product_id = db.save_base_product(name, description, brand)
                 
-                if not self.validate_category_data(category_data):
-                    return
-    
-                # Copy image to database directory
-                image_path = self.copy_image_to_database(category_data['original_image_path'])
-    
-                # Save this category as a variant of the same product
-                db.save_product_variant(
-                    product_id=product_id,
-                    category_name=category_data['category_name'],
-                    purchase_price=category_data['purchase_price'],
-                    selling_price=category_data['selling_price'],
-                    stock_quantity=category_data['stock_quantity'],
-                    image_path=image_path
-                )
+                # STEP 2: Save each category as a variant of the same product
+                for category_data in categories:
+                    # Save this category as a variant of the same product
+                    db.save_product_variant(
+                        product_id=product_id,
+                        category_name=category_data['category_name'],
+                        purchase_price=category_data['purchase_price'],
+                        selling_price=category_data['selling_price'],
+                        stock_quantity=category_data['stock_quantity'],
+                        image_path=category_data['image_path']
+                    )
     
             QMessageBox.information(self, "Success", f"Product '{name}' with categories saved successfully!")
             self.clear_form()
     
         except Exception as e:
             QMessageBox.critical(self, "Database Error", f"Failed to save product: {str(e)}")
-            # Note: No need for rollback here since each function commits individually
 
     def extract_category_data(self, group_widget):
         """Extract data from a category group widget"""
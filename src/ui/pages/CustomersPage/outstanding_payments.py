@@ -5,7 +5,7 @@ from PySide6.QtWidgets import (QMainWindow, QVBoxLayout, QWidget, QLabel,
                              QDialogButtonBox, QTextEdit)
 from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QFont
-from ....database.database_manager import DatabaseManager
+from ....database.session import sessions
 import datetime
 
 
@@ -15,7 +15,7 @@ class PaymentDialog(QDialog):
     def __init__(self, customer_data, parent=None):
         super().__init__(parent)
         self.customer_data = customer_data
-        self.db_manager = DatabaseManager()
+        self.db_manager = sessions.acquire(self)
         self.setup_ui()
         
     def setup_ui(self):
@@ -4,7 +4,9 @@ from PySide6.QtWidgets import (QMainWindow, QVBoxLayout, QWidget, QLabel,
                              QProgressBar)
 from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QFont
-from ....database.database_manager import DatabaseManager
+from ....database.query_executor import query_executor
+from ....database.change_bus import change_bus
+from ....database.changes import SALES, PAYMENTS, CUSTOMERS
 from .outstanding_payments import PaymentDialog
 import datetime
 
@@ -12,7 +14,6 @@ import datetime
 class CustomersPage(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.db_manager = DatabaseManager()
         self.setup_ui()
         self.load_customers()
         self.setup_auto_refresh()
@@ -200,28 +201,32 @@ class CustomersPage(QMainWindow):
         parent_layout.addWidget(summary_frame)
         
     def setup_auto_refresh(self):
-        """Setup automatic refresh timer"""
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_data)
-        self.refresh_timer.start(3000)  # Refresh every 8 seconds
+        """Reload when customers, their sales or their payments change"""
+        change_bus().subscribe([SALES, PAYMENTS, CUSTOMERS], self.refresh_data, owner=self)
 
-    def refresh_data(self):
+    def refresh_data(self, changed_tables=None):
         """Refresh data while preserving current filters"""
+        # Current filters are reapplied once the new cards are built
         self.load_customers()
-        # Reapply current filters after loading
-        self.filter_customers()
 
     def load_customers(self):
-        """Load all customers from database and create cards"""
+        """Load all customers from database in the background, then create cards"""
+        # Get customers data with their payment status; old cards stay up meanwhile
+        query_executor().submit(
+            "customers.list",
+            lambda db: db.get_customers_with_payment_status(),
+            on_result=self.show_customers,
+            on_error=lambda error: print(f"Error loading customers: {error}")
+        )
+
+    def show_customers(self, customers_data):
+        """Replace the customer cards with freshly loaded data"""
         # Clear existing cards
         for i in reversed(range(self.customers_layout.count())):
             child = self.customers_layout.itemAt(i).widget()
             if child:
                 child.setParent(None)
         
-        # Get customers data with their payment status
-        customers_data = self.db_manager.get_customers_with_payment_status()
-        
         if not customers_data:
             self.show_empty_state()
         else:
@@ -240,6 +245,8 @@ class CustomersPage(QMainWindow):
                     row += 1
         
         self.update_summary_statistics(customers_data)
+        # Reapply current filters to the new cards
+        self.filter_customers()
         
     def show_empty_state(self):
         """Show empty state when no customers"""
@@ -329,7 +336,6 @@ class CustomerCard(QFrame):
     def __init__(self, customer_data, parent=None):
         super().__init__(parent)
         self.parent_page = parent
-        self.db_manager = DatabaseManager()
         self.customer_data = customer_data
         self.setup_ui()
         
@@ -368,15 +374,9 @@ class CustomerCard(QFrame):
         type_label.setStyleSheet("font-size: 12px; color: white;")
         layout.addWidget(type_label)
     
-        # Get discount and profit from database
-        cursor = self.db_manager.conn.cursor()
-        cursor.execute("""
-            SELECT discount_amount, total_profit FROM sales 
-            WHERE id = ? AND status = 'completed'
-        """, (self.customer_data.get('sale_id'),))
-        sale_result = cursor.fetchone()
-        discount_amount = sale_result[0] if sale_result else 0
-        sale_profit = sale_result[1] if sale_result else 0
+        # Discount and profit come with the sale
+        discount_amount = self.customer_data.get('discount_amount') or 0
+        sale_profit = self.customer_data.get('total_profit') or 0
     
         # Payment summary
         total_purchased = QLabel(f"Total Purchased: PKR {self.customer_data.get('total_amount', 0):,.2f}")
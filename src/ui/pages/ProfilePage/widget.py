@@ -4,14 +4,15 @@ from PySide6.QtWidgets import (QMainWindow, QVBoxLayout, QWidget, QLabel,
                              QProgressBar)
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
-from ....database.database_manager import DatabaseManager
+from ....database.query_executor import query_executor
+from ....database.change_bus import change_bus
+from ....database.changes import PRODUCTS, VARIANTS, SALES, PAYMENTS, CUSTOMERS, COMPANY
 import datetime
 
 
 class DashboardPage(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.db_manager = DatabaseManager()
         self.setup_ui()
         self.load_data()
         self.setup_auto_refresh()
@@ -347,18 +348,22 @@ class DashboardPage(QMainWindow):
         
     def apply_filter(self):
         """Apply the selected filter"""
+        period = self.period_filter.currentText()
+        self.filtered_title.setText(f"{period} Statistics")
+        
+        start_date, end_date = self.get_date_range()
+        
+        # Get filtered stats in the background, keep showing the old values meanwhile
+        query_executor().submit(
+            "dashboard.filtered",
+            lambda db: db.get_filtered_stats(start_date.isoformat(), end_date.isoformat()),
+            on_result=self.show_filtered_stats,
+            on_error=lambda error: print(f"Error applying filter: {error}")
+        )
+    
+    def show_filtered_stats(self, filtered_stats):
+        """Update the filtered cards with stats from apply_filter"""
         try:
-            period = self.period_filter.currentText()
-            self.filtered_title.setText(f"{period} Statistics")
-            
-            start_date, end_date = self.get_date_range()
-            
-            # Get filtered stats
-            filtered_stats = self.db_manager.get_filtered_stats(
-                start_date.isoformat(), 
-                end_date.isoformat()
-            )
-            
             if filtered_stats:
                 sales_count, revenue, profit, customers = filtered_stats
                 
@@ -390,9 +395,16 @@ class DashboardPage(QMainWindow):
     
     def load_inventory_stats(self):
         """Load inventory statistics"""
+        query_executor().submit(
+            "dashboard.inventory",
+            lambda db: db.get_inventory_stats(),
+            on_result=self.show_inventory_stats,
+            on_error=lambda error: print(f"Error loading inventory stats: {error}")
+        )
+    
+    def show_inventory_stats(self, inventory_stats):
+        """Update the inventory cards with stats from load_inventory_stats"""
         try:
-            inventory_stats = self.db_manager.get_inventory_stats()
-            
             if inventory_stats:
                 total_items, total_budget, expected_revenue, potential_profit = inventory_stats
                 
@@ -424,16 +436,33 @@ class DashboardPage(QMainWindow):
         
     def load_data(self):
         """Load all dashboard data"""
+        # Load company name and overall stats (always visible)
+        self.load_overall_stats()
+        
+        # Load inventory stats
+        self.load_inventory_stats()
+        
+        # Load filtered data
+        self.apply_filter()
+    
+    def load_overall_stats(self):
+        """Load company name and overall statistics"""
+        query_executor().submit(
+            "dashboard.overall",
+            lambda db: (db.get_company_name(), db.get_overall_stats()),
+            on_result=self.show_overall_stats,
+            on_error=self.show_load_error
+        )
+    
+    def show_overall_stats(self, result):
+        """Update the header and overall cards with data from load_data"""
         try:
-            # Load company name
-            company_name = self.db_manager.get_company_name()
+            company_name, overall_stats = result
             if company_name:
                 self.company_name_label.setText(company_name)
             else:
                 self.company_name_label.setText("Your Business")
                 
-            # Load overall stats (always visible)
-            overall_stats = self.db_manager.get_overall_stats()
             if overall_stats:
                 total_sales, total_profit, total_customers, pending_payments = overall_stats
                 
@@ -460,22 +489,23 @@ class DashboardPage(QMainWindow):
                 self.total_customers_card.findChild(QLabel, "value_label").setText("0")
                 self.pending_payments_card.findChild(QLabel, "value_label").setText("PKR 0")
             
-            # Load inventory stats
-            self.load_inventory_stats()
-            
-            # Load filtered data
-            self.apply_filter()
-            
         except Exception as e:
-            print(f"Error loading data: {e}")
-            # Set default values on error
-            self.company_name_label.setText("Your Business")
+            self.show_load_error(e)
+    
+    def show_load_error(self, error):
+        print(f"Error loading data: {error}")
+        # Set default values on error
+        self.company_name_label.setText("Your Business")
         
     def setup_auto_refresh(self):
-        """Setup auto refresh every 5 seconds"""
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.load_data)
-        self.refresh_timer.start(5000)  # 5 seconds
+        """Refresh only the cards whose tables changed"""
+        change_bus().subscribe([PRODUCTS, VARIANTS], lambda changed: self.load_inventory_stats(), owner=self)
+        change_bus().subscribe([SALES, PAYMENTS, CUSTOMERS, COMPANY], self.on_sales_changed, owner=self)
+    
+    def on_sales_changed(self, changed_tables):
+        """Sales, payments or customers changed"""
+        self.load_overall_stats()
+        self.apply_filter()
 
     def refresh_data(self):
         """Manual refresh method"""
@@ -2,7 +2,10 @@ from PySide6.QtWidgets import QMainWindow, QVBoxLayout, QWidget, QLabel, QPushBu
 from PySide6.QtCore import Qt, QTimer, Signal
 from ....ui.components.cartitem import CartItemWidget
 from .SalesPage_ui import Ui_MainWindow
-from ....database.database_manager import DatabaseManager
+from ....database.session import sessions
+from ....database.query_executor import query_executor
+from ....database.change_bus import change_bus
+from ....database.changes import CART, VARIANTS
 
 
 class SalesPage(QMainWindow, Ui_MainWindow):
@@ -32,27 +35,33 @@ class CartManager(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.db_manager = DatabaseManager()
+        self.db_manager = sessions.acquire(self)
+        self.displayed_cart_items = None
         self.setup_ui()
         self.setup_auto_refresh()
         self.refresh_cart()
         
     def setup_auto_refresh(self):
-        """Setup automatic refresh timer"""
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.check_for_updates)
-        self.refresh_timer.start(2000)  # Check every 2 seconds
+        """Refresh whenever the cart (or the stock shown in it) changes"""
+        change_bus().subscribe([CART, VARIANTS], self.check_for_updates, owner=self)
         self.last_cart_count = 0
         
-    def check_for_updates(self):
+    def check_for_updates(self, changed_tables=None):
         """Check if cart has been updated from other pages"""
-        cart_items = self.db_manager.get_cart_items()
-        current_count = len(cart_items) if cart_items else 0
+        # Keyed per instance: submit() cancels older requests with the same key
+        query_executor().submit(
+            f"cart.items.{id(self)}",
+            lambda db: db.get_cart_items(),
+            on_result=self.on_cart_polled,
+            on_error=lambda error: print(f"Error checking cart: {error}")
+        )
         
-        # If cart count changed, refresh the display
-        if current_count != self.last_cart_count:
-            self.refresh_cart()
-            self.last_cart_count = current_count
+    def on_cart_polled(self, cart_items):
+        """Compare the fetched cart with what is on screen"""
+        # Our own changes were already drawn by refresh_cart
+        if cart_items != self.displayed_cart_items:
+            self.show_cart_items(cart_items)
+        self.last_cart_count = len(cart_items) if cart_items else 0
         
     def setup_ui(self):
         """Setup the main cart UI with improved centering"""
@@ -215,15 +224,19 @@ class CartManager(QWidget):
         
     def refresh_cart(self):
         """Refresh cart display from database with improved empty state"""
+        # Read through our own session so the user's last change shows immediately
+        self.show_cart_items(self.db_manager.get_cart_items())
+        
+    def show_cart_items(self, cart_items):
+        """Rebuild the cart display from a list of cart items"""
+        self.displayed_cart_items = cart_items
+        
         # Clear existing items
         for i in reversed(range(self.cart_layout.count())):
             child = self.cart_layout.itemAt(i).widget()
             if child:
                 child.setParent(None)
         
-        # Get cart items from database
-        cart_items = self.db_manager.get_cart_items()
-        
         if not cart_items:
             # Show centered empty cart message
             empty_container = QWidget()
@@ -1,17 +1,27 @@
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QLabel
+from PySide6.QtWidgets import QApplication, QMainWindow, QLabel, QMessageBox
 from PySide6.QtCore import Qt, QTimer
-from ....ui.components.card import ProductCard  # Your ProductCard component
+from ....ui.components.product_grid import ProductGridView
+from ....ui.components.barcode_scanner import BarcodeScanner
 from .HomePage_ui import Ui_HomePage  # Your compiled UI file
-from ....database.database_manager import DatabaseManager
+from ....database.query_executor import query_executor
+from ....database.change_bus import change_bus
+from ....database.changes import PRODUCTS, VARIANTS
+from ....database.session import sessions
 class HomePage(QMainWindow, Ui_HomePage):
     def __init__(self):
         super().__init__()
         self.setupUi(self)
+        self.db = sessions.acquire(self)
        
         
         # Store all products data for filtering
         self.all_products = []
+        self.products_by_variant = {}
+        
+        # Set when the catalog changed since the last load
+        self.products_stale = True
+        change_bus().subscribe([PRODUCTS, VARIANTS], self.mark_products_stale, owner=self)
         
         # Setup search functionality
         self.setup_search()
@@ -19,6 +29,11 @@ class HomePage(QMainWindow, Ui_HomePage):
         # Setup dynamic products area
         self.setup_products_area()
 
+        # Scan-to-cart from a keyboard-wedge barcode scanner
+        self.barcode_scanner = BarcodeScanner(self)
+        self.barcode_scanner.scanned.connect(self.on_barcode_scanned)
+        self.barcode_scanner.install()
+
         # Load actual products
         self.load_products_for_display()
 
@@ -47,37 +62,46 @@ class HomePage(QMainWindow, Ui_HomePage):
         self.search_timer.start(300)
 
     def filter_products(self):
+        """Search the catalog index in the background and show the ranked matches"""
+        search_text = self.searchbox.text().strip()
+
+        if not search_text:
+            query_executor().cancel("home.search")
+            self.display_products(self.all_products)
+            return
+
+        query_executor().submit(
+            "home.search",
+            self.search_catalog,
+            search_text,
+            on_result=self.show_search_results,
+            on_error=lambda error: print("Search error:", error)
+        )
+
+    @staticmethod
+    def search_catalog(db, search_text):
+        """Runs on the query executor: exact search, else typo-tolerant close matches"""
+        variant_ids = db.search_products(search_text)
+        if variant_ids:
+            return variant_ids, False
+        return [variant_id for variant_id, _ in db.fuzzy_search_products(search_text)], True
+
+    def show_search_results(self, results):
+        """Display the matching products, best match first"""
         try:
-            search_text = self.searchbox.text().lower().strip()
-    
-            self.clear_products()
-    
-            if not search_text:
-                self.display_products(self.all_products)
-                return
-    
-            keywords = search_text.split()  # allow multiple keywords
-    
-            filtered = []
-            for product in self.all_products:
-                name = product.get("name", "").lower()
-                category = product.get("category", "").lower()
-                brand = product.get("brand", "").lower()
-    
-                # combine all searchable data
-                blob = f"{name} {category} {brand}"
-    
-                # ALL keywords must match somewhere
-                if all(kw in blob for kw in keywords):
-                    filtered.append(product)
-    
-            # Display
-            self.display_products(filtered)
-    
+            variant_ids, fuzzy = results
+            # Variants added since the last catalog load show up once it reloads
+            products = [self.products_by_variant[variant_id]
+                        for variant_id in variant_ids
+                        if variant_id in self.products_by_variant]
+            self.display_products(products)
+
+            if fuzzy and products:
+                self.empty_label.setText(f"No exact matches for '{self.searchbox.text()}', showing close matches")
+                self.empty_label.show()
         except Exception as e:
             print("Search error:", e)
 
-
     def display_products(self, products_list):
         """Display a list of products"""
         try:
@@ -89,67 +113,58 @@ class HomePage(QMainWindow, Ui_HomePage):
                 else:
                     message = "No products added yet"
                     
-                label = QLabel(message)
-                label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet("""
-                    QLabel {
-                        color: #666;
-                        font-size: 16px;
-                        padding: 20px;
-                    }
-                """)
-                self.products_grid.addWidget(label, 0, 0, 1, 3)
-                return
+                self.empty_label.setText(message)
+                self.empty_label.show()
+            else:
+                self.empty_label.hide()
 
-            # Display products
-            for product in products_list:
-                self.add_product_card(product)
+            # Update only the cards that were added, removed or changed
+            self.products_view.update_products(products_list)
                 
         except Exception as e:
             print(f"Error displaying products: {e}")
 
     def setup_products_area(self):
-        """Setup the dynamic products grid area"""
-        # Access your scroll area widget directly 
-        self.products_container = self.scrollAreaWidgetContents  # Direct access, no self.ui needed!
-        
-        # Get the EXISTING grid layout instead of creating a new one
-        self.products_grid = self.products_container.layout()
-        
-        # Configure the existing layout
-        self.products_grid.setSpacing(10)  # Space between cards
-        
-        # Keep track of current position
-        self.current_row = 0
-        self.current_col = 0
-    
-    def add_product_card(self, product_data):
-        """Add a single product card to the grid"""
-        # Create the card
-        card = ProductCard(product_data)
-        card.card_clicked.connect(self.open_product_detail)
-        card.add_to_cart_clicked.connect(self.on_add_to_cart)
-
-        # Connect signals to handle clicks
-        # card.card_clicked.connect(self.on_product_clicked)
-        # card.add_to_cart_clicked.connect(self.on_add_to_cart)
+        """Setup the virtualized products grid in place of the designer scroll area"""
+        self.products_view = ProductGridView()
+        self.products_view.view_clicked.connect(self.open_product_detail)
+        self.products_view.add_to_cart_clicked.connect(self.on_add_to_cart)
         
-        # Add to grid layout
-        self.products_grid.addWidget(card, self.current_row, self.current_col)
+        self.empty_label = QLabel()
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.setStyleSheet("""
+            QLabel {
+                color: #666;
+                font-size: 16px;
+                padding: 20px;
+            }
+        """)
+        self.empty_label.hide()
         
-        # Update position for next card
-        self.current_col += 1
-        if self.current_col >= 3:  # Max 3 per row
-            self.current_col = 0
-            self.current_row += 1
+        self.verticalLayout.replaceWidget(self.scrollArea, self.products_view)
+        self.scrollArea.hide()
+        self.verticalLayout.insertWidget(self.verticalLayout.indexOf(self.products_view), self.empty_label)
     
     def on_add_to_cart(self, product_data):
-        from ....ui.pages.SalesPage.widget import CartManager
-        cart_manager = CartManager(self)
+        # The Sales page hears about the new cart line from the change bus
         try:
-            cart_manager.add_product_to_cart(product_data.get("variant_id"))
+            success, message = self.db.add_to_cart(product_data.get("variant_id"))
         except Exception as e:
-            print(f"Error adding to cart: {e}")    
+            success, message = False, f"Error adding to cart: {e}"
+        if success:
+            QMessageBox.information(self, "Added to Cart", message)
+        else:
+            QMessageBox.warning(self, "Add to Cart Failed", message)
+
+    def on_barcode_scanned(self, barcode):
+        """Add the scanned product straight to the cart, no dialogs at the counter"""
+        try:
+            success, message = self.db.add_to_cart_by_barcode(barcode)
+        except Exception as e:
+            success, message = False, f"Error adding to cart: {e}"
+        if not success:
+            QApplication.beep()
+        self.statusBar().showMessage(f"{barcode}: {message}", 4000)
 
     def open_product_detail(self, product_data):
         from ....ui.components.productdetailspage import ProductDetailPage
@@ -158,48 +173,47 @@ class HomePage(QMainWindow, Ui_HomePage):
         main_window.stacked_widget.addWidget(detail_page)
         main_window.stacked_widget.setCurrentWidget(detail_page)
     
-    def refresh_products(self):
-        """Refresh all products from database"""
+    def mark_products_stale(self, changed_tables=None):
+        """Products or variants changed; reload on the next refresh"""
+        self.products_stale = True
+
+    def refresh_products(self, force=False):
+        """Refresh products from database if the catalog changed since the last load"""
         try:
-            print("Refreshing products...")
+            if not (force or self.products_stale):
+                return
 
-            # Clear existing products data
-            self.all_products.clear()
-            
-            # Clear existing cards
-            self.clear_products()
+            print("Refreshing products...")
 
-            # Reload from database
+            # Reload from database; the current cards stay until the new data arrives
             self.load_products_for_display()
 
-            print("Products refreshed successfully!")
-
         except Exception as e:
             print(f"Error refreshing products: {e}")
 
     def clear_products(self):
         """Clear all product cards from the grid"""
-        if not hasattr(self, 'products_grid') or self.products_grid is None:
+        if not hasattr(self, 'products_view'):
             return
-
-        # Remove all widgets from the grid
-        while self.products_grid.count():
-            item = self.products_grid.takeAt(0)
-            if item and item.widget():
-                item.widget().deleteLater()
-
-        # Reset position counters
-        self.current_row = 0
-        self.current_col = 0
+        self.products_view.set_products([])
 
     def load_products_for_display(self):
-        """Load all products and display them"""
+        """Load all products in the background and display them"""
+        # Changes committed after this point mark the page stale again
+        self.products_stale = False
+        query_executor().submit(
+            "home.products",
+            lambda db: db.get_all_products_for_display(),
+            on_result=self.show_products,
+            on_error=lambda error: print(f"Error loading products: {error}")
+        )
+
+    def show_products(self, products_data):
+        """Update the product cards with freshly loaded data"""
         try:
-            db = DatabaseManager()
-            products_data = db.get_all_products_for_display()
-            
             # Clear and repopulate all_products list
             self.all_products.clear()
+            self.products_by_variant = {}
             
             if len(products_data) == 0:
                 # No products in database
@@ -208,37 +222,9 @@ class HomePage(QMainWindow, Ui_HomePage):
 
             # Store all products for filtering
             for row in products_data:
-                product_id = row[0]
-                product_name = row[1] 
-                product_description = row[2]
-                brand = row[3]
-                category = row[4]
-                purchase_price = row[5]
-                selling_price = row[6]
-                stock = row[7]
-                image_path = row[8]
-                variant_id = row[9]
-                status = row[10]  # New status field
-                deactivated_reason = row[11]
-
-                # Create product info dictionary
-                product_info = {
-                    'id': product_id,
-                    'name': product_name,
-                    'description': product_description,
-                    'brand': brand,
-                    'category': category,
-                    'purchase_price': purchase_price,
-                    'selling_price': selling_price,
-                    'stock': stock,
-                    'image': image_path,
-                    'variant_id': variant_id,
-                    'status': status,
-                    'deactivated_reason': deactivated_reason
-                }
-                
-                # Add to all products list
+                product_info = self.product_info(row)
                 self.all_products.append(product_info)
+                self.products_by_variant[product_info['variant_id']] = product_info
             
             # Display all products initially (or apply current search filter)
             if hasattr(self, 'searchbox') and self.searchbox.text().strip():
@@ -248,9 +234,29 @@ class HomePage(QMainWindow, Ui_HomePage):
                 # Show all products
                 self.display_products(self.all_products)
 
+            print("Products refreshed successfully!")
+
         except Exception as e:
             print(f"Error loading products: {e}")
 
+    @staticmethod
+    def product_info(row):
+        """Product dict for one get_all_products_for_display row"""
+        return {
+            'id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'brand': row[3],
+            'category': row[4],
+            'purchase_price': row[5],
+            'selling_price': row[6],
+            'stock': row[7],
+            'image': row[8],
+            'variant_id': row[9],
+            'status': row[10],
+            'deactivated_reason': row[11]
+        }
+
     def clear_search(self):
         """Clear search and show all products"""
         if hasattr(self, 'searchbox'):
@@ -264,25 +270,9 @@ class HomePage(QMainWindow, Ui_HomePage):
 
     def get_search_results_count(self):
         """Get count of current search results"""
-        if not hasattr(self, 'searchbox'):
+        if not hasattr(self, 'searchbox') or not self.searchbox.text().strip():
             return len(self.all_products)
-            
-        search_text = self.searchbox.text().lower().strip()
-        if not search_text:
-            return len(self.all_products)
-        
-        count = 0
-        for product in self.all_products:
-            product_name = product.get('name', '').lower()
-            product_category = product.get('category', '').lower()
-            product_brand = product.get('brand', '').lower()
-            
-            if (search_text in product_name or 
-                search_text in product_category or 
-                search_text in product_brand):
-                count += 1
-        
-        return count
+        return self.products_view.model().rowCount()
 
 
 # Usage example
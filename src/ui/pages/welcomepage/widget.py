@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import QWidget,QMessageBox
 from PySide6.QtCore import QTimer, Signal  # Add Signal import
 from .ui_widget import Ui_Form
-from src.database.database_manager import DatabaseManager
+from src.database.session import sessions
 
 class WelcomePage(QWidget, Ui_Form):
     
@@ -11,7 +11,7 @@ class WelcomePage(QWidget, Ui_Form):
         super().__init__()
         self.setupUi(self)
         self.btnCompany.clicked.connect(self.getCompanyName)
-        self.db = DatabaseManager()
+        self.db = sessions.acquire(self)
 
     def getCompanyName(self):
         company_name = self.companyname.text().strip()